@@ -1,17 +1,18 @@
 import streamlit as st
-import requests
-import json
 import time
 import random
-from datetime import datetime, timedelta
-import sqlite3
-import hashlib
+from datetime import datetime
 import os
-from typing import Dict, List, Optional
-import base64
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
 from io import BytesIO
-import matplotlib.pyplot as plt
-import pandas as pd
+from config import APP_CONFIG, DATABASE_CONFIG
+from utils.charts import progress_chart_images, subject_summary
+from utils.content_pack import get_content_pack, pack_subject
+from utils.database import DatabaseManager
+from utils.keywords import CHAT_INTENT_MATCHER
+from utils.llm_stream import TUTOR_SYSTEM_PROMPT, TimedStream, stream_chat
+from utils.templates import APP_TEMPLATES
+from utils.tts import get_tts, responsivevoice_url
 
 # Page configuration
 st.set_page_config(
@@ -100,294 +101,67 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Database setup
-def init_database():
-    conn = sqlite3.connect('ai_tutor.db')
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            name TEXT NOT NULL,
-            age INTEGER,
-            learning_needs TEXT,
-            preferences TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Learning sessions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS learning_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            subject TEXT,
-            activity_type TEXT,
-            score INTEGER,
-            duration INTEGER,
-            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Progress tracking table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            subject TEXT,
-            skill TEXT,
-            level INTEGER DEFAULT 1,
-            points INTEGER DEFAULT 0,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-# Initialize database
-init_database()
+@st.cache_resource
+def get_database() -> DatabaseManager:
+    """Shared DatabaseManager, created once per server process"""
+    return DatabaseManager(APP_CONFIG['database_name'])
 
 # Free API configurations
 class FreeAPIs:
     @staticmethod
-    def get_educational_content(topic: str, difficulty: str = "beginner") -> Dict:
+    def get_educational_content(topic: str, difficulty: str = "beginner",
+                                special_needs: Optional[str] = None) -> Mapping:
         """Simulate educational content generation using free APIs"""
         # In a real implementation, you could use:
         # - OpenAI's free tier
         # - Hugging Face Inference API
         # - Google's Gemini API free tier
         
-        content_templates = {
-            "math": {
-                "beginner": {
-                    "title": f"Basic {topic}",
-                    "content": f"Let's learn about {topic}! We'll start with simple concepts and use visual aids to help you understand.",
-                    "activities": [
-                        "Count objects in pictures",
-                        "Match numbers with quantities",
-                        "Simple addition with visual aids"
-                    ],
-                    "tips": "Use your fingers or objects to count along!"
-                },
-                "intermediate": {
-                    "title": f"Exploring {topic}",
-                    "content": f"Now that you know the basics, let's explore {topic} in more detail with fun exercises.",
-                    "activities": [
-                        "Solve word problems",
-                        "Pattern recognition",
-                        "Mental math exercises"
-                    ],
-                    "tips": "Take your time and think step by step!"
-                }
-            },
-            "reading": {
-                "beginner": {
-                    "title": f"Reading Adventures: {topic}",
-                    "content": f"Welcome to our reading journey! Today we'll explore {topic} with pictures and simple words.",
-                    "activities": [
-                        "Picture-word matching",
-                        "Sound out letters",
-                        "Simple sentence reading"
-                    ],
-                    "tips": "Sound out each letter slowly and put them together!"
-                },
-                "intermediate": {
-                    "title": f"Story Time: {topic}",
-                    "content": f"Let's read an exciting story about {topic} and learn new words together!",
-                    "activities": [
-                        "Read short paragraphs",
-                        "Answer comprehension questions",
-                        "Vocabulary building"
-                    ],
-                    "tips": "If you don't know a word, try to guess from the pictures!"
-                }
-            },
-            "social": {
-                "beginner": {
-                    "title": f"Social Skills: {topic}",
-                    "content": f"Learning about {topic} helps us interact better with others. Let's practice together!",
-                    "activities": [
-                        "Role-playing scenarios",
-                        "Emotion recognition",
-                        "Communication practice"
-                    ],
-                    "tips": "Practice makes perfect! Try these skills with family and friends."
-                }
-            }
-        }
-        
         subject = topic.lower()
         if "math" in subject or "number" in subject:
-            return content_templates["math"][difficulty]
+            template_subject = "math"
         elif "read" in subject or "story" in subject or "book" in subject:
-            return content_templates["reading"][difficulty]
+            template_subject = "reading"
         elif "social" in subject or "friend" in subject or "emotion" in subject:
-            return content_templates["social"][difficulty]
+            template_subject = "social"
         else:
-            return content_templates["reading"][difficulty]
+            template_subject = "reading"
+        
+        pack = get_content_pack()
+        if pack is not None:
+            lesson = pack.sample_lesson(pack_subject(topic, template_subject), difficulty, topic,
+                                        needs=special_needs)
+            if lesson is not None:
+                return lesson
+        
+        # Levels a subject has no template for get its beginner lesson
+        return APP_TEMPLATES.lesson(template_subject, difficulty, topic,
+                                    default=(template_subject, "beginner"))
     
     @staticmethod
     def text_to_speech_url(text: str) -> str:
         """Generate text-to-speech using free APIs"""
-        # Using ResponsiveVoice (free tier)
-        # In production, you might use Google Cloud TTS free tier or Amazon Polly
-        encoded_text = requests.utils.quote(text)
-        return f"https://responsivevoice.org/responsivevoice/getvoice.php?t={encoded_text}&tl=en&sv=g1&vn=&pitch=0.5&rate=0.5&vol=1"
+        # Using ResponsiveVoice (free tier); the browser fetches and plays it
+        return responsivevoice_url(text)
     
     @staticmethod
-    def generate_quiz_questions(topic: str, difficulty: str = "beginner") -> List[Dict]:
+    def text_to_speech_chunks(text: str) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """(sentence, audio) pairs rendered on the server and cached, first sentence first"""
+        return get_tts().render_chunks(text)
+    
+    @staticmethod
+    def generate_quiz_questions(topic: str, difficulty: str = "beginner",
+                                special_needs: Optional[str] = None) -> List[Mapping]:
         """Generate quiz questions based on topic and difficulty"""
-        quiz_templates = {
-            "math": {
-                "beginner": [
-                    {
-                        "question": "What comes after the number 5?",
-                        "options": ["4", "6", "7", "3"],
-                        "correct": 1,
-                        "explanation": "When counting: 1, 2, 3, 4, 5, 6... So 6 comes after 5!"
-                    },
-                    {
-                        "question": "How many apples are there? 🍎🍎🍎",
-                        "options": ["2", "3", "4", "5"],
-                        "correct": 1,
-                        "explanation": "Count them: 1, 2, 3 apples!"
-                    }
-                ],
-                "intermediate": [
-                    {
-                        "question": "What is 7 + 3?",
-                        "options": ["9", "10", "11", "8"],
-                        "correct": 1,
-                        "explanation": "7 + 3 = 10. You can count: 7, 8, 9, 10!"
-                    }
-                ]
-            },
-            "reading": {
-                "beginner": [
-                    {
-                        "question": "What sound does the letter 'B' make?",
-                        "options": ["Buh", "Duh", "Guh", "Puh"],
-                        "correct": 0,
-                        "explanation": "The letter B makes the 'Buh' sound, like in 'Ball' or 'Book'!"
-                    }
-                ],
-                "intermediate": [
-                    {
-                        "question": "What is the main character in a story called?",
-                        "options": ["Villain", "Hero", "Protagonist", "Author"],
-                        "correct": 2,
-                        "explanation": "The protagonist is the main character that the story follows!"
-                    }
-                ]
-            }
-        }
-        
         subject = "math" if "math" in topic.lower() else "reading"
-        return quiz_templates.get(subject, {}).get(difficulty, quiz_templates["reading"]["beginner"])
-
-# User authentication functions
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def create_user(username: str, password: str, name: str, age: int, learning_needs: str, preferences: str) -> bool:
-    try:
-        conn = sqlite3.connect('ai_tutor.db')
-        cursor = conn.cursor()
-        
-        password_hash = hash_password(password)
-        cursor.execute('''
-            INSERT INTO users (username, password_hash, name, age, learning_needs, preferences)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (username, password_hash, name, age, learning_needs, preferences))
-        
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-
-def authenticate_user(username: str, password: str) -> Optional[Dict]:
-    conn = sqlite3.connect('ai_tutor.db')
-    cursor = conn.cursor()
-    
-    password_hash = hash_password(password)
-    cursor.execute('''
-        SELECT id, username, name, age, learning_needs, preferences
-        FROM users WHERE username = ? AND password_hash = ?
-    ''', (username, password_hash))
-    
-    user = cursor.fetchone()
-    conn.close()
-    
-    if user:
-        return {
-            'id': user[0],
-            'username': user[1],
-            'name': user[2],
-            'age': user[3],
-            'learning_needs': user[4],
-            'preferences': user[5]
-        }
-    return None
-
-def save_learning_session(user_id: int, subject: str, activity_type: str, score: int, duration: int):
-    conn = sqlite3.connect('ai_tutor.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (user_id, subject, activity_type, score, duration))
-    
-    conn.commit()
-    conn.close()
-
-def update_progress(user_id: int, subject: str, skill: str, points: int):
-    conn = sqlite3.connect('ai_tutor.db')
-    cursor = conn.cursor()
-    
-    # Check if progress record exists
-    cursor.execute('''
-        SELECT id, points, level FROM progress 
-        WHERE user_id = ? AND subject = ? AND skill = ?
-    ''', (user_id, subject, skill))
-    
-    existing = cursor.fetchone()
-    
-    if existing:
-        new_points = existing[1] + points
-        new_level = existing[2] + (1 if new_points >= existing[2] * 100 else 0)
-        
-        cursor.execute('''
-            UPDATE progress SET points = ?, level = ?, last_updated = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (new_points, new_level, existing[0]))
-    else:
-        cursor.execute('''
-            INSERT INTO progress (user_id, subject, skill, points)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, subject, skill, points))
-    
-    conn.commit()
-    conn.close()
-
-def get_user_progress(user_id: int) -> List[Dict]:
-    conn = sqlite3.connect('ai_tutor.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT subject, skill, level, points FROM progress WHERE user_id = ?
-    ''', (user_id,))
-    
-    progress = cursor.fetchall()
-    conn.close()
-    
-    return [{'subject': p[0], 'skill': p[1], 'level': p[2], 'points': p[3]} for p in progress]
+        
+        pack = get_content_pack()
+        pack_key = pack_subject(topic, subject)
+        if pack is not None and pack.count("questions", pack_key, difficulty, special_needs):
+            return pack.sample_questions(pack_key, difficulty, DATABASE_CONFIG['content_pack']['quiz_length'],
+                                         needs=special_needs)
+        
+        return list(APP_TEMPLATES.quiz(subject, difficulty, default=("reading", "beginner")))
 
 # Accessibility features
 def render_accessibility_controls():
@@ -444,7 +218,7 @@ def main():
             password = st.text_input("Password", type="password", key="login_password")
             
             if st.button("Login", key="login_btn"):
-                user = authenticate_user(username, password)
+                user = get_database().authenticate_user(username, password)
                 if user:
                     st.session_state.user = user
                     st.success(f"Welcome back, {user['name']}!")
@@ -486,7 +260,7 @@ def main():
             
             if st.button("Create Account", key="register_btn"):
                 if reg_name and reg_username and reg_password:
-                    if create_user(reg_username, reg_password, reg_name, reg_age, learning_needs, json.dumps(preferences)):
+                    if get_database().create_user(reg_username, reg_password, reg_name, reg_age, learning_needs, preferences):
                         st.success("Account created successfully! Please login.")
                     else:
                         st.error("Username already exists. Please choose a different one.")
@@ -546,23 +320,20 @@ def render_dashboard(user):
     
     st.markdown(f"### {greeting}, {user['name']}! Ready to learn something amazing today? 🌟")
     
-    # Progress overview
-    progress_data = get_user_progress(user['id'])
+    # Progress overview (single lookup on the user_stats summary row)
+    stats = get_database().get_user_stats(user['id'])
     
-    if progress_data:
+    if stats.get('skills_tracked'):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_points = sum(p['points'] for p in progress_data)
-            st.metric("Total Points", total_points, "🏆")
+            st.metric("Total Points", stats['total_points'], "🏆")
         
         with col2:
-            avg_level = sum(p['level'] for p in progress_data) / len(progress_data)
-            st.metric("Average Level", f"{avg_level:.1f}", "📈")
+            st.metric("Average Level", f"{stats['average_level']:.1f}", "📈")
         
         with col3:
-            subjects_count = len(set(p['subject'] for p in progress_data))
-            st.metric("Subjects Learning", subjects_count, "📚")
+            st.metric("Subjects Learning", stats['subjects_learning'], "📚")
     
     # Quick actions
     st.subheader("🚀 Quick Start")
@@ -584,9 +355,9 @@ def render_dashboard(user):
             st.success("Let's learn about feelings! 😊")
     
     # Recent achievements
-    if progress_data:
+    if stats.get('skills_tracked'):
         st.subheader("🏅 Recent Achievements")
-        for progress in progress_data[-3:]:  # Show last 3
+        for progress in get_database().get_user_progress(user['id'], limit=3):  # Show last 3
             st.markdown(f"""
             <div class="achievement-badge">
                 Level {progress['level']} in {progress['subject']} - {progress['skill']}
@@ -610,7 +381,7 @@ def render_learning_activities(user):
     
     if st.button("Start Learning Session"):
         # Generate content using free APIs
-        content = FreeAPIs.get_educational_content(subject, difficulty.lower())
+        content = FreeAPIs.get_educational_content(subject, difficulty.lower(), user['learning_needs'])
         
         st.markdown(f"""
         <div class="learning-card">
@@ -633,16 +404,36 @@ def render_learning_activities(user):
         
         # Text-to-speech option
         if st.button("🔊 Read This Aloud"):
-            tts_url = FreeAPIs.text_to_speech_url(content['content'])
-            st.audio(tts_url)
+            render_read_aloud(content['content'])
         
         # Complete session
         if st.button("✅ Complete Session"):
-            save_learning_session(user['id'], subject, "lesson", 100, 15)
-            update_progress(user['id'], subject, "general", 10)
+            get_database().queue_learning_session(user['id'], subject, "lesson", 100, 15)
+            get_database().queue_progress(user['id'], subject, "general", 10)
             st.success("Great job! Session completed! 🎉")
             st.balloons()
 
+def render_read_aloud(text: str):
+    """Show the first sentence's audio as soon as it is ready, then the rest of the text"""
+    chunks = FreeAPIs.text_to_speech_chunks(text)
+    first_sentence, first_audio = next(chunks, (None, None))
+    if first_sentence is None:
+        return
+    if first_audio is None:
+        st.audio(FreeAPIs.text_to_speech_url(text))
+        return
+    
+    st.audio(first_audio, format="audio/mp3")
+    
+    # The remaining sentences were synthesized while the first one was shown
+    rest = list(chunks)
+    if rest:
+        st.caption("Keep listening:")
+        if all(audio for _, audio in rest):
+            st.audio(b"".join(audio for _, audio in rest), format="audio/mp3")
+        else:
+            st.audio(FreeAPIs.text_to_speech_url(" ".join(sentence for sentence, _ in rest)))
+
 def render_quiz_section(user):
     st.header("🎯 Practice Quiz")
     
@@ -659,7 +450,8 @@ def render_quiz_section(user):
         
         if st.button("Start Quiz! 🚀"):
             st.session_state.quiz_started = True
-            st.session_state.quiz_questions = FreeAPIs.generate_quiz_questions(quiz_subject, quiz_difficulty.lower())
+            st.session_state.quiz_questions = FreeAPIs.generate_quiz_questions(
+                quiz_subject, quiz_difficulty.lower(), user['learning_needs'])
             st.session_state.current_question = 0
             st.session_state.quiz_score = 0
             st.rerun()
@@ -724,8 +516,8 @@ def render_quiz_section(user):
                 points = 10
             
             # Save results
-            save_learning_session(user['id'], "Quiz", "assessment", score, 10)
-            update_progress(user['id'], "Quiz", "problem_solving", points)
+            get_database().queue_learning_session(user['id'], "Quiz", "assessment", score, 10)
+            get_database().queue_progress(user['id'], "Quiz", "problem_solving", points)
             
             if st.button("Take Another Quiz"):
                 st.session_state.quiz_started = False
@@ -734,52 +526,53 @@ def render_quiz_section(user):
 def render_progress_section(user):
     st.header("📈 My Learning Progress")
     
-    progress_data = get_user_progress(user['id'])
+    progress_data = get_database().get_user_progress(user['id'])
     
     if progress_data:
-        # Create progress visualization
-        df = pd.DataFrame(progress_data)
-        
         # Progress by subject
         st.subheader("📊 Progress by Subject")
-        subject_progress = df.groupby('subject').agg({
-            'level': 'mean',
-            'points': 'sum'
-        }).round(1)
+        summary = subject_summary(progress_data)
         
         col1, col2 = st.columns(2)
         
-        with col1:
-            fig, ax = plt.subplots(figsize=(8, 6))
-            subject_progress['level'].plot(kind='bar', ax=ax, color='skyblue')
-            ax.set_title('Average Level by Subject')
-            ax.set_ylabel('Level')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
-        
-        with col2:
-            fig, ax = plt.subplots(figsize=(8, 6))
-            subject_progress['points'].plot(kind='bar', ax=ax, color='lightgreen')
-            ax.set_title('Total Points by Subject')
-            ax.set_ylabel('Points')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+        if APP_CONFIG['charts']['renderer'] == "native":
+            chart_data = {
+                'Subject': list(summary),
+                'Level': [level for level, _ in summary.values()],
+                'Points': [points for _, points in summary.values()]
+            }
+            with col1:
+                st.caption("Average Level by Subject")
+                st.bar_chart(chart_data, x='Subject', y='Level', color='#87ceeb')
+            with col2:
+                st.caption("Total Points by Subject")
+                st.bar_chart(chart_data, x='Subject', y='Points', color='#90ee90')
+        else:
+            # Re-rendered only when this learner's progress changes
+            level_chart, points_chart = progress_chart_images(user['id'], progress_data)
+            if APP_CONFIG['charts']['format'] == "svg":
+                # st.image takes SVG as markup text
+                level_chart, points_chart = level_chart.decode(), points_chart.decode()
+            with col1:
+                st.image(level_chart, use_column_width=True)
+            with col2:
+                st.image(points_chart, use_column_width=True)
         
         # Detailed progress table
         st.subheader("📋 Detailed Progress")
-        st.dataframe(df, use_container_width=True)
+        st.dataframe(progress_data, use_container_width=True)
         
         # Learning streaks and achievements
         st.subheader("🏆 Achievements")
-        total_points = df['points'].sum()
-        max_level = df['level'].max()
+        total_points = sum(points for _, points in summary.values())
+        max_level = max(row['level'] for row in progress_data)
         
         achievements = []
         if total_points >= 100:
             achievements.append("🌟 Century Club - 100+ Points!")
         if max_level >= 5:
             achievements.append("🚀 Level Master - Reached Level 5!")
-        if len(df['subject'].unique()) >= 3:
+        if len(summary) >= 3:
             achievements.append("🎓 Multi-Subject Learner!")
         
         if achievements:
@@ -821,7 +614,7 @@ def render_games_section(user):
             
             if guess == st.session_state.target_number:
                 st.success(f"🎉 Correct! You got it in {st.session_state.guesses} tries!")
-                update_progress(user['id'], "Games", "number_recognition", 5)
+                get_database().queue_progress(user['id'], "Games", "number_recognition", 5)
                 if st.button("Play Again"):
                     del st.session_state.target_number
                     st.rerun()
@@ -857,7 +650,7 @@ def render_games_section(user):
             if st.button("Check Answer"):
                 if user_sequence == st.session_state.color_sequence:
                     st.success("🎉 Perfect memory! Well done!")
-                    update_progress(user['id'], "Games", "memory", 8)
+                    get_database().queue_progress(user['id'], "Games", "memory", 8)
                 else:
                     st.error("Not quite right. Try again! 💪")
                 
@@ -896,30 +689,56 @@ def render_ai_tutor_chat(user):
         # Add user message to history
         st.session_state.chat_history.append({'role': 'user', 'content': user_input})
         
-        # Generate AI response (simplified for demo)
-        ai_response = generate_ai_response(user_input, user)
+        st.markdown(f"**You:** {user_input}")
+        
+        # Show the reply as it streams in rather than after it is complete
+        placeholder = st.empty()
+        ai_response = ""
+        for chunk in generate_ai_response(user_input, user, st.session_state.chat_history[:-1]):
+            ai_response += chunk
+            placeholder.markdown(f"**AI Tutor:** {ai_response}▌")
+        placeholder.markdown(f"**AI Tutor:** {ai_response}")
         st.session_state.chat_history.append({'role': 'assistant', 'content': ai_response})
         
         st.rerun()
 
-def generate_ai_response(user_input: str, user: Dict) -> str:
-    """Generate AI tutor response based on user input"""
-    input_lower = user_input.lower()
+def generate_ai_response(user_input: str, user: Dict,
+                         history: Optional[List[Dict]] = None) -> Iterator[str]:
+    """Stream the AI tutor's reply chunk by chunk, from a model when one is configured"""
+    messages = ([{'role': 'system', 'content': TUTOR_SYSTEM_PROMPT}]
+                + (history or [])[-6:]
+                + [{'role': 'user', 'content': user_input}])
+    
+    stream = stream_chat(messages)
+    if stream is not None:
+        # Time to first token is recorded in tutor_stream_metrics
+        streamed = False
+        for chunk in TimedStream(stream):
+            streamed = True
+            yield chunk
+        if streamed:
+            return
+    
+    yield rule_based_response(user_input, user)
+
+def rule_based_response(user_input: str, user: Dict) -> str:
+    """Offline tutor reply chosen by keyword intent"""
+    intent = CHAT_INTENT_MATCHER.classify(user_input)
     
     # Simple rule-based responses (in production, use actual AI APIs)
-    if any(word in input_lower for word in ['help', 'stuck', 'difficult', 'hard']):
+    if intent == 'help':
         return f"I understand this might be challenging, {user['name']}! Remember, every expert was once a beginner. Let's break this down into smaller steps. What specific part would you like help with? 🤗"
     
-    elif any(word in input_lower for word in ['math', 'number', 'count']):
+    elif intent == 'math':
         return "Math can be fun! 🔢 Try using objects around you to count, or draw pictures to help visualize problems. Would you like me to create a simple math exercise for you?"
     
-    elif any(word in input_lower for word in ['read', 'book', 'story']):
+    elif intent == 'reading':
         return "Reading opens up amazing worlds! 📚 Start with books that have lots of pictures, and don't worry about reading every word perfectly. The most important thing is to enjoy the story! What kind of stories do you like?"
     
-    elif any(word in input_lower for word in ['sad', 'frustrated', 'angry', 'upset']):
+    elif intent == 'upset':
         return f"It's okay to feel that way sometimes, {user['name']}. Learning can be challenging, but you're doing great! Take a deep breath, maybe take a short break, and remember that I'm here to help you. You've got this! 💪😊"
     
-    elif any(word in input_lower for word in ['good', 'great', 'awesome', 'happy']):
+    elif intent == 'positive':
         return "That's wonderful to hear! 🌟 I'm so proud of your positive attitude. Keep up the great work! What would you like to learn about next?"
     
     else:
@@ -939,7 +758,7 @@ def render_settings(user):
         st.info(f"**Learning Needs:** {user['learning_needs']}")
     
     with col2:
-        preferences = json.loads(user['preferences']) if user['preferences'] else []
+        preferences = user['preferences']
         st.info(f"**Learning Preferences:** {', '.join(preferences) if preferences else 'None set'}")
     
     st.subheader("🎨 Appearance Settings")
@@ -976,13 +795,13 @@ def render_settings(user):
     
     with col1:
         if st.button("📊 Export Progress Data"):
-            progress_data = get_user_progress(user['id'])
-            if progress_data:
-                df = pd.DataFrame(progress_data)
-                csv = df.to_csv(index=False)
+            if get_database().get_user_stats(user['id']).get('skills_tracked'):
+                # download_button holds the whole payload anyway, so encode into memory
+                export_file = BytesIO()
+                get_database().write_export(export_file, [user['id']], ('progress',), 'csv')
                 st.download_button(
                     label="Download CSV",
-                    data=csv,
+                    data=export_file.getvalue(),
                     file_name=f"{user['name']}_progress.csv",
                     mime="text/csv"
                 )
@@ -11,7 +11,15 @@ APP_CONFIG = {
     "title": "AI Tutor for Special Needs Learners",
     "version": "1.0.0",
     "debug": True,
-    "database_name": "ai_tutor.db"
+    "database_name": "ai_tutor.db",
+
+    # My Progress charts (see utils/charts.py)
+    "charts": {
+        "renderer": "matplotlib",   # or "native" for st.bar_chart, which skips matplotlib
+        "format": "png",            # matplotlib image format: "png" or "svg"
+        "dpi": 100,
+        "cache_entries": 256        # Rendered images kept in memory
+    }
 }
 
 # Free API Configurations
@@ -30,6 +38,7 @@ API_CONFIG = {
     # OpenAI (Free Credits)
     "openai": {
         "api_key": os.getenv("OPENAI_API_KEY", ""),
+        "api_url": "https://api.openai.com/v1/chat/completions",
         "model": "gpt-3.5-turbo",
         "max_tokens": 150
     },
@@ -37,9 +46,78 @@ API_CONFIG = {
     # Google Gemini (Free Tier)
     "gemini": {
         "api_key": os.getenv("GEMINI_API_KEY", ""),
+        "api_url": "https://generativelanguage.googleapis.com/v1beta/models/",
         "model": "gemini-pro"
     },
     
+    # Shared HTTP client (keep-alive connection pools)
+    "http": {
+        "pool_connections": 10,   # Number of hosts kept in the pool
+        "pool_maxsize": 32,       # Open connections per host
+        "timeout": 30,
+        "connect_timeout": 5,
+        "keepalive_expiry": 60    # Seconds an idle async connection stays open
+    },
+
+    # Retries for model API calls
+    "retry": {
+        "max_attempts": 3,
+        "base_delay": 0.5,        # Seconds before the first retry
+        "max_delay": 4.0,
+        "multiplier": 2.0,
+        "deadline": 8.0,          # Give up (and use templates) after this many seconds
+        "retry_statuses": [429, 502, 503, 504]
+    },
+
+    # Shared free-tier quotas per provider (see utils/rate_limit.py); omit a limit to not enforce it
+    "rate_limits": {
+        "max_wait": 2.0,          # Queue up to this long for quota, else shed to templates
+        "shared": False,          # Keep bucket levels in SQLite so all worker processes share them
+        "providers": {
+            "huggingface": {"requests_per_minute": 60, "requests_per_day": 1000},
+            "openai": {"requests_per_minute": 3, "tokens_per_minute": 40000,
+                       "requests_per_day": 200},
+            "gemini": {"requests_per_minute": 15, "tokens_per_minute": 32000,
+                       "requests_per_day": 1500}
+        }
+    },
+
+    # Per-model circuit breaker
+    "circuit_breaker": {
+        "failure_threshold": 5,   # Consecutive failures before the breaker opens
+        "reset_timeout": 30.0     # Seconds before a trial call is let through
+    },
+
+    # Provider selection for lesson generation (see utils/router.py)
+    "router": {
+        "window": 200,            # Recent calls per provider used for p50/p95 and error rate
+        "min_samples": 5,         # Calls before a provider is ranked on its latency
+        "max_error_rate": 0.5,    # Above this a provider is only tried after the others
+        "hedge": False,           # Race a second provider once the first passes its p95
+        "hedge_min_delay": 0.5,   # Never hedge sooner than this many seconds
+        "max_workers": 16
+    },
+
+    # Cache for generated model output (see utils/content_cache.py)
+    "content_cache": {
+        "memory_entries": 512,          # In-process LRU tier
+        "disk_entries": 20000,          # Rows kept in the content_cache table
+        "ttl_seconds": 7 * 24 * 3600,   # Fresh for a week...
+        "stale_seconds": 24 * 3600      # ...then served stale for a day while refreshing
+    },
+
+    # analyze_emotion requests sent to the classifier as one batched call
+    "emotion_batching": {
+        "max_batch": 32,          # Texts per call
+        "max_wait_ms": 20         # How long the first text waits for company
+    },
+
+    # Offline cache warm-up job (python -m utils.pregenerate)
+    "pregenerate": {
+        "workers": 4,                   # Concurrent model calls
+        "requests_per_second": 2.0      # Start rate across all workers
+    },
+
     # Text-to-Speech APIs
     "tts": {
         "responsivevoice": {
@@ -53,6 +131,16 @@ API_CONFIG = {
             "api_key": os.getenv("GOOGLE_TTS_API_KEY", ""),
             "language": "en-US",
             "voice": "en-US-Wavenet-F"
+        },
+        # Lessons are read sentence by sentence, synthesized concurrently
+        "chunking": {
+            "max_chars": 300,     # Longer sentences are split between words
+            "workers": 4          # Sentences synthesized at once
+        },
+        # Rendered audio kept on the server (see utils/tts.py)
+        "cache": {
+            "directory": "tts_cache",
+            "max_bytes": 256 * 1024 * 1024    # Least recently played files go first
         }
     }
 }
@@ -210,6 +298,9 @@ DATABASE_CONFIG = {
                 "duration INTEGER",
                 "completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
                 "FOREIGN KEY (user_id) REFERENCES users (id)"
+            ],
+            "indexes": [
+                {"name": "idx_sessions_user_completed", "columns": ["user_id", "completed_at"]}
             ]
         },
         "progress": {
@@ -222,6 +313,12 @@ DATABASE_CONFIG = {
                 "points INTEGER DEFAULT 0",
                 "last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
                 "FOREIGN KEY (user_id) REFERENCES users (id)"
+            ],
+            "indexes": [
+                {"name": "idx_progress_user_subject_skill",
+                 "columns": ["user_id", "subject", "skill"], "unique": True},
+                {"name": "idx_progress_subject_user",
+                 "columns": ["subject", "user_id", "points"]}
             ]
         },
         "achievements": {
@@ -231,8 +328,136 @@ DATABASE_CONFIG = {
                 "achievement_id TEXT",
                 "earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
                 "FOREIGN KEY (user_id) REFERENCES users (id)"
+            ],
+            "indexes": [
+                {"name": "idx_achievements_user_achievement",
+                 "columns": ["user_id", "achievement_id"], "unique": True}
+            ]
+        },
+        # Per-user summary maintained incrementally by the write paths
+        "user_stats": {
+            "columns": [
+                "user_id INTEGER PRIMARY KEY",
+                "total_points INTEGER DEFAULT 0",
+                "level_sum INTEGER DEFAULT 0",
+                "skills_count INTEGER DEFAULT 0",
+                "subjects_count INTEGER DEFAULT 0",
+                "session_count INTEGER DEFAULT 0",
+                "total_duration INTEGER DEFAULT 0",
+                "score_sum INTEGER DEFAULT 0",
+                "achievements_count INTEGER DEFAULT 0",
+                "last_activity_date TEXT",
+                "current_streak INTEGER DEFAULT 0",
+                "FOREIGN KEY (user_id) REFERENCES users (id)"
+            ]
+        },
+        # Sessions removed by the retention job when archiving to a table
+        "learning_sessions_archive": {
+            "columns": [
+                "id INTEGER PRIMARY KEY",
+                "user_id INTEGER",
+                "subject TEXT",
+                "activity_type TEXT",
+                "score INTEGER",
+                "duration INTEGER",
+                "completed_at TIMESTAMP",
+                "archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+            ]
+        },
+        # Points earned per ISO 8601 week ("%G-%V", UTC), for weekly leaderboards
+        "weekly_points": {
+            "columns": [
+                "week TEXT NOT NULL",
+                "user_id INTEGER NOT NULL",
+                "points INTEGER DEFAULT 0",
+                "PRIMARY KEY (week, user_id)",
+                "FOREIGN KEY (user_id) REFERENCES users (id)"
+            ],
+            "indexes": [
+                {"name": "idx_weekly_points_week_points", "columns": ["week", "points"]}
+            ]
+        },
+        # Persistent tier of the generated-content cache, keyed by sha256(model + prompt)
+        "content_cache": {
+            "columns": [
+                "cache_key TEXT PRIMARY KEY",
+                "model TEXT NOT NULL",
+                "value TEXT NOT NULL",
+                "created_at REAL NOT NULL",
+                "last_access REAL NOT NULL"
+            ],
+            "indexes": [
+                {"name": "idx_content_cache_last_access", "columns": ["last_access"]}
+            ]
+        },
+        # Token-bucket levels for API rate limits shared between worker processes
+        "rate_limits": {
+            "columns": [
+                "bucket_key TEXT PRIMARY KEY",
+                "tokens REAL NOT NULL",
+                "updated REAL NOT NULL"
             ]
         }
+    },
+
+    # Session retention job (DatabaseManager.run_retention)
+    "retention": {
+        "days": 365,            # Delete learning sessions older than this
+        "batch_size": 2000,     # Rows per delete transaction (by rowid range)
+        "pause_ms": 50,         # Gap between batches so learners' writes get the lock
+        "vacuum_pages": 1000    # Free pages returned by incremental_vacuum per run
+    },
+
+    # Read-only lesson/question bank (see utils/content_pack.py)
+    "content_pack": {
+        "path": "content_pack.db",
+        "mmap_size": 268435456,     # Map up to 256 MB; pages are shared between workers
+        "quiz_length": 5,           # Questions per app quiz when sampling from the pack
+        # Subject names shown in the app -> subject keys stored in the pack.
+        # Pack rows may use either; names not listed here are stored as given.
+        "subjects": {
+            "Reading & Language": "reading",
+            "Reading Skills": "reading",
+            "Mathematics": "math",
+            "Basic Math": "math",
+            "Social Skills": "social",
+            "Social Situations": "social",
+            "Science Basics": "science",
+            "Creative Arts": "arts",
+            "Life Skills": "life_skills",
+            "Physical Education": "physical_education"
+        }
+    },
+
+    # Leaderboard settings
+    "leaderboard": {
+        "refresh_seconds": 60   # Reload the in-memory board to pick up other workers' writes
+    },
+
+    # Write-behind batching for session/progress events (see utils/write_queue.py)
+    "write_behind": {
+        "batch_size": 200,          # Commit once this many events are waiting
+        "flush_interval_ms": 250,   # ...or this long after the first one arrived
+        "durability": "async",      # "async" returns at once; "sync" waits for the commit
+        "busy_retries": 5,          # Retries for a batch that hit a locked database
+        "busy_backoff_ms": 50       # First retry delay, doubled on each further retry
+    },
+
+    # Connection pool settings (see utils/connection_pool.py)
+    "pool": {
+        "size": 8,                      # Max open connections per database file
+        "checkout_timeout": 10.0,       # Seconds to wait for a free connection
+        "health_check_interval": 30.0,  # Ping idle connections older than this
+        "busy_timeout_ms": 5000,
+        "pragmas": {
+            # auto_vacuum must precede journal_mode, which creates the file
+            "auto_vacuum": "INCREMENTAL",  # Only takes effect on new database files
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -16000,       # Negative means KiB (~16 MB)
+            "mmap_size": 134217728,     # 128 MB
+            "temp_store": "MEMORY"
+        }
     }
 }
 
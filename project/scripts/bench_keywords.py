@@ -0,0 +1,89 @@
+"""
+Benchmark the compiled KeywordMatcher against the old substring loops
+
+    python scripts/bench_keywords.py
+
+The old classifiers ran ``keyword in text.lower()`` for every keyword of
+every group. Both are timed on a chat transcript (~90 KB) and on a single
+message with the emotion keywords, then on the transcript with a synthetic
+500-keyword vocabulary to show how each scales with the number of keywords.
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import Callable, Dict, Iterable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.keywords import EMOTION_KEYWORDS, EMOTION_MATCHER, KeywordMatcher  # noqa: E402
+
+MESSAGES = [
+    "I was stuck on the adding worksheet but my teacher helped and now I am happy",
+    "this is so hard I feel frustrated and a bit worried about the test tomorrow",
+    "can we read the dinosaur story again? it was awesome",
+    "ok",
+    "what comes after seven"
+]
+
+
+def substring_scores(groups: Dict[str, Iterable[str]]) -> Callable[[str], Dict[str, int]]:
+    """Per-group keyword counts the way the classifiers used to compute them"""
+    def scores(text: str) -> Dict[str, int]:
+        lowered = text.lower()
+        return {name: hits for name, words in groups.items()
+                if (hits := sum(1 for word in words if word in lowered))}
+    return scores
+
+
+def best_of(call: Callable[[str], object], text: str, number: int, repeat: int) -> float:
+    """Best mean seconds per call over ``repeat`` rounds of ``number`` calls"""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            call(text)
+        rounds.append((time.perf_counter() - started) / number)
+    return min(rounds)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    transcript = '\n'.join(rng.choice(MESSAGES) for _ in range(2000))
+    vocabulary = {
+        f"group {n}": [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                       for _ in range(25)]
+        for n in range(20)
+    }
+    large_matcher = KeywordMatcher(vocabulary)
+
+    cases = [
+        (f"{len(transcript) // 1024} KB transcript, {sum(map(len, EMOTION_KEYWORDS.values()))} keywords",
+         substring_scores(EMOTION_KEYWORDS), EMOTION_MATCHER.scores, transcript, 30, 1e3, "ms"),
+        (f"one {len(MESSAGES[1])}-char message",
+         substring_scores(EMOTION_KEYWORDS), EMOTION_MATCHER.scores, MESSAGES[1], 20000, 1e6, "us"),
+        (f"{len(transcript) // 1024} KB transcript, {sum(map(len, vocabulary.values()))}-keyword vocab",
+         substring_scores(vocabulary), large_matcher.scores, transcript, 10, 1e3, "ms")
+    ]
+    for label, old, new, text, number, scale, unit in cases:
+        old_time = best_of(old, text, number, args.repeat) * scale
+        new_time = best_of(new, text, number, args.repeat) * scale
+        print(f"{label:40s} substring {old_time:8.2f} {unit} -> matcher {new_time:8.2f} {unit}")
+
+    # The substring loops also fired inside other words ("sad" in "sadder")
+    sample = "I feel sadder after the download, my address is wrong and this is madness"
+    print(f"substring hits on {sample!r}: {substring_scores(EMOTION_KEYWORDS)(sample)}")
+    print(f"matcher hits:   {EMOTION_MATCHER.scores(sample)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""
+Benchmark micro-batched emotion classification against one request per text
+
+    python scripts/bench_micro_batch.py --threads 1 8 32
+
+A local HTTP stub stands in for the classification model. It handles
+``--slots`` requests at a time and takes ``--latency`` ms per request plus
+``--per-item`` ms per input, like a model server that runs one batch per
+worker. For each client thread count, every thread classifies ``--texts``
+texts in turn, POSTing each text on its own ("direct") or through a
+MicroBatcher that sends a list per request ("batched", using the
+emotion_batching settings unless overridden). Reports per-call latency,
+texts per second and the number of HTTP requests made.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import API_CONFIG  # noqa: E402
+from utils.http_client import post_json  # noqa: E402
+from utils.micro_batch import MicroBatcher  # noqa: E402
+
+RESULT = [{'label': 'joy', 'score': 0.9}, {'label': 'neutral', 'score': 0.1}]
+
+
+def start_stub(latency_ms: float, per_item_ms: float, slots: int):
+    """Serve the stub model on a free local port; returns (server, url, request counter)"""
+    slot = threading.Semaphore(slots)
+    counter = {'requests': 0}
+    counter_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # Headers and body go out separately
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            inputs = payload if isinstance(payload, list) else [payload]
+            with counter_lock:
+                counter['requests'] += 1
+            with slot:
+                time.sleep((latency_ms + per_item_ms * len(inputs)) / 1000)
+
+            body = json.dumps([RESULT for _ in inputs]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/classify", counter
+
+
+def run(classify: Callable[[str], object], threads: int, texts: int) -> Dict:
+    """Per-call latencies and wall time with ``threads`` threads classifying ``texts`` texts each"""
+    latencies: List[float] = []
+    latencies_lock = threading.Lock()
+
+    def worker(index: int):
+        own = []
+        for n in range(texts):
+            started = time.perf_counter()
+            classify(f"thread {index} message {n}: I finished my reading and feel happy")
+            own.append((time.perf_counter() - started) * 1000)
+        with latencies_lock:
+            latencies.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0],
+        'rate': len(latencies) / elapsed
+    }
+
+
+def main(argv=None) -> int:
+    batching = API_CONFIG['emotion_batching']
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--texts', type=int, default=20, help="Texts classified by each thread")
+    parser.add_argument('--latency', type=float, default=40.0, help="Stub ms per request")
+    parser.add_argument('--per-item', type=float, default=1.0, help="Stub ms per input text")
+    parser.add_argument('--slots', type=int, default=4, help="Requests the stub serves at once")
+    parser.add_argument('--max-batch', type=int, default=batching['max_batch'])
+    parser.add_argument('--max-wait-ms', type=float, default=batching['max_wait_ms'])
+    args = parser.parse_args(argv)
+
+    server, url, counter = start_stub(args.latency, args.per_item, args.slots)
+    try:
+        batcher = MicroBatcher(lambda texts: post_json(url, texts).json(),
+                               max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        variants = (
+            ("direct", lambda text: post_json(url, text).json()),
+            ("batched", lambda text: batcher.submit(text, timeout=60)),
+        )
+
+        print(f"stub: {args.latency:.0f} ms/request + {args.per_item:.0f} ms/text, {args.slots} slots; "
+              f"batches of up to {args.max_batch}, {args.max_wait_ms:.0f} ms wait")
+        for threads in args.threads:
+            print(f"{threads} thread(s) x {args.texts} texts")
+            for label, classify in variants:
+                classify("warm up")
+                counter['requests'] = 0
+                result = run(classify, threads, args.texts)
+                print(f"  {label:8s} p50 {result['p50']:8.1f} ms   p95 {result['p95']:8.1f} ms   "
+                      f"{result['rate']:8.0f} texts/s   {counter['requests']:5d} requests")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
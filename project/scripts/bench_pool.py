@@ -0,0 +1,158 @@
+"""
+Benchmark pooled connections and the single-query user stats against the old per-call code
+
+    python scripts/bench_pool.py --sessions 10000 100000
+
+For each session count a throwaway database is seeded with one learner's
+history. "stats" times get_user_stats against the old fan-out, which loaded
+progress, sessions and achievements into Python and walked the session
+dates for the streak, and against the one-statement aggregation over the
+raw tables (now used by rebuild_user_stats). "pool" measures lookups per second from several
+threads, opening a new sqlite3 connection per call vs checking one out of
+the pool.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DatabaseManager  # noqa: E402
+
+
+def seed(db: DatabaseManager, sessions: int) -> int:
+    """One learner with ``sessions`` sessions over the last 30 days, 40 skills and 10 achievements"""
+    db.create_user("bench", "secret", "Bench", 10, "Dyslexia", [])
+    user_id = db.authenticate_user("bench", "secret")['id']
+    now = datetime.now()
+
+    with db.pool.connection() as conn:
+        conn.executemany('''
+            INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(user_id, f"subject {n % 5}", "quiz", n % 101, 5 + n % 20,
+               (now - timedelta(minutes=n * 43200 // sessions)).strftime('%Y-%m-%d %H:%M:%S'))
+              for n in range(sessions)])
+        conn.executemany('INSERT INTO progress (user_id, subject, skill, level, points) VALUES (?, ?, ?, ?, ?)',
+                         [(user_id, f"subject {n % 5}", f"skill {n}", 1 + n % 10, n * 25) for n in range(40)])
+        conn.executemany('INSERT INTO achievements (user_id, achievement_id) VALUES (?, ?)',
+                         [(user_id, f"achievement {n}") for n in range(10)])
+    db.rebuild_user_stats()
+    return user_id
+
+
+def fan_out_stats(db: DatabaseManager, user_id: int) -> Dict:
+    """get_user_stats as it was before the aggregated query: four reads summed in Python"""
+    progress_data = db.get_user_progress(user_id)
+    sessions_data = db.get_learning_sessions(user_id)
+    achievements_data = db.get_user_achievements(user_id)
+
+    with db.pool.connection() as conn:
+        dates = [row[0] for row in conn.execute('''
+            SELECT DISTINCT DATE(completed_at) AS session_date FROM learning_sessions
+            WHERE user_id = ? ORDER BY session_date DESC
+        ''', (user_id,))]
+    streak = 0
+    current_date = datetime.now().date()
+    for date_str in dates:
+        session_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        if session_date == current_date or session_date == current_date - timedelta(days=streak):
+            streak += 1
+            current_date = session_date
+        else:
+            break
+
+    return {
+        'total_points': sum(p['points'] for p in progress_data),
+        'average_level': round(sum(p['level'] for p in progress_data) / len(progress_data), 1),
+        'subjects_learning': len({p['subject'] for p in progress_data}),
+        'total_sessions': len(sessions_data),
+        'average_score': round(sum(s['score'] for s in sessions_data) / len(sessions_data), 1),
+        'total_time_minutes': sum(s['duration'] for s in sessions_data),
+        'learning_streak': streak,
+        'achievements_count': len(achievements_data)
+    }
+
+
+def time_ms(call: Callable, runs: int) -> str:
+    call()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return f"median {statistics.median(timings):8.2f} ms   best {min(timings):8.2f} ms"
+
+
+def throughput(lookup: Callable[[], None], threads: int, seconds: float) -> float:
+    """Lookups per second with ``threads`` threads calling ``lookup`` in a loop"""
+    counts: List[int] = [0] * threads
+    stop = threading.Event()
+
+    def worker(index: int):
+        while not stop.is_set():
+            lookup()
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--runs', type=int, default=10, help="Timed calls per stats variant")
+    parser.add_argument('--threads', type=int, default=8, help="Threads for the pool throughput test")
+    parser.add_argument('--seconds', type=float, default=2.0, help="Duration of each throughput run")
+    args = parser.parse_args(argv)
+
+    for sessions in args.sessions:
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "bench.db")
+            db = DatabaseManager(db_path)
+            user_id = seed(db, sessions)
+            print(f"{sessions} sessions")
+
+            print(f"  stats  fan-out       {time_ms(lambda: fan_out_stats(db, user_id), args.runs)}")
+            print(f"  stats  aggregated    {time_ms(lambda: db.rebuild_user_stats(user_id), args.runs)}")
+            print(f"  stats  summary row   {time_ms(lambda: db.get_user_stats(user_id), args.runs)}")
+
+            query = 'SELECT total_points, session_count FROM user_stats WHERE user_id = ?'
+
+            def connect_per_call():
+                conn = sqlite3.connect(db_path, timeout=5)
+                try:
+                    conn.execute(query, (user_id,)).fetchone()
+                finally:
+                    conn.close()
+
+            def pooled():
+                with db.pool.connection() as conn:
+                    conn.execute(query, (user_id,)).fetchone()
+
+            for label, lookup in (("connect per call", connect_per_call), ("pooled", pooled)):
+                rate = throughput(lookup, args.threads, args.seconds)
+                print(f"  pool   {label:16s} {rate:10.0f} lookups/s ({args.threads} threads)")
+
+            db.write_queue.close()
+            db.pool.close_all()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark the template registries against rebuilding the template literals per call
+
+    python scripts/bench_templates.py
+
+Before the registries, APIHelper.get_template_content and
+generate_quiz_questions (and the FreeAPIs copies in app.py) evaluated their
+whole nested dict literal, with f-strings, on every call. The "rebuild"
+functions below reproduce that from the same template constants; the
+registry side calls the current code paths. Reports the best mean time per
+call and the peak memory allocated by one call.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.api_helpers import APIHelper  # noqa: E402
+from utils.templates import (APP_LESSONS, APP_QUIZZES, APP_TEMPLATES, HELPER_LESSONS,  # noqa: E402
+                             HELPER_QUIZZES, SPECIAL_NEEDS_ADAPTATIONS)
+
+
+def rebuild_lessons(lessons: Dict, topic: str) -> Dict:
+    return {
+        subject: {
+            difficulty: {
+                'title': lesson['title'].replace('{topic}', topic),
+                'content': lesson['content'].replace('{topic}', topic),
+                'activities': list(lesson['activities']),
+                'tips': lesson['tips']
+            }
+            for difficulty, lesson in levels.items()
+        }
+        for subject, levels in lessons.items()
+    }
+
+
+def rebuild_quizzes(quizzes: Dict) -> Dict:
+    return {
+        subject: {difficulty: [dict(question, options=list(question['options'])) for question in questions]
+                  for difficulty, questions in levels.items()}
+        for subject, levels in quizzes.items()
+    }
+
+
+def rebuild_template_content(topic: str, difficulty: str, special_needs: str = None) -> Dict:
+    library = rebuild_lessons(HELPER_LESSONS, topic)
+    topic_lower = topic.lower()
+    if any(word in topic_lower for word in ['read', 'story', 'book', 'letter']):
+        subject = 'reading'
+    elif any(word in topic_lower for word in ['math', 'number', 'count', 'add']):
+        subject = 'math'
+    elif any(word in topic_lower for word in ['social', 'friend', 'emotion', 'feeling']):
+        subject = 'social'
+    else:
+        subject = 'reading'
+    content = library.get(subject, {}).get(difficulty.lower(), library['reading']['beginner'])
+
+    adaptation = SPECIAL_NEEDS_ADAPTATIONS.get(special_needs)
+    if adaptation:
+        content['content'] += adaptation['content_suffix']
+        content['tips'] += adaptation['additional_tip']
+    return content
+
+
+def rebuild_quiz_questions(topic: str, difficulty: str, count: int = 3) -> List[Dict]:
+    questions = rebuild_quizzes(HELPER_QUIZZES)
+    subject = 'math' if 'math' in topic.lower() else 'reading'
+    return questions.get(subject, {}).get(difficulty.lower(), questions['reading']['beginner'])[:count]
+
+
+def per_call_us(call: Callable[[], object], number: int, repeat: int) -> float:
+    call()
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        rounds.append((time.perf_counter() - started) / number)
+    return min(rounds) * 1e6
+
+
+def peak_bytes(call: Callable[[], object]) -> int:
+    call()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    call()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help="Calls per timing round")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # Keep an installed content pack from answering the quiz calls
+    os.chdir(tempfile.mkdtemp())
+
+    cases = [
+        ("APIHelper.get_template_content",
+         lambda: rebuild_template_content('Mathematics', 'beginner', 'ADHD'),
+         lambda: APIHelper.get_template_content('Mathematics', 'beginner', 'ADHD')),
+        ("APIHelper.generate_quiz_questions",
+         lambda: rebuild_quiz_questions('Mathematics', 'beginner'),
+         lambda: APIHelper.generate_quiz_questions('Mathematics', 'beginner')),
+        ("FreeAPIs.get_educational_content",
+         lambda: rebuild_lessons(APP_LESSONS, 'Mathematics')['math']['beginner'],
+         lambda: APP_TEMPLATES.lesson('math', 'beginner', 'Mathematics')),
+        ("FreeAPIs.generate_quiz_questions",
+         lambda: rebuild_quizzes(APP_QUIZZES)['math']['beginner'],
+         lambda: APP_TEMPLATES.quiz('math', 'beginner'))
+    ]
+    for label, rebuild, registry in cases:
+        print(f"{label:36s} {per_call_us(rebuild, args.number, args.repeat):6.2f} -> "
+              f"{per_call_us(registry, args.number, args.repeat):5.2f} us   "
+              f"{peak_bytes(rebuild):6d} -> {peak_bytes(registry):5d} B")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory so relative database and cache paths stay out of the tree"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class StubServer:
+    """Local HTTP/1.1 server that answers POSTs from a script of canned responses.
+
+    Each response is ``(status, headers, body)``; once the script runs out the
+    last response is repeated. Requests are recorded with the client port, so
+    tests can tell whether connections were reused.
+    """
+
+    def __init__(self):
+        stub = self
+        self.responses = [(200, {}, {})]
+        self.requests = []
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                with stub._lock:
+                    stub.requests.append({'path': self.path, 'port': self.client_address[1],
+                                          'body': body, 'time': time.monotonic()})
+                    index = min(len(stub.requests), len(stub.responses)) - 1
+                    status, headers, payload = stub.responses[index]
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header('Content-Type', headers.get('Content-Type', 'application/json'))
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    if name != 'Content-Type':
+                        self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from conftest import PROJECT_DIR
+from utils.database import DatabaseManager
+
+APP_PATH = os.path.join(PROJECT_DIR, "app.py")
+
+
+@pytest.fixture(autouse=True)
+def fresh_resources():
+    """get_database is a cache_resource, so each test's app gets its own database"""
+    st.cache_resource.clear()
+    yield
+    st.cache_resource.clear()
+
+
+def _settings_page(user):
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.session_state.user = user
+    at.run()
+    at.sidebar.selectbox[0].set_value("⚙️ Settings").run()
+    return at
+
+
+def test_export_progress_offers_csv_download(workdir):
+    db = DatabaseManager("ai_tutor.db")
+    assert db.create_user("ada", "secret", "Ada", 10, "Dyslexia", [])
+    user = db.authenticate_user("ada", "secret")
+    db.update_progress(user['id'], "math", "counting", 30)
+
+    at = _settings_page(user)
+    next(b for b in at.button if b.label == "📊 Export Progress Data").click().run()
+
+    assert not at.exception
+    assert len(at.get("download_button")) == 1
+    assert "No progress data" not in [info.value for info in at.info]
+
+
+def test_export_without_progress_shows_notice(workdir):
+    db = DatabaseManager("ai_tutor.db")
+    assert db.create_user("ben", "secret", "Ben", 9, "ADHD", [])
+    user = db.authenticate_user("ben", "secret")
+
+    at = _settings_page(user)
+    next(b for b in at.button if b.label == "📊 Export Progress Data").click().run()
+
+    assert not at.exception
+    assert not at.get("download_button")
+    assert "No progress data to export yet!" in [info.value for info in at.info]
@@ -0,0 +1,53 @@
+from utils.charts import ChartCache, progress_fingerprint, subject_summary
+
+PROGRESS = [
+    {'subject': 'math', 'skill': 'counting', 'level': 2, 'points': 120},
+    {'subject': 'math', 'skill': 'adding', 'level': 1, 'points': 40},
+    {'subject': 'reading', 'skill': 'letters', 'level': 3, 'points': 210}
+]
+
+
+def test_summary_averages_levels_and_sums_points_per_subject():
+    assert subject_summary(PROGRESS) == {'math': (1.5, 160), 'reading': (3.0, 210)}
+
+
+def test_fingerprint_ignores_row_order_and_tracks_changes():
+    assert progress_fingerprint(PROGRESS) == progress_fingerprint(list(reversed(PROGRESS)))
+    changed = [dict(PROGRESS[0], points=130)] + PROGRESS[1:]
+    assert progress_fingerprint(changed) != progress_fingerprint(PROGRESS)
+
+
+def test_chart_is_rendered_once_per_fingerprint():
+    cache = ChartCache(max_entries=10)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return b"png"
+
+    for _ in range(3):
+        assert cache.get_or_render(1, "fp-1", "level.png", render) == b"png"
+    assert len(renders) == 1 and cache.stats['hits'] == 2
+
+
+def test_new_progress_supersedes_the_users_old_charts_only():
+    cache = ChartCache(max_entries=10)
+    cache.get_or_render(1, "fp-1", "level.png", lambda: b"old")
+    cache.get_or_render(1, "fp-1", "points.png", lambda: b"old")
+    cache.get_or_render(2, "fp-9", "level.png", lambda: b"other user")
+
+    assert cache.get_or_render(1, "fp-2", "level.png", lambda: b"new") == b"new"
+
+    assert cache.stats['superseded'] == 2
+    assert cache.get_or_render(2, "fp-9", "level.png", lambda: b"re-rendered") == b"other user"
+    assert cache.get_or_render(1, "fp-1", "level.png", lambda: b"re-rendered") == b"re-rendered"
+
+
+def test_least_recently_used_charts_are_evicted():
+    cache = ChartCache(max_entries=2)
+    for user_id in (1, 2):
+        cache.get_or_render(user_id, "fp", "level.png", lambda: b"png")
+    cache.get_or_render(1, "fp", "level.png", lambda: b"unused")
+    cache.get_or_render(3, "fp", "level.png", lambda: b"png")
+
+    assert cache.get_or_render(2, "fp", "level.png", lambda: b"re-rendered") == b"re-rendered"
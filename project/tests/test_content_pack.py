@@ -0,0 +1,90 @@
+import random
+import sqlite3
+
+from utils import api_helpers
+from utils.api_helpers import APIHelper
+from utils.content_pack import ContentPack, build_content_pack
+
+
+def question(subject, text, needs=None, difficulty='beginner'):
+    row = {'subject': subject, 'difficulty': difficulty, 'question': text,
+           'options': ['a', 'b'], 'correct': 0, 'explanation': ''}
+    if needs:
+        row['needs'] = needs
+    return row
+
+
+def lesson(subject, title, needs=None):
+    row = {'subject': subject, 'difficulty': 'Beginner', 'title': title,
+           'content': 'All about {topic}.', 'activities': ['Practice {topic}'],
+           'tips': 'Go slowly with {topic}.'}
+    if needs:
+        row['needs'] = needs
+    return row
+
+
+QUESTIONS = [
+    question('math', 'm1'),
+    question('Reading & Language', 'r1'),
+    question('math', 'm-dyslexia', needs='Dyslexia'),
+    question('Mathematics', 'm2'),
+    question('reading', 'r2', needs='No specific needs'),
+    question('math', 'm-adhd', needs='ADHD'),
+    question('Basic Math', 'm3'),
+]
+
+
+def build(tmp_path, lessons=(), questions=QUESTIONS):
+    path = str(tmp_path / "pack.db")
+    build_content_pack(path, list(lessons), list(questions))
+    return path, ContentPack(path)
+
+
+def texts(pack, subject, needs=None):
+    return {row['question'] for row in pack.sample_questions(subject, 'beginner', 100, needs=needs)}
+
+
+def test_each_bucket_covers_contiguous_rowids_of_its_rows(tmp_path):
+    path, _ = build(tmp_path)
+    conn = sqlite3.connect(path)
+    for subject, difficulty, needs, first_id, row_count in conn.execute(
+            "SELECT subject, difficulty, needs, first_id, row_count FROM buckets WHERE kind = 'questions'"):
+        ids = [row_id for (row_id,) in conn.execute(
+            'SELECT id FROM questions WHERE subject = ? AND difficulty = ? AND needs = ? ORDER BY id',
+            (subject, difficulty, needs))]
+        assert ids == list(range(first_id, first_id + row_count))
+    conn.close()
+
+
+def test_app_subject_names_share_the_pack_key(tmp_path):
+    _, pack = build(tmp_path)
+    assert texts(pack, 'math') == {'m1', 'm2', 'm3'}
+    assert texts(pack, 'Mathematics') == texts(pack, 'Basic Math') == {'m1', 'm2', 'm3'}
+    assert texts(pack, 'Reading Skills') == {'r1', 'r2'}
+    assert pack.count('questions', 'Mathematics', 'Beginner') == 3
+
+
+def test_needs_rows_are_mixed_in_only_for_that_learner(tmp_path):
+    _, pack = build(tmp_path)
+    assert texts(pack, 'math', needs='Dyslexia') == {'m1', 'm2', 'm3', 'm-dyslexia'}
+    assert texts(pack, 'math', needs='ADHD') == {'m1', 'm2', 'm3', 'm-adhd'}
+    assert texts(pack, 'math', needs='No specific needs') == {'m1', 'm2', 'm3'}
+    assert pack.count('questions', 'math', 'beginner', 'Dyslexia') == 4
+
+
+def test_lesson_fills_topic_everywhere(tmp_path):
+    _, pack = build(tmp_path, lessons=[lesson('Social Skills', '{topic} basics')], questions=[])
+    result = pack.sample_lesson('social', 'beginner', 'sharing', rng=random.Random(1))
+    assert result == {'title': 'sharing basics', 'content': 'All about sharing.',
+                      'activities': ['Practice {topic}'], 'tips': 'Go slowly with sharing.'}
+
+
+def test_helper_quiz_samples_for_the_learners_needs(tmp_path, monkeypatch):
+    _, pack = build(tmp_path, questions=[question('math', 'general'),
+                                         question('math', 'dyslexia', needs='Dyslexia')])
+    monkeypatch.setattr(api_helpers, 'get_content_pack', lambda: pack)
+
+    quiz = APIHelper.generate_quiz_questions('Mathematics', 'Beginner', count=5, special_needs='Dyslexia')
+    assert {row['question'] for row in quiz} == {'general', 'dyslexia'}
+    quiz = APIHelper.generate_quiz_questions('Mathematics', 'Beginner', count=5)
+    assert [row['question'] for row in quiz] == ['general']
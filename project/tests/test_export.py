@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from utils.database import DatabaseManager
+
+
+def _learners(workdir, sessions=5):
+    db = DatabaseManager("ai_tutor.db")
+    user_ids = []
+    for name in ("ada", "bo", "cy"):
+        assert db.create_user(name, "secret", name.title(), 10, "Dyslexia", [])
+        user_ids.append(db.authenticate_user(name, "secret")['id'])
+
+    with db.pool.connection() as conn:
+        conn.executemany('''
+            INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(user_id, 'math', 'quiz', n, 10, f'2026-0{1 + n % 9}-01 10:00:00')
+              for n in range(sessions) for user_id in user_ids])
+    return db, user_ids
+
+
+def test_batches_are_read_in_separate_checkouts(workdir):
+    db, (ada, bo, _) = _learners(workdir)
+    rows = db.iter_export_rows('sessions', [ada, bo], batch_size=3)
+
+    exported = [next(rows)]
+    # Between batches the generator holds no pooled connection, so writes get through
+    assert getattr(db.pool._local, 'conn', None) is None
+    with db.pool.connection() as conn:
+        conn.execute('UPDATE learning_sessions SET score = 99 WHERE user_id = ?', (bo,))
+    exported += list(rows)
+
+    assert len(exported) == 10
+    assert {row[0] for row in exported} == {ada, bo}
+    assert [row[3] for row in exported if row[0] == ada] == [0, 1, 2, 3, 4]
+    assert [row[3] for row in exported if row[0] == bo][2:] == [99, 99, 99]
+
+
+def test_pages_cover_every_row_once_with_a_since_filter(workdir):
+    db, user_ids = _learners(workdir, sessions=9)
+    since = datetime(2026, 4, 1)
+    expected = sorted(row[1:] for row in _all_sessions(db) if row[-1] >= '2026-04-01')
+
+    for batch_size in (1, 4, 6, 100):
+        exported = list(db.iter_export_rows('sessions', user_ids, since, batch_size=batch_size))
+        assert sorted(exported) == expected
+        assert len(exported) == 18
+
+
+def _all_sessions(db):
+    with db.pool.connection() as conn:
+        return conn.execute('''
+            SELECT id, user_id, subject, activity_type, score, duration, completed_at
+            FROM learning_sessions ORDER BY id
+        ''').fetchall()
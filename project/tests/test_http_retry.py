@@ -0,0 +1,146 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from config import API_CONFIG
+from utils import api_helpers, http_client
+from utils.api_helpers import APIHelper
+from utils.rate_limit import ProviderLimiter
+from utils.retry import CircuitBreaker, RetryPolicy, get_breaker, parse_retry_after
+
+
+@pytest.fixture
+def huggingface_stub(stub_server, monkeypatch):
+    """Point the Hugging Face client at the stub, with fast retries and no quota"""
+    monkeypatch.setitem(API_CONFIG['huggingface'], 'api_url', stub_server.url)
+    monkeypatch.setitem(API_CONFIG['retry'], 'base_delay', 0.01)
+    monkeypatch.setitem(API_CONFIG['retry'], 'max_delay', 0.02)
+    monkeypatch.setitem(API_CONFIG['retry'], 'deadline', 2.0)
+    limiter = ProviderLimiter('huggingface', limits={}, shared=False)
+    monkeypatch.setattr(api_helpers, 'get_limiter', lambda name: limiter)
+    http_client.close_session()
+    yield stub_server
+    http_client.close_session()
+
+
+def test_shared_session_reuses_one_connection(stub_server):
+    http_client.close_session()
+    for _ in range(3):
+        assert http_client.post_json(stub_server.url, {'n': 1}).status_code == 200
+
+    assert http_client.get_session() is http_client.get_session()
+    assert len({request['port'] for request in stub_server.requests}) == 1
+    http_client.close_session()
+
+
+@pytest.mark.parametrize("status", [429, 502, 503, 504])
+def test_retryable_status_is_retried_until_success(huggingface_stub, status):
+    huggingface_stub.responses = [(status, {}, {}), (status, {}, {}), (200, {}, [{'ok': True}])]
+
+    result = APIHelper.call_huggingface_api(f"retry-{status}", "hi", max_retries=3)
+
+    assert result == [{'ok': True}]
+    assert len(huggingface_stub.requests) == 3
+
+
+def test_client_error_is_not_retried(huggingface_stub):
+    huggingface_stub.responses = [(400, {}, {'error': 'bad input'})]
+
+    assert APIHelper.call_huggingface_api("bad-request", "hi", max_retries=3) is None
+    assert len(huggingface_stub.requests) == 1
+
+
+def test_retry_after_header_sets_the_wait(huggingface_stub):
+    huggingface_stub.responses = [(429, {'Retry-After': '0.3'}, {}), (200, {}, [{'ok': True}])]
+
+    assert APIHelper.call_huggingface_api("retry-after", "hi", max_retries=2) == [{'ok': True}]
+    first, second = huggingface_stub.requests
+    assert second['time'] - first['time'] >= 0.3
+
+
+def test_estimated_time_from_a_loading_model_sets_the_wait(huggingface_stub):
+    huggingface_stub.responses = [(503, {}, {'error': 'loading', 'estimated_time': 0.2}),
+                                  (200, {}, [{'ok': True}])]
+
+    assert APIHelper.call_huggingface_api("loading", "hi", max_retries=2) == [{'ok': True}]
+    first, second = huggingface_stub.requests
+    assert second['time'] - first['time'] >= 0.2
+
+
+def test_retry_after_past_the_deadline_gives_up_at_once(huggingface_stub):
+    huggingface_stub.responses = [(503, {'Retry-After': '60'}, {})]
+
+    started = time.monotonic()
+    assert APIHelper.call_huggingface_api("too-long", "hi", max_retries=3) is None
+    assert time.monotonic() - started < 1.0
+    assert len(huggingface_stub.requests) == 1
+
+
+def test_open_breaker_skips_the_network(huggingface_stub):
+    huggingface_stub.responses = [(500, {}, {})]
+    breaker = get_breaker("flaky")
+    for _ in range(breaker.failure_threshold):
+        APIHelper.call_huggingface_api("flaky", "hi", max_retries=1)
+    requests_made = len(huggingface_stub.requests)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert APIHelper.call_huggingface_api("flaky", "hi", max_retries=1) is None
+    assert len(huggingface_stub.requests) == requests_made
+
+
+def test_parse_retry_after_accepts_seconds_dates_and_estimated_time():
+    assert parse_retry_after({'Retry-After': '2'}) == 2.0
+    assert 8 <= parse_retry_after({'Retry-After': formatdate(time.time() + 10, usegmt=True)}) <= 10
+    assert parse_retry_after({}, {'estimated_time': 1.5}) == 1.5
+    assert parse_retry_after({'Retry-After': 'soon'}) is None
+
+
+def test_backoff_stays_within_the_ceiling_and_the_attempt_budget():
+    state = RetryPolicy(max_attempts=4, base_delay=0.1, max_delay=0.25, multiplier=2, deadline=10).begin()
+    delays = [state.next_delay() for _ in range(4)]
+
+    assert all(0 <= delay <= ceiling for delay, ceiling in zip(delays[:3], [0.1, 0.2, 0.25]))
+    assert delays[3] is None
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_the_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_lets_one_trial_call_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_trial_success_closes_and_trial_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow() and breaker.allow()
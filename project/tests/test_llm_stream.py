@@ -0,0 +1,99 @@
+import time
+
+import pytest
+import requests
+
+from config import API_CONFIG
+from utils import llm_stream
+from utils.rate_limit import ProviderLimiter
+from utils.retry import CircuitBreaker
+
+MESSAGES = [{'role': 'user', 'content': 'What comes after seven?'}]
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Two fake streaming providers with their own breakers and no quota limits"""
+    breakers = {name: CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+                for name in ("openai", "gemini")}
+    calls = []
+    behaviour = {"openai": ["Eight", "!"], "gemini": ["Eight."]}
+
+    def fake_stream(name):
+        def stream(messages):
+            calls.append(name)
+            reply = behaviour[name]
+            if isinstance(reply, Exception):
+                raise reply
+            yield from reply
+        return stream
+
+    for name in breakers:
+        monkeypatch.setitem(API_CONFIG[name], 'api_key', 'test-key')
+    monkeypatch.setattr(llm_stream, 'STREAMING_PROVIDERS',
+                        {name: fake_stream(name) for name in breakers})
+    monkeypatch.setattr(llm_stream, 'get_breaker', lambda key: breakers[key.split(':')[0]])
+    monkeypatch.setattr(llm_stream, 'get_limiter',
+                        lambda name: ProviderLimiter(name, limits={}, shared=False))
+    return breakers, calls, behaviour
+
+
+def _half_open(breaker):
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_reply_streams_from_the_first_provider(providers):
+    breakers, calls, _ = providers
+
+    assert list(llm_stream.stream_chat(MESSAGES)) == ["Eight", "!"]
+    assert calls == ["openai"]
+
+
+def test_provider_failing_before_its_first_chunk_hands_over(providers):
+    breakers, calls, behaviour = providers
+    behaviour["openai"] = requests.exceptions.ConnectionError("refused")
+
+    assert list(llm_stream.stream_chat(MESSAGES)) == ["Eight."]
+    assert calls == ["openai", "gemini"]
+    assert breakers["openai"].state == CircuitBreaker.OPEN
+
+
+def test_open_breaker_is_skipped(providers):
+    breakers, calls, _ = providers
+    breakers["openai"].record_failure()
+
+    assert list(llm_stream.stream_chat(MESSAGES)) == ["Eight."]
+    assert calls == ["gemini"]
+
+
+def test_no_usable_provider_returns_none(providers):
+    breakers, calls, _ = providers
+    for breaker in breakers.values():
+        breaker.record_failure()
+
+    assert llm_stream.stream_chat(MESSAGES) is None
+    assert calls == []
+
+
+def test_half_open_trial_is_only_claimed_by_the_provider_that_is_called(providers):
+    breakers, calls, _ = providers
+    for breaker in breakers.values():
+        _half_open(breaker)
+
+    assert list(llm_stream.stream_chat(MESSAGES)) == ["Eight", "!"]
+
+    assert calls == ["openai"]
+    assert breakers["openai"].state == CircuitBreaker.CLOSED
+    # The backup was never called, so its trial slot is still free
+    assert breakers["gemini"].allow()
+
+
+def test_unstarted_stream_claims_no_trial(providers):
+    breakers, calls, _ = providers
+    _half_open(breakers["openai"])
+
+    stream = llm_stream.stream_chat(MESSAGES)
+    assert stream is not None and calls == []
+    assert breakers["openai"].allow()
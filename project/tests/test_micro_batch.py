@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.micro_batch import MicroBatcher
+
+
+def _submit_all(batcher, items, timeout=5):
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        futures = [pool.submit(batcher.submit, item, timeout) for item in items]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_linger():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or items, max_batch=4,
+                           max_wait_ms=5000)
+
+    started = time.monotonic()
+    assert sorted(_submit_all(batcher, [1, 2, 3, 4])) == [1, 2, 3, 4]
+
+    assert time.monotonic() - started < 2
+    assert [sorted(batch) for batch in batches] == [[1, 2, 3, 4]]
+    assert batcher.stats['largest_batch'] == 4
+
+
+def test_partial_batch_is_flushed_after_the_linger():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or items, max_batch=100,
+                           max_wait_ms=50)
+
+    started = time.monotonic()
+    assert batcher.submit("only", timeout=5) == "only"
+
+    assert 0.04 <= time.monotonic() - started < 2
+    assert batches == [["only"]]
+
+
+def test_each_caller_gets_its_own_result():
+    batcher = MicroBatcher(lambda items: [f"{item}!" for item in items], max_batch=8,
+                           max_wait_ms=5000)
+
+    items = [f"item-{n}" for n in range(8)]
+    assert _submit_all(batcher, items) == [f"{item}!" for item in items]
+    assert batcher.stats['batches'] == 1
+
+
+def test_failed_batch_raises_in_every_waiter():
+    def process_batch(items):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(process_batch, max_batch=3, max_wait_ms=5000)
+    errors = _submit_all(batcher, ["a", "b", "c"])
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
+    assert batcher.stats['failed'] == 3
+
+
+def test_wrong_number_of_results_fails_the_whole_batch():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch=2, max_wait_ms=5000)
+
+    errors = _submit_all(batcher, ["a", "b"])
+
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_batcher_keeps_serving_after_a_failed_batch():
+    calls = []
+
+    def process_batch(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise RuntimeError("first batch fails")
+        return items
+
+    batcher = MicroBatcher(process_batch, max_batch=1, max_wait_ms=0)
+    with pytest.raises(RuntimeError):
+        batcher.submit("first", timeout=5)
+    assert batcher.submit("second", timeout=5) == "second"
+
+
+def test_submit_times_out_while_the_batch_is_still_running():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda items: release.wait(5) and items, max_batch=1, max_wait_ms=0)
+
+    with pytest.raises(TimeoutError):
+        batcher.submit("slow", timeout=0.05)
+    release.set()
@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+from utils.database import MIGRATIONS, PROGRESS_UPSERT_QUERY, DatabaseManager
+
+# Tables as created before the migration runner existed
+LEGACY_SCHEMA = '''
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL, name TEXT NOT NULL, age INTEGER,
+        learning_needs TEXT, preferences TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE learning_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, subject TEXT, activity_type TEXT,
+        score INTEGER, duration INTEGER, completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, subject TEXT, skill TEXT,
+        level INTEGER DEFAULT 1, points INTEGER DEFAULT 0,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE achievements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, achievement_id TEXT,
+        earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+
+@pytest.fixture
+def db(workdir):
+    return DatabaseManager("ai_tutor.db")
+
+
+def _plan(db, sql, params=()):
+    with db.pool.connection() as conn:
+        return ' | '.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+
+
+def test_fresh_database_is_migrated_to_the_latest_version(db):
+    with db.pool.connection() as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == 5 == MIGRATIONS[-1][0]
+    assert db.run_migrations() == []
+
+
+def test_progress_upsert_uses_the_unique_skill_index(db):
+    plan = _plan(db, 'SELECT level FROM progress WHERE user_id = ? AND subject = ? AND skill = ?',
+                 (1, 'math', 'counting'))
+    assert 'USING INDEX idx_progress_user_subject_skill' in plan
+
+    # The upsert's ON CONFLICT target needs the same unique index to exist
+    with db.pool.connection() as conn:
+        conn.execute(PROGRESS_UPSERT_QUERY, {
+            'user_id': 1, 'subject': 'math', 'skill': 'counting', 'points': 10,
+            'points_per_level': 100, 'max_level': 10
+        }).fetchall()
+
+
+def test_recent_sessions_lookup_uses_the_user_completed_index(db):
+    plan = _plan(db, '''
+        SELECT subject, activity_type, score, duration, completed_at
+        FROM learning_sessions
+        WHERE user_id = ? AND completed_at >= ?
+        ORDER BY completed_at DESC
+    ''', (1, '2024-01-01'))
+    assert 'USING INDEX idx_sessions_user_completed' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_achievement_lookup_uses_the_unique_achievement_index(db):
+    plan = _plan(db, 'SELECT 1 FROM achievements WHERE user_id = ? AND achievement_id = ?',
+                 (1, 'first_lesson'))
+    assert 'USING COVERING INDEX idx_achievements_user_achievement' in plan
+
+
+def test_subject_leaderboard_uses_the_subject_index(db):
+    plan = _plan(db, 'SELECT user_id, SUM(points) FROM progress WHERE subject = ? GROUP BY user_id',
+                 ('math',))
+    assert 'idx_progress_subject_user' in plan
+
+
+def test_legacy_database_duplicates_are_merged_before_unique_indexes(workdir):
+    conn = sqlite3.connect("ai_tutor.db")
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO users (username, password_hash, name) VALUES ('ada', 'x', 'Ada')")
+    conn.executemany('INSERT INTO progress (user_id, subject, skill, level, points) VALUES (?, ?, ?, ?, ?)',
+                     [(1, 'math', 'counting', 2, 120), (1, 'math', 'counting', 1, 30)])
+    conn.executemany('INSERT INTO achievements (user_id, achievement_id) VALUES (?, ?)',
+                     [(1, 'first_lesson'), (1, 'first_lesson')])
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager("ai_tutor.db")
+
+    with db.pool.connection() as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == 5
+        assert conn.execute('SELECT level, points FROM progress').fetchall() == [(2, 150)]
+        assert conn.execute('SELECT COUNT(*) FROM achievements').fetchone()[0] == 1
+    assert db.get_user_stats(1)['total_points'] == 150
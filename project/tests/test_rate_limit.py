@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import ProviderLimiter
+
+
+class FakeClock:
+    """Stands in for the ``time`` module, so buckets refill only when a test says so"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', fake)
+    return fake
+
+
+def test_buckets_refill_at_capacity_per_period(clock):
+    limiter = ProviderLimiter('p', limits={'requests_per_minute': 60}, max_wait=0, shared=False)
+    for _ in range(60):
+        assert limiter.reserve() == 0.0
+    assert limiter.reserve() is None
+
+    clock.now += 0.5
+    assert limiter.remaining() == {'rpm': 0.5}
+    clock.now += 9.5
+    assert limiter.remaining() == {'rpm': 10.0}
+    clock.now += 3600
+    assert limiter.remaining() == {'rpm': 60.0}
+
+
+def test_short_waits_queue_and_long_waits_shed(clock):
+    limiter = ProviderLimiter('p', limits={'requests_per_minute': 6}, max_wait=15, shared=False)
+    for _ in range(6):
+        limiter.reserve()
+
+    assert limiter.reserve() == pytest.approx(10.0)
+    assert limiter.has_quota() is False
+    assert limiter.reserve() is None
+    assert limiter.stats == {'acquired': 7, 'queued': 1, 'shed': 1, 'throttled': 0}
+
+    assert limiter.acquire(max_wait=30) is True
+    assert clock.now == pytest.approx(1_000_020.0)
+
+
+def test_settle_returns_overestimated_tokens_and_charges_extra(clock):
+    limiter = ProviderLimiter('p', limits={'tokens_per_minute': 1000}, shared=False)
+    limiter.reserve(tokens=600)
+    limiter.settle(estimated_tokens=600, actual_tokens=100)
+    assert limiter.remaining() == {'tpm': 900.0}
+
+    limiter.settle(estimated_tokens=100, actual_tokens=700)
+    assert limiter.remaining() == {'tpm': 300.0}
+
+    limiter.settle(estimated_tokens=5000, actual_tokens=0)
+    assert limiter.remaining() == {'tpm': 1000.0}
+
+
+def test_throttle_holds_callers_off_for_retry_after(clock):
+    limiter = ProviderLimiter('p', limits={'requests_per_minute': 60}, max_wait=60, shared=False)
+    limiter.throttle(retry_after=30)
+
+    assert limiter.reserve() == pytest.approx(30.0)
+    assert limiter.stats['throttled'] == 1
+    clock.now += 31
+    assert limiter.remaining()['rpm'] == pytest.approx(1.0)
+
+
+def test_shared_limiters_draw_on_one_budget(clock, tmp_path):
+    db_name = str(tmp_path / "limits.db")
+    first = ProviderLimiter('p', limits={'requests_per_minute': 3}, max_wait=0, shared=True, db_name=db_name)
+    second = ProviderLimiter('p', limits={'requests_per_minute': 3}, max_wait=0, shared=True, db_name=db_name)
+    other = ProviderLimiter('q', limits={'requests_per_minute': 3}, max_wait=0, shared=True, db_name=db_name)
+
+    assert first.reserve() == 0.0
+    assert second.reserve() == 0.0
+    assert first.remaining() == second.remaining() == {'rpm': 1.0}
+    assert second.reserve() == 0.0
+    assert first.reserve() is None
+    assert other.has_quota() is True
+
+
+def test_shared_quota_reads_do_not_need_the_write_lock(clock, tmp_path):
+    db_name = str(tmp_path / "limits.db")
+    limiter = ProviderLimiter('p', limits={'requests_per_minute': 3}, shared=True, db_name=db_name)
+    limiter.reserve()
+
+    writer = sqlite3.connect(db_name, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        assert limiter.remaining() == {'rpm': 2.0}
+        assert limiter.has_quota() is True
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
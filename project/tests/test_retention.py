@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from utils.database import DatabaseManager
+
+
+def _learner_with_sessions(workdir):
+    db = DatabaseManager("ai_tutor.db")
+    assert db.create_user("ada", "secret", "Ada", 10, "Dyslexia", [])
+    user = db.authenticate_user("ada", "secret")
+
+    old = (datetime.utcnow() - timedelta(days=400)).strftime('%Y-%m-%d %H:%M:%S')
+    recent = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    with db.pool.connection() as conn:
+        conn.executemany('''
+            INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(user['id'], 'math', 'quiz', 60, 10, old),
+              (user['id'], 'math', 'quiz', 80, 20, old),
+              (user['id'], 'reading', 'lesson', 100, 30, recent)])
+    db.rebuild_user_stats()
+    return db, user
+
+
+def _totals(db, user):
+    stats = db.get_user_stats(user['id'])
+    return stats['total_sessions'], stats['total_time_minutes'], stats['average_score']
+
+
+def test_rebuild_keeps_totals_of_sessions_archived_to_the_table(workdir):
+    db, user = _learner_with_sessions(workdir)
+    before = _totals(db, user)
+    assert before == (3, 60, 80.0)
+
+    report = db.run_retention(days=365, archive='table', pause_ms=0)
+    assert report['deleted'] == 2 and report['archived'] == 2
+    assert _totals(db, user) == before
+
+    db.rebuild_user_stats()
+    assert _totals(db, user) == before
+
+
+def test_rebuild_drops_sessions_deleted_without_a_table_archive(workdir):
+    db, user = _learner_with_sessions(workdir)
+
+    db.run_retention(days=365, pause_ms=0)
+    db.rebuild_user_stats()
+    assert _totals(db, user) == (1, 30, 100.0)
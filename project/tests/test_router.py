@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from utils.retry import CircuitBreaker
+from utils.router import ModelRouter, Provider
+
+
+class FakeModel:
+    """A provider call with adjustable latency that can be made to fail"""
+
+    def __init__(self, name, latency=0.0, fail=False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return f"{self.name}: {prompt}"
+
+    def provider(self):
+        return Provider(self.name, "fake", self, breaker=self.breaker)
+
+
+def _router(*models, **kwargs):
+    kwargs.setdefault('hedge', False)
+    kwargs.setdefault('min_samples', 1)
+    kwargs.setdefault('hedge_min_delay', 0.05)
+    return ModelRouter([model.provider() for model in models], **kwargs)
+
+
+def test_fastest_provider_is_preferred_once_measured():
+    fast, slow = FakeModel("fast", 0.01), FakeModel("slow", 0.05)
+    router = _router(slow, fast)
+    for _ in range(2):   # Measure each provider once
+        router.complete("warm up")
+
+    assert [p.name for p in router.ranked()] == ["fast", "slow"]
+    assert router.complete("hi") == ("fast:fake", "fast: hi")
+
+
+def test_failing_primary_fails_over_to_the_next_provider():
+    primary, backup = FakeModel("primary"), FakeModel("backup")
+    router = _router(primary, backup)
+    primary.fail = True
+
+    assert router.complete("hi") == ("backup:fake", "backup: hi")
+    assert primary.calls == 1 and backup.calls == 1
+    assert router.stats['failovers'] == 1
+
+
+def test_slow_primary_is_hedged_and_the_backup_wins():
+    primary, backup = FakeModel("primary", 0.01), FakeModel("backup", 0.03)
+    router = _router(primary, backup, hedge=True)
+    for _ in range(2):
+        router.complete("warm up")
+    assert router.ranked()[0].name == "primary"
+
+    primary.latency = 1.0
+    started = time.perf_counter()
+    result = router.complete("hi")
+    elapsed = time.perf_counter() - started
+
+    assert result == ("backup:fake", "backup: hi")
+    assert elapsed < 0.5
+    assert router.stats['hedged'] == 1 and router.stats['hedge_wins'] == 1
+
+
+def test_no_hedge_without_enough_samples():
+    primary, backup = FakeModel("primary", 0.1), FakeModel("backup")
+    router = _router(primary, backup, hedge=True, min_samples=5)
+
+    assert router.complete("hi") == ("primary:fake", "primary: hi")
+    assert backup.calls == 0 and router.stats['hedged'] == 0
+
+
+def test_all_providers_unhealthy_returns_none_without_calling_them():
+    first, second = FakeModel("first", fail=True), FakeModel("second", fail=True)
+    router = _router(first, second)
+
+    assert router.complete("hi") is None
+    assert router.complete("hi") is None
+    # Both breakers are now open, so nothing is called at all
+    assert first.breaker.state == second.breaker.state == CircuitBreaker.OPEN
+    calls = first.calls + second.calls
+    assert not router.available()
+    assert router.complete("hi") is None
+    assert first.calls + second.calls == calls
+    assert router.stats['failed'] == 3
+
+
+def test_disabled_provider_is_skipped():
+    configured, missing_key = FakeModel("configured"), FakeModel("missing")
+    router = ModelRouter([
+        Provider("missing", "fake", missing_key, enabled=lambda: False, breaker=missing_key.breaker),
+        configured.provider()
+    ], hedge=False)
+
+    assert router.complete("hi") == ("configured:fake", "configured: hi")
+    assert missing_key.calls == 0
+
+
+@pytest.mark.parametrize("error", [RuntimeError("boom"), TimeoutError()])
+def test_provider_exceptions_count_as_failures(error):
+    def raising(prompt):
+        raise error
+
+    backup = FakeModel("backup")
+    router = ModelRouter([Provider("raising", "fake", raising, breaker=CircuitBreaker()),
+                          backup.provider()], hedge=False)
+
+    assert router.complete("hi") == ("backup:fake", "backup: hi")
+    assert router.trackers["raising:fake"].error_rate == 1.0
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+
+import pytest
+
+from utils import tts as tts_module
+from utils.tts import AudioCache, TextToSpeech, make_audio_key, split_sentences
+
+
+class FakeSynthesizer:
+    """Returns fake MP3 bytes for a text, counting calls, optionally slow or failing"""
+
+    def __init__(self, delay=0.0, fail_on=()):
+        self.delay = delay
+        self.fail_on = set(fail_on)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, text, voice, rate, pitch):
+        with self._lock:
+            self.calls.append(text)
+        time.sleep(self.delay)
+        if text in self.fail_on:
+            return None
+        return f"MP3[{text}]".encode("utf-8")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AudioCache(str(tmp_path / "tts_cache"), max_bytes=10_000)
+
+
+def _files(cache):
+    return sorted(os.listdir(cache.directory))
+
+
+def test_first_render_is_a_miss_and_repeats_are_hits(cache):
+    synthesize = FakeSynthesizer()
+    tts = TextToSpeech(synthesize, cache, workers=2)
+
+    assert tts.render("Hello there.") == b"MP3[Hello there.]"
+    assert tts.render("  Hello   there. ") == b"MP3[Hello there.]"
+
+    assert synthesize.calls == ["Hello there."]
+    assert cache.stats['misses'] == 1 and cache.stats['hits'] == 1
+    assert tts.stats['synthesized'] == 1
+
+
+def test_voice_settings_are_part_of_the_key(cache):
+    synthesize = FakeSynthesizer()
+    tts = TextToSpeech(synthesize, cache, workers=2)
+
+    tts.render("Hello.", voice="female")
+    tts.render("Hello.", voice="male")
+    tts.render("Hello.", voice="female", rate=0.9)
+
+    assert len(synthesize.calls) == 3
+    assert make_audio_key("Hello.", "female", 0.5, 0.5) != make_audio_key("Hello.", "male", 0.5, 0.5)
+
+
+def test_cache_survives_a_new_process(cache):
+    TextToSpeech(FakeSynthesizer(), cache).render("Kept on disk.")
+
+    synthesize = FakeSynthesizer()
+    reopened = AudioCache(cache.directory, max_bytes=cache.max_bytes)
+    assert TextToSpeech(synthesize, reopened).render("Kept on disk.") == b"MP3[Kept on disk.]"
+    assert synthesize.calls == []
+    assert reopened.total_bytes == cache.total_bytes
+
+
+def test_failed_synthesis_is_not_cached(cache):
+    synthesize = FakeSynthesizer(fail_on={"Broken."})
+    tts = TextToSpeech(synthesize, cache)
+
+    assert tts.render("Broken.") is None
+    assert tts.render("Broken.") is None
+    assert len(synthesize.calls) == 2
+    assert _files(cache) == []
+    assert tts.stats['failed'] == 2
+
+
+def test_concurrent_requests_share_one_synthesis(cache):
+    synthesize = FakeSynthesizer(delay=0.1)
+    tts = TextToSpeech(synthesize, cache)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tts.render("Same text."))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b"MP3[Same text.]"] * 8
+    assert synthesize.calls == ["Same text."]
+
+
+def test_writes_are_atomic_and_leave_no_temporary_files(cache, monkeypatch):
+    key = make_audio_key("Atomic.", "female", 0.5, 0.5)
+    cache.put(key, b"first version")
+    assert _files(cache) == [f"{key}.mp3"]
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(tts_module.os, 'replace', failing_replace)
+    with pytest.raises(OSError):
+        cache.put(key, b"second version that never lands")
+
+    # The old recording is untouched and the half-written file is gone
+    assert cache.get(key) == b"first version"
+    assert _files(cache) == [f"{key}.mp3"]
+
+
+def test_readers_never_see_a_partial_file(cache):
+    key = make_audio_key("Big.", "female", 0.5, 0.5)
+    audio = [bytes([n]) * 4000 for n in range(1, 6)]
+    seen = set()
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            data = cache.get(key)
+            if data is not None:
+                seen.add(data)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for version in audio * 10:
+        cache.put(key, version)
+    stop.set()
+    reader.join()
+
+    assert seen and seen <= set(audio)
+
+
+def test_least_recently_played_recordings_are_evicted_first(tmp_path):
+    cache = AudioCache(str(tmp_path / "tts_cache"), max_bytes=300)
+    keys = [make_audio_key(f"Sentence {n}.", "female", 0.5, 0.5) for n in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put(key, b"x" * 100)
+        then = time.time() - age
+        os.utime(cache._path(key), (then, then))
+
+    # Playing the oldest recording makes it the most recent
+    assert cache.get(keys[0]) is not None
+    cache.put(make_audio_key("Sentence 3.", "female", 0.5, 0.5), b"x" * 100)
+
+    assert keys[1] not in cache
+    assert keys[0] in cache and keys[2] in cache
+    assert cache.total_bytes <= 300
+    assert cache.stats['evictions'] == 1
+
+
+def test_render_chunks_yields_sentences_in_order(cache):
+    synthesize = FakeSynthesizer(delay=0.02)
+    tts = TextToSpeech(synthesize, cache, workers=4)
+    text = "One. Two! Three? Four."
+
+    chunks = list(tts.render_chunks(text))
+
+    assert [sentence for sentence, _ in chunks] == split_sentences(text)
+    assert [audio for _, audio in chunks] == [f"MP3[{s}]".encode() for s in split_sentences(text)]
+    assert tts.render_text(text) == b"".join(audio for _, audio in chunks)
+    assert len(synthesize.calls) == 4
+
+
+def test_render_text_is_none_if_any_sentence_fails(cache):
+    tts = TextToSpeech(FakeSynthesizer(fail_on={"Two."}), cache)
+
+    assert tts.render_text("One. Two. Three.") is None
+    assert tts.render("One.") is not None
@@ -0,0 +1,57 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from utils.database import DatabaseManager, _iso_week_from_monday_week, _iso_week_sql
+
+
+def _year_boundary_days():
+    for year in range(2019, 2028):
+        start = date(year, 12, 20)
+        yield from (start + timedelta(days=n) for n in range(20))
+
+
+def test_sql_week_key_matches_python_iso_week():
+    conn = sqlite3.connect(':memory:')
+    for day in _year_boundary_days():
+        sql_week = conn.execute(f'SELECT {_iso_week_sql("?1")}', (day.isoformat(),)).fetchone()[0]
+        assert sql_week == day.strftime('%G-%V'), day
+
+
+@pytest.mark.parametrize("old, iso", [
+    ("2020-52", "2020-53"),   # Mon 28 Dec 2020
+    ("2021-00", "2020-53"),   # Fri 1 - Sun 3 Jan 2021, the same ISO week
+    ("2021-01", "2021-01"),
+    ("2024-00", "2024-01"),   # 1 Jan 2024 is a Monday: %W has no week 00 days
+    ("2025-52", "2026-01"),   # Mon 29 Dec 2025 starts ISO week 1 of 2026
+])
+def test_monday_week_keys_map_to_iso_weeks(old, iso):
+    assert _iso_week_from_monday_week(old) == iso
+
+
+def test_awards_are_credited_to_the_current_iso_week(workdir):
+    db = DatabaseManager("ai_tutor.db")
+    assert db.create_user("ada", "secret", "Ada", 10, "Dyslexia", [])
+    user = db.authenticate_user("ada", "secret")
+    db.update_progress(user['id'], "math", "counting", 30)
+    db.update_progress(user['id'], "math", "counting", 20)
+
+    with db.pool.connection() as conn:
+        rows = conn.execute('SELECT week, points FROM weekly_points').fetchall()
+    assert rows == [(datetime.utcnow().strftime('%G-%V'), 50)]
+    assert db._week_key() == rows[0][0]
+
+
+def test_migration_merges_weeks_split_at_new_year(workdir):
+    db = DatabaseManager("ai_tutor.db")
+    with db.pool.connection() as conn:
+        conn.execute('PRAGMA user_version = 4')
+        conn.executemany('INSERT INTO weekly_points (week, user_id, points) VALUES (?, ?, ?)',
+                         [('2020-52', 1, 30), ('2021-00', 1, 20), ('2021-00', 2, 5), ('2021-01', 1, 7)])
+
+    assert db.run_migrations() == [5]
+
+    with db.pool.connection() as conn:
+        rows = conn.execute('SELECT week, user_id, points FROM weekly_points ORDER BY week, user_id').fetchall()
+    assert rows == [('2020-53', 1, 50), ('2020-53', 2, 5), ('2021-01', 1, 7)]
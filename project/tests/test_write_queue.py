@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+from utils.database import DatabaseManager
+from utils.write_queue import WriteBehindQueue
+
+
+def _queue(write_batch, **kwargs):
+    kwargs.setdefault('flush_interval_ms', 1000)
+    kwargs.setdefault('busy_backoff_ms', 1)
+    return WriteBehindQueue(write_batch, **kwargs)
+
+
+def test_events_are_written_in_one_batch():
+    batches = []
+    write_queue = _queue(batches.append, batch_size=3)
+    for n in range(3):
+        write_queue.submit('session', (n,))
+    assert write_queue.flush(5)
+
+    assert batches == [[('session', (0,)), ('session', (1,)), ('session', (2,))]]
+    assert write_queue.stats['written'] == 3
+
+
+def test_busy_database_is_retried_with_backoff():
+    attempts = []
+
+    def write_batch(events):
+        attempts.append(list(events))
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+
+    write_queue = _queue(write_batch, busy_retries=5)
+    write_queue.submit('session', (1,))
+    write_queue.submit('session', (2,))
+    assert write_queue.flush(5)
+
+    assert len(attempts) == 3
+    assert write_queue.stats['busy_retries'] == 2
+    assert write_queue.stats['written'] == 2
+    assert write_queue.stats['failed'] == 0
+
+
+def test_busy_database_fails_the_batch_after_the_last_retry():
+    def write_batch(events):
+        raise sqlite3.OperationalError("database is locked")
+
+    write_queue = _queue(write_batch, busy_retries=2)
+    write_queue.submit('session', (1,))
+    write_queue.submit('session', (2,))
+    assert write_queue.flush(5)
+
+    assert write_queue.stats['busy_retries'] == 2
+    assert write_queue.stats['failed'] == 2
+    assert isinstance(write_queue.last_error, sqlite3.OperationalError)
+
+
+def test_bad_event_is_dropped_without_losing_the_rest(caplog):
+    written = []
+
+    def write_batch(events):
+        if any(params == ('bad',) for _, params in events):
+            raise ValueError("malformed event")
+        written.extend(events)
+
+    write_queue = _queue(write_batch)
+    write_queue.submit('session', (1,))
+    write_queue.submit('session', ('bad',))
+    write_queue.submit('progress', (2,))
+    assert write_queue.flush(5)
+
+    assert written == [('session', (1,)), ('progress', (2,))]
+    assert write_queue.stats['written'] == 2
+    assert write_queue.stats['failed'] == 1
+    assert write_queue.stats['replayed_batches'] == 1
+    assert "Dropped session write ('bad',)" in caplog.text
+
+
+def test_sync_mode_reports_each_waiter_its_own_outcome():
+    def write_batch(events):
+        if any(params == ('bad',) for _, params in events):
+            raise ValueError("malformed event")
+
+    write_queue = _queue(write_batch, durability="sync", flush_interval_ms=0)
+    write_queue.submit('session', (1,))
+    with pytest.raises(ValueError):
+        write_queue.submit('session', ('bad',))
+
+
+def test_database_keeps_other_learners_events_when_one_is_malformed(workdir):
+    db = DatabaseManager("ai_tutor.db")
+    for username in ("ada", "ben"):
+        assert db.create_user(username, "secret", username.title(), 10, "Dyslexia", [])
+    ada = db.authenticate_user("ada", "secret")
+    ben = db.authenticate_user("ben", "secret")
+
+    write_queue = _queue(db.write_events)
+    write_queue.submit('session', (ada['id'], 'math', 'quiz', 80, 60, '2024-01-01 10:00:00'))
+    write_queue.submit('session', (ben['id'], 'math'))   # wrong number of columns
+    write_queue.submit('progress', (ben['id'], 'math', 'counting', 20))
+    assert write_queue.flush(5)
+
+    assert write_queue.stats['written'] == 2
+    assert write_queue.stats['failed'] == 1
+    with db.pool.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM learning_sessions').fetchone()[0] == 1
+    assert [row['points'] for row in db.get_user_progress(ben['id'])] == [20]
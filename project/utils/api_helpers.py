@@ -2,72 +2,243 @@
 API Helper functions for integrating with free APIs
 """
 
-import requests
+import asyncio
 import json
 import time
-from typing import Dict, List, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 import streamlit as st
 from config import API_CONFIG
+from utils.content_cache import get_content_cache
+from utils.content_pack import get_content_pack, pack_subject
+from utils.http_client import HTTP_ERRORS, get_async_client, post_json
+from utils.keywords import EMOTION_KEYWORDS, EMOTION_MATCHER, TOPIC_MATCHER
+from utils.micro_batch import MicroBatcher
+from utils.retry import RetryPolicy, get_breaker, parse_retry_after
+from utils.rate_limit import estimate_tokens, get_limiter
+from utils.router import ModelRouter, Provider
+from utils.single_flight import SingleFlight
+from utils.templates import HELPER_TEMPLATES, SPECIAL_NEEDS_ADAPTATIONS
+from utils.tts import get_tts, normalize_text, responsivevoice_url, split_sentences
+
+# Coalesces identical in-flight Hugging Face calls; see huggingface_flight.stats
+huggingface_flight = SingleFlight()
+
+# Content cache namespace for lessons, whichever provider wrote them
+LESSON_CACHE_MODEL = "lesson-router"
 
 class APIHelper:
     """Helper class for API integrations"""
     
     @staticmethod
-    def call_huggingface_api(model_name: str, inputs: str, max_retries: int = 3) -> Optional[Dict]:
+    def _huggingface_request(model_name: str, inputs) -> Tuple[str, Dict, Dict]:
+        """URL, headers and payload for a Hugging Face Inference API call"""
+        api_url = f"{API_CONFIG['huggingface']['api_url']}{model_name}"
+        headers = {"Authorization": f"Bearer {API_CONFIG['huggingface']['token']}"}
+        return api_url, headers, {"inputs": inputs}
+
+    @staticmethod
+    def _classify_response(response) -> Tuple[str, object]:
+        """Sort a response into ("ok", json), ("retry", wait hint) or ("fail", None)"""
+        if response.status_code == 200:
+            return "ok", response.json()
+        
+        if response.status_code in API_CONFIG['retry']['retry_statuses']:
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            # 503 means the model is still loading; HF says how long in estimated_time
+            return "retry", parse_retry_after(response.headers, body)
+        
+        return "fail", None
+    
+    @staticmethod
+    def call_huggingface_api(model_name: str, inputs: str, max_retries: Optional[int] = None) -> Optional[Dict]:
         """
         Call Hugging Face Inference API
         
+        Identical concurrent calls (same model and inputs) share one upstream
+        request. Retries back off exponentially within an overall deadline,
+        and a per-model circuit breaker skips the call entirely while the
+        model keeps failing, so callers fall back to templates without waiting.
+        
         Args:
             model_name: Name of the model to use
             inputs: Input text for the model
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts (defaults to API_CONFIG['retry'])
             
         Returns:
-            API response or None if failed
+            API response or None if failed. The result may be shared with
+            other callers and must not be mutated.
         """
-        api_url = f"{API_CONFIG['huggingface']['api_url']}{model_name}"
-        headers = {"Authorization": f"Bearer {API_CONFIG['huggingface']['token']}"}
+        key = (model_name, json.dumps(inputs, sort_keys=True))
+        return huggingface_flight.do(
+            key, lambda: APIHelper._call_huggingface_api(model_name, inputs, max_retries)
+        )
+    
+    @staticmethod
+    def _call_huggingface_api(model_name: str, inputs: str, max_retries: Optional[int] = None) -> Optional[Dict]:
+        """One Hugging Face request with retries and the circuit breaker"""
+        breaker = get_breaker(model_name)
+        if not breaker.allow():
+            return None
+        
+        api_url, headers, payload = APIHelper._huggingface_request(model_name, inputs)
+        retry = RetryPolicy(max_attempts=max_retries).begin()
+        limiter = get_limiter('huggingface')
+        
+        while True:
+            # Out of shared quota: give up now so the caller uses its fallback
+            if not limiter.acquire(max_wait=min(limiter.max_wait, retry.remaining())):
+                return None
+            
+            retry_after = None
+            try:
+                response = post_json(api_url, payload, headers=headers,
+                                     timeout=max(retry.remaining(), 0.1))
+                outcome, value = APIHelper._classify_response(response)
+                if response.status_code == 429:
+                    limiter.throttle(value)
+                
+                if outcome == "ok":
+                    breaker.record_success()
+                    return value
+                if outcome == "fail":
+                    breaker.record_failure()
+                    st.error(f"API Error: {response.status_code}")
+                    return None
+                retry_after = value
+                    
+            except HTTP_ERRORS as e:
+                error = e
+            else:
+                error = None
+            
+            delay = retry.next_delay(retry_after)
+            if delay is None:
+                breaker.record_failure()
+                if error is not None:
+                    st.error(f"Network error: {error}")
+                return None
+            time.sleep(delay)
+    
+    @staticmethod
+    async def call_huggingface_api_async(model_name: str, inputs: str,
+                                         max_retries: Optional[int] = None) -> Optional[Dict]:
+        """Asyncio variant of call_huggingface_api for use from event loops"""
+        breaker = get_breaker(model_name)
+        if not breaker.allow():
+            return None
         
-        payload = {"inputs": inputs}
+        api_url, headers, payload = APIHelper._huggingface_request(model_name, inputs)
+        retry = RetryPolicy(max_attempts=max_retries).begin()
+        client = get_async_client()
+        limiter = get_limiter('huggingface')
         
-        for attempt in range(max_retries):
+        while True:
+            wait = limiter.reserve(max_wait=min(limiter.max_wait, retry.remaining()))
+            if wait is None:
+                return None
+            if wait > 0:
+                await asyncio.sleep(wait)
+            
+            retry_after = None
             try:
-                response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+                response = await client.post_json(api_url, payload, headers=headers,
+                                                  timeout=max(retry.remaining(), 0.1))
+                outcome, value = APIHelper._classify_response(response)
+                if response.status_code == 429:
+                    limiter.throttle(value)
                 
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 503:
-                    # Model is loading, wait and retry
-                    time.sleep(10)
-                    continue
-                else:
+                if outcome == "ok":
+                    breaker.record_success()
+                    return value
+                if outcome == "fail":
+                    breaker.record_failure()
                     st.error(f"API Error: {response.status_code}")
                     return None
+                retry_after = value
                     
-            except requests.exceptions.RequestException as e:
-                st.error(f"Network error: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(5)
-                    continue
+            except HTTP_ERRORS as e:
+                error = e
+            else:
+                error = None
+            
+            delay = retry.next_delay(retry_after)
+            if delay is None:
+                breaker.record_failure()
+                if error is not None:
+                    st.error(f"Network error: {error}")
                 return None
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def call_openai_api(prompt: str) -> Optional[str]:
+        """One OpenAI chat completion; the generated text or None if it failed"""
+        config = API_CONFIG['openai']
+        breaker = get_breaker(f"openai:{config['model']}")
+        limiter = get_limiter('openai')
+        tokens = estimate_tokens(prompt, config['max_tokens'])
+        if not breaker.allow() or not limiter.acquire(tokens):
+            return None
         
+        try:
+            response = post_json(
+                config['api_url'],
+                {'model': config['model'], 'max_tokens': config['max_tokens'],
+                 'messages': [{'role': 'user', 'content': prompt}]},
+                headers={'Authorization': f"Bearer {config['api_key']}"}
+            )
+            if response.status_code == 429:
+                limiter.throttle(parse_retry_after(response.headers))
+            if response.status_code == 200:
+                body = response.json()
+                text = body['choices'][0]['message']['content']
+                limiter.settle(tokens, body.get('usage', {}).get('total_tokens', tokens))
+                breaker.record_success()
+                return text
+        except (HTTP_ERRORS + (KeyError, IndexError, ValueError)):
+            pass
+        
+        breaker.record_failure()
         return None
     
     @staticmethod
-    def generate_educational_content(topic: str, difficulty: str, special_needs: str = None) -> Dict:
-        """
-        Generate educational content using AI APIs
+    def call_gemini_api(prompt: str) -> Optional[str]:
+        """One Gemini generateContent call; the generated text or None if it failed"""
+        config = API_CONFIG['gemini']
+        breaker = get_breaker(f"gemini:{config['model']}")
+        limiter = get_limiter('gemini')
+        tokens = estimate_tokens(prompt, API_CONFIG['openai']['max_tokens'])
+        if not breaker.allow() or not limiter.acquire(tokens):
+            return None
         
-        Args:
-            topic: Subject topic
-            difficulty: Difficulty level
-            special_needs: Specific learning needs
-            
-        Returns:
-            Generated content dictionary
-        """
-        # Construct prompt based on parameters
-        prompt = f"""
+        try:
+            response = post_json(
+                f"{config['api_url']}{config['model']}:generateContent?key={config['api_key']}",
+                {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+            )
+            if response.status_code == 429:
+                limiter.throttle(parse_retry_after(response.headers))
+            if response.status_code == 200:
+                body = response.json()
+                parts = body['candidates'][0]['content']['parts']
+                text = ''.join(part.get('text', '') for part in parts)
+                limiter.settle(tokens, body.get('usageMetadata', {}).get('totalTokenCount', tokens))
+                breaker.record_success()
+                return text
+        except (HTTP_ERRORS + (KeyError, IndexError, ValueError)):
+            pass
+        
+        breaker.record_failure()
+        return None
+    
+    @staticmethod
+    def build_lesson_prompt(topic: str, difficulty: str, special_needs: str = None) -> str:
+        """Prompt sent to the text generation model for a lesson"""
+        return f"""
         Create an educational lesson about {topic} for {difficulty} level.
         {f'Adapted for learners with {special_needs}.' if special_needs else ''}
         
@@ -79,12 +250,26 @@ class APIHelper:
         
         Make it engaging and accessible.
         """
+    
+    @staticmethod
+    def generate_educational_content(topic: str, difficulty: str, special_needs: str = None) -> Dict:
+        """
+        Generate educational content using AI APIs
         
-        # Try Hugging Face first
-        if API_CONFIG['huggingface']['token']:
-            result = APIHelper.call_huggingface_api(
-                API_CONFIG['huggingface']['models']['text_generation'],
-                prompt
+        Args:
+            topic: Subject topic
+            difficulty: Difficulty level
+            special_needs: Specific learning needs
+            
+        Returns:
+            Generated content dictionary
+        """
+        prompt = APIHelper.build_lesson_prompt(topic, difficulty, special_needs)
+        
+        # Ask the fastest healthy provider, reusing any earlier output for the same prompt
+        if lesson_router.available():
+            result = get_content_cache().get_or_compute(
+                LESSON_CACHE_MODEL, prompt, lambda: APIHelper.route_lesson_prompt(prompt)
             )
             
             if result:
@@ -93,6 +278,15 @@ class APIHelper:
         # Fallback to template-based content
         return APIHelper.get_template_content(topic, difficulty, special_needs)
     
+    @staticmethod
+    def route_lesson_prompt(prompt: str) -> Optional[List[Dict]]:
+        """Generate a lesson through lesson_router, in Hugging Face's output shape"""
+        routed = lesson_router.complete(prompt)
+        if routed is None:
+            return None
+        provider, text = routed
+        return [{'generated_text': text, 'provider': provider}]
+    
     @staticmethod
     def parse_generated_content(api_result: Dict, topic: str, difficulty: str) -> Dict:
         """Parse API result into structured content"""
@@ -122,82 +316,15 @@ class APIHelper:
             return APIHelper.get_template_content(topic, difficulty)
     
     @staticmethod
-    def get_template_content(topic: str, difficulty: str, special_needs: str = None) -> Dict:
-        """Fallback template-based content generation"""
-        
-        content_library = {
-            "reading": {
-                "beginner": {
-                    "title": f"Reading Adventures: {topic}",
-                    "content": f"Today we'll explore the wonderful world of {topic}! We'll use pictures, sounds, and fun activities to help you learn. Reading is like going on an adventure - every page takes us somewhere new!",
-                    "activities": [
-                        "Look at pictures and name what you see",
-                        "Practice letter sounds with fun games",
-                        "Read simple words together"
-                    ],
-                    "tips": "Point to each word as you read. Don't worry about mistakes - they help us learn!"
-                },
-                "intermediate": {
-                    "title": f"Story Exploration: {topic}",
-                    "content": f"Let's dive deeper into {topic} through exciting stories and activities! We'll build your reading skills while having fun with characters and adventures.",
-                    "activities": [
-                        "Read short stories and discuss characters",
-                        "Answer questions about what happened",
-                        "Create your own story ending"
-                    ],
-                    "tips": "If you don't understand a word, look at the pictures for clues!"
-                }
-            },
-            "math": {
-                "beginner": {
-                    "title": f"Math Fun: {topic}",
-                    "content": f"Math is everywhere around us! Today we'll explore {topic} using objects you can touch and see. We'll count, sort, and play with numbers in fun ways!",
-                    "activities": [
-                        "Count objects using your fingers or toys",
-                        "Sort items by size, color, or shape",
-                        "Play number games with visual aids"
-                    ],
-                    "tips": "Use real objects to help you count - blocks, toys, or even snacks work great!"
-                },
-                "intermediate": {
-                    "title": f"Math Exploration: {topic}",
-                    "content": f"Ready for some math challenges? We'll explore {topic} through puzzles, patterns, and problem-solving activities that make math exciting!",
-                    "activities": [
-                        "Solve word problems step by step",
-                        "Find patterns in numbers and shapes",
-                        "Use math in real-life situations"
-                    ],
-                    "tips": "Break big problems into smaller pieces. Take your time and think it through!"
-                }
-            },
-            "social": {
-                "beginner": {
-                    "title": f"Social Skills: {topic}",
-                    "content": f"Learning about {topic} helps us make friends and feel good around others! We'll practice through games, stories, and fun activities.",
-                    "activities": [
-                        "Practice greetings and conversations",
-                        "Learn about different emotions",
-                        "Role-play social situations"
-                    ],
-                    "tips": "Practice with family first, then try with friends. Everyone learns at their own pace!"
-                }
-            }
-        }
-        
+    @lru_cache(maxsize=1024)
+    def get_template_content(topic: str, difficulty: str, special_needs: str = None) -> Mapping:
+        """Fallback template-based content generation (read-only, shared between callers)"""
         # Determine subject category
-        topic_lower = topic.lower()
-        if any(word in topic_lower for word in ['read', 'story', 'book', 'letter']):
-            subject = 'reading'
-        elif any(word in topic_lower for word in ['math', 'number', 'count', 'add']):
-            subject = 'math'
-        elif any(word in topic_lower for word in ['social', 'friend', 'emotion', 'feeling']):
-            subject = 'social'
-        else:
-            subject = 'reading'  # default
+        subject = TOPIC_MATCHER.classify(topic, default='reading')
         
         # Get content with fallback
-        content = content_library.get(subject, {}).get(difficulty.lower(), 
-                  content_library['reading']['beginner'])
+        content = HELPER_TEMPLATES.lesson(subject, difficulty.lower(), topic,
+                                          default=('reading', 'beginner'))
         
         # Adapt for special needs if specified
         if special_needs and special_needs != "No specific needs":
@@ -206,161 +333,62 @@ class APIHelper:
         return content
     
     @staticmethod
-    def adapt_for_special_needs(content: Dict, special_needs: str) -> Dict:
-        """Adapt content for specific special needs"""
-        
-        adaptations = {
-            "Autism Spectrum Disorder": {
-                "content_suffix": " We'll use clear, simple steps and visual supports to help you succeed.",
-                "additional_tip": " Remember: it's okay to take breaks when you need them."
-            },
-            "ADHD": {
-                "content_suffix": " We'll keep activities short and fun with lots of movement and variety!",
-                "additional_tip": " Try to find a quiet space and take movement breaks when needed."
-            },
-            "Dyslexia": {
-                "content_suffix": " We'll use lots of pictures, colors, and different ways to show information.",
-                "additional_tip": " Don't worry about spelling - focus on understanding and expressing your ideas!"
-            },
-            "Intellectual Disability": {
-                "content_suffix": " We'll go step by step and repeat important ideas to help you learn.",
-                "additional_tip": " Take your time - there's no rush! Every small step is progress."
-            }
-        }
-        
-        if special_needs in adaptations:
-            adaptation = adaptations[special_needs]
-            content['content'] += adaptation['content_suffix']
-            content['tips'] += adaptation['additional_tip']
+    def adapt_for_special_needs(content: Mapping, special_needs: str) -> Mapping:
+        """Adapt content for specific special needs, returning a new copy"""
+        adaptation = SPECIAL_NEEDS_ADAPTATIONS.get(special_needs)
+        if adaptation is None:
+            return content
         
-        return content
+        return MappingProxyType({
+            **content,
+            'content': content['content'] + adaptation['content_suffix'],
+            'tips': content['tips'] + adaptation['additional_tip']
+        })
     
     @staticmethod
-    def generate_quiz_questions(topic: str, difficulty: str, count: int = 3) -> List[Dict]:
-        """Generate quiz questions for a topic"""
-        
-        question_templates = {
-            "reading": {
-                "beginner": [
-                    {
-                        "question": "What sound does the letter 'A' make?",
-                        "options": ["Ah", "Buh", "Kuh", "Duh"],
-                        "correct": 0,
-                        "explanation": "The letter A makes the 'Ah' sound, like in 'Apple'!"
-                    },
-                    {
-                        "question": "Which word starts with 'B'?",
-                        "options": ["Cat", "Ball", "Dog", "Fish"],
-                        "correct": 1,
-                        "explanation": "Ball starts with 'B' - B makes the 'Buh' sound!"
-                    },
-                    {
-                        "question": "How many words are in this sentence: 'I like cats'?",
-                        "options": ["2", "3", "4", "5"],
-                        "correct": 1,
-                        "explanation": "Count them: 'I' (1), 'like' (2), 'cats' (3) = 3 words!"
-                    }
-                ],
-                "intermediate": [
-                    {
-                        "question": "What is a synonym for 'happy'?",
-                        "options": ["Sad", "Joyful", "Angry", "Tired"],
-                        "correct": 1,
-                        "explanation": "Joyful means the same thing as happy!"
-                    },
-                    {
-                        "question": "In the sentence 'The big dog ran fast', what describes the dog?",
-                        "options": ["ran", "big", "fast", "the"],
-                        "correct": 1,
-                        "explanation": "'Big' is an adjective that describes the dog!"
-                    }
-                ]
-            },
-            "math": {
-                "beginner": [
-                    {
-                        "question": "What comes after 7?",
-                        "options": ["6", "8", "9", "5"],
-                        "correct": 1,
-                        "explanation": "When counting: 6, 7, 8... So 8 comes after 7!"
-                    },
-                    {
-                        "question": "How many fingers do you have on one hand?",
-                        "options": ["4", "5", "6", "3"],
-                        "correct": 1,
-                        "explanation": "Count your fingers: 1, 2, 3, 4, 5!"
-                    },
-                    {
-                        "question": "What is 2 + 1?",
-                        "options": ["2", "3", "4", "1"],
-                        "correct": 1,
-                        "explanation": "2 + 1 = 3. You can count: 2, then add 1 more!"
-                    }
-                ],
-                "intermediate": [
-                    {
-                        "question": "What is 15 - 7?",
-                        "options": ["7", "8", "9", "6"],
-                        "correct": 1,
-                        "explanation": "15 - 7 = 8. You can count backwards from 15!"
-                    },
-                    {
-                        "question": "Which number is even?",
-                        "options": ["7", "9", "12", "15"],
-                        "correct": 2,
-                        "explanation": "12 is even because it can be divided by 2 equally!"
-                    }
-                ]
-            }
-        }
-        
+    def generate_quiz_questions(topic: str, difficulty: str, count: int = 3,
+                                special_needs: Optional[str] = None) -> List[Mapping]:
+        """Generate quiz questions for a topic (read-only, shared between callers)"""
         # Determine subject
-        topic_lower = topic.lower()
-        if any(word in topic_lower for word in ['math', 'number', 'count']):
-            subject = 'math'
-        else:
-            subject = 'reading'
+        subject = 'math' if 'math' in TOPIC_MATCHER.find(topic) else 'reading'
+        
+        # Sample from the content pack when one is installed for this subject/level,
+        # preferring the learner's needs-specific questions alongside the general ones
+        pack = get_content_pack()
+        pack_key = pack_subject(topic, subject)
+        if pack is not None and pack.count('questions', pack_key, difficulty, special_needs):
+            return pack.sample_questions(pack_key, difficulty, count, needs=special_needs)
         
         # Get questions
-        questions = question_templates.get(subject, {}).get(difficulty.lower(), 
-                   question_templates['reading']['beginner'])
+        questions = HELPER_TEMPLATES.quiz(subject, difficulty.lower(), default=('reading', 'beginner'))
         
         # Return requested number of questions
-        return questions[:count] if len(questions) >= count else questions
+        return list(questions[:count])
     
     @staticmethod
     def get_text_to_speech_url(text: str, voice: str = "female") -> str:
         """Generate text-to-speech URL using free services"""
         
-        # Clean and encode text
-        clean_text = text.replace('\n', ' ').strip()[:500]  # Limit length
-        
         # Use ResponsiveVoice (free service)
-        tts_config = API_CONFIG['tts']['responsivevoice']
-        
-        params = {
-            't': clean_text,
-            'tl': 'en',
-            'sv': 'g1' if voice == 'female' else 'g2',
-            'vn': '',
-            'pitch': tts_config['pitch'],
-            'rate': tts_config['rate'],
-            'vol': tts_config['volume']
-        }
-        
-        # Build URL
-        param_string = '&'.join([f"{k}={requests.utils.quote(str(v))}" for k, v in params.items()])
-        return f"{tts_config['base_url']}?{param_string}"
+        return responsivevoice_url(normalize_text(text), voice)
+    
+    @staticmethod
+    def get_text_to_speech_urls(text: str, voice: str = "female") -> List[str]:
+        """One text-to-speech URL per sentence, so long texts are read in short requests"""
+        return [responsivevoice_url(sentence, voice) for sentence in split_sentences(text)]
+    
+    @staticmethod
+    def get_text_to_speech_audio(text: str, voice: str = "female") -> Optional[bytes]:
+        """MP3 bytes for the whole text, rendered on the server sentence by sentence and cached"""
+        return get_tts().render_text(text, voice)
     
     @staticmethod
     def analyze_emotion(text: str) -> Dict:
         """Analyze emotion in text using free APIs"""
         
-        if API_CONFIG['huggingface']['token']:
-            result = APIHelper.call_huggingface_api(
-                API_CONFIG['huggingface']['models']['text_classification'],
-                text
-            )
+        if API_CONFIG['huggingface']['token'] and get_limiter('huggingface').has_quota():
+            # Shares one classifier call with other learners' concurrent requests
+            result = emotion_batcher.submit(text)
             
             if result and isinstance(result, list):
                 emotions = {}
@@ -370,20 +398,44 @@ class APIHelper:
                 return emotions
         
         # Fallback: simple keyword-based emotion detection
-        emotion_keywords = {
-            'joy': ['happy', 'excited', 'great', 'awesome', 'love', 'wonderful'],
-            'sadness': ['sad', 'upset', 'disappointed', 'down', 'unhappy'],
-            'anger': ['angry', 'mad', 'frustrated', 'annoyed', 'irritated'],
-            'fear': ['scared', 'afraid', 'worried', 'nervous', 'anxious'],
-            'surprise': ['surprised', 'amazed', 'shocked', 'wow', 'incredible']
+        detected_emotions = {
+            emotion: score / len(EMOTION_KEYWORDS[emotion])
+            for emotion, score in EMOTION_MATCHER.scores(text).items()
         }
         
-        text_lower = text.lower()
-        detected_emotions = {}
-        
-        for emotion, keywords in emotion_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                detected_emotions[emotion] = score / len(keywords)
-        
-        return detected_emotions if detected_emotions else {'neutral': 1.0}
\ No newline at end of file
+        return detected_emotions if detected_emotions else {'neutral': 1.0}
+
+
+def _classify_emotion_batch(texts: List[str]) -> List[Optional[List]]:
+    """Classify several texts in one call; None for each text if the call fails"""
+    result = APIHelper.call_huggingface_api(
+        API_CONFIG['huggingface']['models']['text_classification'],
+        texts
+    )
+    if not isinstance(result, list) or len(result) != len(texts):
+        return [None] * len(texts)
+    return result
+
+
+emotion_batcher = MicroBatcher(_classify_emotion_batch, **API_CONFIG['emotion_batching'])
+
+
+def _huggingface_text(prompt: str) -> Optional[str]:
+    """Generated text from the Hugging Face text generation model"""
+    result = APIHelper.call_huggingface_api(API_CONFIG['huggingface']['models']['text_generation'], prompt)
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return result[0].get('generated_text')
+    return None
+
+
+# Lesson generation across every configured provider; see lesson_router.snapshot()
+lesson_router = ModelRouter([
+    Provider('huggingface', API_CONFIG['huggingface']['models']['text_generation'], _huggingface_text,
+             enabled=lambda: bool(API_CONFIG['huggingface']['token']),
+             breaker=get_breaker(API_CONFIG['huggingface']['models']['text_generation']),
+             limiter=get_limiter('huggingface')),
+    Provider('openai', API_CONFIG['openai']['model'], APIHelper.call_openai_api,
+             enabled=lambda: bool(API_CONFIG['openai']['api_key']), limiter=get_limiter('openai')),
+    Provider('gemini', API_CONFIG['gemini']['model'], APIHelper.call_gemini_api,
+             enabled=lambda: bool(API_CONFIG['gemini']['api_key']), limiter=get_limiter('gemini'))
+])
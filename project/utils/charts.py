@@ -0,0 +1,130 @@
+"""
+Cached progress chart rendering for the My Progress page
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+from config import APP_CONFIG
+
+
+def progress_fingerprint(progress_data: List[Dict]) -> str:
+    """sha256 over a user's progress rows, so charts are re-rendered only when they change"""
+    rows = sorted((row['subject'], row['skill'], row['level'], row['points']) for row in progress_data)
+    return hashlib.sha256(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+def subject_summary(progress_data: List[Dict]) -> Dict[str, Tuple[float, int]]:
+    """(average level, total points) per subject, in subject order"""
+    totals: Dict[str, List[int]] = {}
+    for row in progress_data:
+        level_sum, points, skills = totals.setdefault(row['subject'], [0, 0, 0])
+        totals[row['subject']] = [level_sum + row['level'], points + row['points'], skills + 1]
+    return {
+        subject: (round(level_sum / skills, 1), points)
+        for subject, (level_sum, points, skills) in sorted(totals.items())
+    }
+
+
+def bar_chart_image(labels: List[str], values: List[float], title: str, ylabel: str,
+                    color: str, image_format: Optional[str] = None) -> bytes:
+    """A bar chart as PNG or SVG bytes.
+
+    matplotlib is imported on first use, and the figure is built with the
+    object API on an Agg canvas rather than through pyplot, so it is never
+    registered with pyplot's figure manager and is freed with its last
+    reference instead of piling up for the life of the worker.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    chart_config = APP_CONFIG['charts']
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    positions = list(range(len(labels)))
+    ax.bar(positions, values, color=color)
+    ax.set_xticks(positions, labels, rotation=45)
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format=image_format or chart_config['format'], dpi=chart_config['dpi'],
+                bbox_inches='tight')
+    return buffer.getvalue()
+
+
+class ChartCache:
+    """Rendered chart images in an LRU keyed by (user, progress fingerprint, chart).
+
+    A key only matches while the user's progress is unchanged, so a stale
+    chart is never served. Rendering a chart for a new fingerprint also
+    drops that user's charts for older fingerprints, so each user holds at
+    most one set of images instead of waiting for LRU eviction.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = (max_entries if max_entries is not None
+                            else APP_CONFIG['charts']['cache_entries'])
+        self._images: "OrderedDict[Tuple[int, str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {'hits': 0, 'renders': 0, 'superseded': 0}
+
+    def get_or_render(self, user_id: int, fingerprint: str, chart: str,
+                      render: Callable[[], bytes]) -> bytes:
+        key = (user_id, fingerprint, chart)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.stats['hits'] += 1
+                return image
+
+        image = render()
+        with self._lock:
+            superseded = [old for old in self._images if old[0] == user_id and old[1] != fingerprint]
+            for old in superseded:
+                del self._images[old]
+            self._images[key] = image
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+            self.stats['renders'] += 1
+            self.stats['superseded'] += len(superseded)
+        return image
+
+
+_chart_cache: Optional[ChartCache] = None
+_chart_cache_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartCache:
+    """Get the process-wide chart cache, creating it on first use"""
+    global _chart_cache
+
+    with _chart_cache_lock:
+        if _chart_cache is None:
+            _chart_cache = ChartCache()
+        return _chart_cache
+
+
+def progress_chart_images(user_id: int, progress_data: List[Dict]) -> Tuple[bytes, bytes]:
+    """(average level, total points) bar charts for a user's progress, rendered at most once"""
+    fingerprint = progress_fingerprint(progress_data)
+    summary = subject_summary(progress_data)
+    subjects = list(summary)
+    image_format = APP_CONFIG['charts']['format']
+    cache = get_chart_cache()
+
+    level_chart = cache.get_or_render(user_id, fingerprint, f'level.{image_format}', lambda: bar_chart_image(
+        subjects, [level for level, _ in summary.values()],
+        'Average Level by Subject', 'Level', 'skyblue', image_format
+    ))
+    points_chart = cache.get_or_render(user_id, fingerprint, f'points.{image_format}', lambda: bar_chart_image(
+        subjects, [points for _, points in summary.values()],
+        'Total Points by Subject', 'Points', 'lightgreen', image_format
+    ))
+    return level_chart, points_chart
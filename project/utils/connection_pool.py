@@ -0,0 +1,185 @@
+"""
+Pooled SQLite connections for the AI Tutor application
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import DATABASE_CONFIG
+
+
+class ConnectionPool:
+    """Thread-safe pool of SQLite connections for a single database file.
+
+    A thread holds at most one connection at a time: nested ``connection()``
+    blocks on the same thread reuse it, and only the outermost block commits
+    (or rolls back on error) before handing the connection back to the pool.
+    Pragmas are applied once, when a connection is first opened.
+    """
+
+    def __init__(self, db_name: str, size: Optional[int] = None,
+                 checkout_timeout: Optional[float] = None,
+                 health_check_interval: Optional[float] = None,
+                 busy_timeout_ms: Optional[int] = None,
+                 pragmas: Optional[Dict] = None):
+        pool_config = DATABASE_CONFIG['pool']
+
+        self.db_name = db_name
+        self.size = size if size is not None else pool_config['size']
+        self.checkout_timeout = (checkout_timeout if checkout_timeout is not None
+                                 else pool_config['checkout_timeout'])
+        self.health_check_interval = (health_check_interval if health_check_interval is not None
+                                      else pool_config['health_check_interval'])
+        self.busy_timeout_ms = (busy_timeout_ms if busy_timeout_ms is not None
+                                else pool_config['busy_timeout_ms'])
+        self.pragmas = pragmas if pragmas is not None else pool_config['pragmas']
+
+        self._idle: List[Tuple[sqlite3.Connection, float]] = []
+        self._open_count = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0, 'waits': 0}
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a new connection and apply the configured pragmas"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False
+        )
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        for pragma, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        self.stats['created'] += 1
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Ping a connection to make sure it is still usable"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        """Close a connection and free its slot in the pool"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._condition:
+            self._open_count -= 1
+            self.stats['discarded'] += 1
+            self._condition.notify()
+
+    def _checkout(self) -> sqlite3.Connection:
+        """Take an idle connection or open a new one, waiting if the pool is full"""
+        deadline = time.monotonic() + self.checkout_timeout
+
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise sqlite3.ProgrammingError(f"Connection pool for {self.db_name} is closed")
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self.stats['reused'] += 1
+                elif self._open_count < self.size:
+                    self._open_count += 1
+                    conn, last_used = None, None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise sqlite3.OperationalError(
+                            f"Timed out waiting for a connection to {self.db_name}"
+                        )
+                    self.stats['waits'] += 1
+                    self._condition.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    return self._open_connection()
+                except Exception:
+                    with self._condition:
+                        self._open_count -= 1
+                        self._condition.notify()
+                    raise
+
+            if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(conn):
+                return conn
+
+            self._discard(conn)
+
+    def _checkin(self, conn: sqlite3.Connection):
+        """Return a connection to the idle list"""
+        with self._condition:
+            if self._closed:
+                conn.close()
+                self._open_count -= 1
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the duration of a ``with`` block"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                self._local.conn = None
+                self._discard(conn)
+                raise
+            raise
+        finally:
+            if self._local.conn is conn:
+                self._local.conn = None
+                self._checkin(conn)
+
+    def close_all(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+            self._condition.notify_all()
+
+        for conn, _ in idle:
+            conn.close()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name: str = "ai_tutor.db") -> ConnectionPool:
+    """Get the process-wide pool for a database file, creating it on first use"""
+    key = db_name if db_name == ':memory:' else os.path.abspath(db_name)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_name)
+            _pools[key] = pool
+        return pool
@@ -0,0 +1,198 @@
+"""
+Two-tier cache for generated lesson content
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+from config import API_CONFIG, APP_CONFIG, DATABASE_CONFIG
+from utils.connection_pool import get_pool
+
+
+def make_cache_key(model: str, prompt: str) -> str:
+    """Content address for a model call: sha256 over the model name and prompt"""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """Model output cached in an in-process LRU backed by a SQLite table.
+
+    Entries are fresh for ``ttl_seconds``. For a further ``stale_seconds``
+    they are still served, but the first reader also starts a background
+    refresh, so learners never wait on the model for content that was
+    cached once. Values must be JSON-serialisable, and callers share the
+    cached object, so they must not mutate it.
+    """
+
+    def __init__(self, db_name: Optional[str] = None, memory_entries: Optional[int] = None,
+                 disk_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 stale_seconds: Optional[float] = None):
+        cache_config = API_CONFIG['content_cache']
+
+        self.pool = get_pool(db_name or APP_CONFIG['database_name'])
+        self.memory_entries = (memory_entries if memory_entries is not None
+                               else cache_config['memory_entries'])
+        self.disk_entries = disk_entries if disk_entries is not None else cache_config['disk_entries']
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else cache_config['ttl_seconds']
+        self.stale_seconds = (stale_seconds if stale_seconds is not None
+                              else cache_config['stale_seconds'])
+
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._writes_since_prune = 0
+
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stale_hits': 0,
+                      'stores': 0, 'refreshes': 0, 'evictions': 0}
+
+        self._create_table()
+
+    def _create_table(self):
+        """Create the content_cache table if the database predates it"""
+        table_config = DATABASE_CONFIG['tables']['content_cache']
+        with self.pool.connection() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS content_cache ({', '.join(table_config['columns'])})")
+            for index in table_config['indexes']:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index['name']} "
+                             f"ON content_cache ({', '.join(index['columns'])})")
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def _remember(self, key: str, value: Any, created_at: float):
+        """Put an entry at the head of the memory LRU, evicting the tail"""
+        with self._lock:
+            self._memory[key] = (value, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """``(value, age_seconds)`` for a cached entry, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry[0], time.time() - entry[1]
+
+        now = time.time()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                'SELECT value, created_at FROM content_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            conn.execute('UPDATE content_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+
+        value, created_at = json.loads(row[0]), row[1]
+        self.stats['disk_hits'] += 1
+        self._remember(key, value, created_at)
+        return value, now - created_at
+
+    def store(self, key: str, model: str, value: Any):
+        """Write an entry to both tiers"""
+        now = time.time()
+        self._remember(key, value, now)
+
+        with self.pool.connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO content_cache (cache_key, model, value, created_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, model, json.dumps(value), now, now)
+            )
+        self.stats['stores'] += 1
+
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= max(1, self.disk_entries // 100):
+            self._writes_since_prune = 0
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired rows and the least recently used ones beyond ``disk_entries``"""
+        cutoff = time.time() - self.ttl_seconds - self.stale_seconds
+        with self.pool.connection() as conn:
+            before = conn.total_changes
+            conn.execute('DELETE FROM content_cache WHERE created_at < ?', (cutoff,))
+            conn.execute('''
+                DELETE FROM content_cache WHERE cache_key IN (
+                    SELECT cache_key FROM content_cache
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.disk_entries,))
+            removed = conn.total_changes - before
+
+        self.stats['evictions'] += removed
+        return removed
+
+    def invalidate(self, key: str):
+        """Remove one entry from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+        with self.pool.connection() as conn:
+            conn.execute('DELETE FROM content_cache WHERE cache_key = ?', (key,))
+
+    def get_or_compute(self, model: str, prompt: str,
+                       compute: Callable[[], Any]) -> Any:
+        """Cached output for ``(model, prompt)``, calling ``compute`` on a miss.
+
+        ``compute`` returning None (a failed call) is not cached, so the next
+        request tries the model again.
+        """
+        key = make_cache_key(model, prompt)
+        cached = self.lookup(key)
+
+        if cached is not None:
+            value, age = cached
+            if age < self.ttl_seconds:
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stats['stale_hits'] += 1
+                self._refresh_in_background(key, model, compute)
+                return value
+
+        value = compute()
+        if value is not None:
+            self.store(key, model, value)
+        return value
+
+    def _refresh_in_background(self, key: str, model: str, compute: Callable[[], Any]):
+        """Recompute a stale entry on a worker thread, once per key at a time"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = compute()
+                if value is not None:
+                    self.store(key, model, value)
+                    self.stats['refreshes'] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="content-cache-refresh", daemon=True).start()
+
+
+_cache: Optional[ContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """Get the process-wide content cache, creating it on first use"""
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContentCache()
+        return _cache
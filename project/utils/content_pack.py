@@ -0,0 +1,284 @@
+"""
+Read-only, memory-mapped bank of lessons and quiz questions
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+from config import DATABASE_CONFIG
+
+# Rows are inserted grouped by (subject, difficulty, needs), so each group
+# is a contiguous rowid range recorded in `buckets`. Sampling picks random
+# offsets inside the range and fetches just those rows by primary key.
+PACK_SCHEMA = '''
+    CREATE TABLE lessons (
+        id INTEGER PRIMARY KEY,
+        subject TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        needs TEXT NOT NULL,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        activities TEXT NOT NULL,
+        tips TEXT NOT NULL
+    );
+    CREATE TABLE questions (
+        id INTEGER PRIMARY KEY,
+        subject TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        needs TEXT NOT NULL,
+        question TEXT NOT NULL,
+        options TEXT NOT NULL,
+        correct INTEGER NOT NULL,
+        explanation TEXT NOT NULL
+    );
+    CREATE TABLE buckets (
+        kind TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        needs TEXT NOT NULL,
+        first_id INTEGER NOT NULL,
+        row_count INTEGER NOT NULL,
+        PRIMARY KEY (kind, subject, difficulty, needs)
+    ) WITHOUT ROWID;
+'''
+
+# needs value for content that suits every learner
+ANY_NEEDS = ''
+
+
+def pack_subject(subject: str, default: Optional[str] = None) -> str:
+    """Pack key for an app subject name ("Mathematics" -> "math"), else ``default`` or the name"""
+    return DATABASE_CONFIG['content_pack']['subjects'].get(subject, default or subject)
+
+
+def pack_needs(needs: Optional[str]) -> str:
+    """Pack key for a special-needs category; "No specific needs" is any-needs content"""
+    return ANY_NEEDS if not needs or needs == "No specific needs" else needs
+
+
+def _group_key(item: Dict):
+    return (pack_subject(item['subject']), item['difficulty'].lower(), pack_needs(item.get('needs')))
+
+
+def build_content_pack(path: str, lessons: Iterable[Dict], questions: Iterable[Dict]) -> Dict:
+    """Write a new pack file, replacing ``path`` atomically once it is complete.
+
+    Lessons need subject, difficulty, title, content, activities and tips;
+    questions need subject, difficulty, question, options, correct and
+    explanation. Either may carry a ``needs`` category from
+    LEARNING_CONFIG['special_needs_categories']. Subjects are stored as pack
+    keys (see ``pack_subject``) and difficulties in lower case.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    counts = {'lessons': 0, 'questions': 0}
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.executescript(PACK_SCHEMA)
+
+        for kind, rows, columns, values in (
+            ('lessons', lessons, 'title, content, activities, tips',
+             lambda row: (row['title'], row['content'], json.dumps(list(row['activities'])), row['tips'])),
+            ('questions', questions, 'question, options, correct, explanation',
+             lambda row: (row['question'], json.dumps(list(row['options'])), row['correct'],
+                          row['explanation'])),
+        ):
+            for key, group in _grouped(rows):
+                conn.executemany(
+                    f'INSERT INTO {kind} (subject, difficulty, needs, {columns}) '
+                    f'VALUES (?, ?, ?{", ?" * len(columns.split(","))})',
+                    (key + values(row) for row in group)
+                )
+                first_id = conn.execute(f'SELECT MAX(id) FROM {kind}').fetchone()[0] - len(group) + 1
+                conn.execute('INSERT INTO buckets VALUES (?, ?, ?, ?, ?, ?)',
+                             (kind,) + key + (first_id, len(group)))
+                counts[kind] += len(group)
+
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return counts
+
+
+def _grouped(rows: Iterable[Dict]):
+    """(key, rows) pairs with each (subject, difficulty, needs) group together"""
+    groups: Dict[tuple, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(_group_key(row), []).append(row)
+    return groups.items()
+
+
+class ContentPack:
+    """Read-only view of a pack file, memory-mapped by SQLite.
+
+    The file is opened immutable with a large ``mmap_size``, so page reads
+    come straight from the OS page cache and every worker process shares
+    the same physical pages instead of holding its own copy of the bank.
+    Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str, mmap_size: Optional[int] = None):
+        self.path = os.path.abspath(path)
+        self.mmap_size = (mmap_size if mmap_size is not None
+                          else DATABASE_CONFIG['content_pack']['mmap_size'])
+        self._local = threading.local()
+
+        self._buckets = {
+            (kind, subject, difficulty, needs): (first_id, row_count)
+            for kind, subject, difficulty, needs, first_id, row_count
+            in self._connection().execute('SELECT * FROM buckets')
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro&immutable=1', uri=True,
+                                   check_same_thread=False)
+            conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+            self._local.conn = conn
+        return conn
+
+    def count(self, kind: str, subject: str, difficulty: str, needs: Optional[str] = None) -> int:
+        """Rows available for a subject/difficulty, including any-needs rows"""
+        subject, difficulty = pack_subject(subject), difficulty.lower()
+        return sum(self._buckets.get((kind, subject, difficulty, key), (0, 0))[1]
+                   for key in self._needs_keys(needs))
+
+    def _needs_keys(self, needs: Optional[str]) -> List[str]:
+        needs = pack_needs(needs)
+        return [ANY_NEEDS, needs] if needs != ANY_NEEDS else [ANY_NEEDS]
+
+    def _sample_ids(self, kind: str, subject: str, difficulty: str, count: int,
+                    needs: Optional[str], rng: random.Random) -> List[int]:
+        """Random row ids across the matching buckets, without reading the rows"""
+        subject, difficulty = pack_subject(subject), difficulty.lower()
+        ranges = [self._buckets[(kind, subject, difficulty, key)]
+                  for key in self._needs_keys(needs)
+                  if (kind, subject, difficulty, key) in self._buckets]
+        total = sum(row_count for _, row_count in ranges)
+        if total == 0:
+            return []
+
+        ids = []
+        for offset in rng.sample(range(total), min(count, total)):
+            for first_id, row_count in ranges:
+                if offset < row_count:
+                    ids.append(first_id + offset)
+                    break
+                offset -= row_count
+        return ids
+
+    def sample_questions(self, subject: str, difficulty: str, count: int,
+                         needs: Optional[str] = None,
+                         rng: Optional[random.Random] = None) -> List[Dict]:
+        """Up to ``count`` distinct random questions, in random order"""
+        ids = self._sample_ids('questions', subject, difficulty, count, needs, rng or random)
+        if not ids:
+            return []
+
+        placeholders = ', '.join('?' * len(ids))
+        rows = {row[0]: row for row in self._connection().execute(
+            f'SELECT id, question, options, correct, explanation FROM questions '
+            f'WHERE id IN ({placeholders})', ids
+        )}
+        return [
+            {'question': question, 'options': json.loads(options), 'correct': correct,
+             'explanation': explanation}
+            for _, question, options, correct, explanation in (rows[row_id] for row_id in ids)
+        ]
+
+    def sample_lesson(self, subject: str, difficulty: str, topic: str, needs: Optional[str] = None,
+                      rng: Optional[random.Random] = None) -> Optional[Dict]:
+        """One random lesson with ``{topic}`` filled in, or None if the pack has none"""
+        ids = self._sample_ids('lessons', subject, difficulty, 1, needs, rng or random)
+        if not ids:
+            return None
+
+        title, content, activities, tips = self._connection().execute(
+            'SELECT title, content, activities, tips FROM lessons WHERE id = ?', ids
+        ).fetchone()
+        return {'title': title.replace('{topic}', topic), 'content': content.replace('{topic}', topic),
+                'activities': json.loads(activities), 'tips': tips.replace('{topic}', topic)}
+
+
+_pack: Optional[ContentPack] = None
+_pack_checked = False
+_pack_lock = threading.Lock()
+
+
+def get_content_pack() -> Optional[ContentPack]:
+    """The configured pack, or None when no pack file has been built"""
+    global _pack, _pack_checked
+
+    with _pack_lock:
+        if not _pack_checked:
+            path = DATABASE_CONFIG['content_pack']['path']
+            _pack = ContentPack(path) if os.path.exists(path) else None
+            _pack_checked = True
+        return _pack
+
+
+def reload_content_pack() -> Optional[ContentPack]:
+    """Pick up a rebuilt (or newly built) pack file"""
+    global _pack_checked
+
+    with _pack_lock:
+        _pack_checked = False
+    return get_content_pack()
+
+
+def _template_questions() -> List[Dict]:
+    """Quiz questions from the built-in template registries"""
+    from utils.templates import APP_TEMPLATES, HELPER_TEMPLATES
+
+    questions = []
+    for registry in (HELPER_TEMPLATES, APP_TEMPLATES):
+        for subject, difficulty in registry.quiz_keys():
+            for question in registry.quiz(subject, difficulty):
+                questions.append({'subject': subject, 'difficulty': difficulty, **question})
+    return questions
+
+
+def _read_ndjson(paths: List[str]):
+    """Lessons and questions from NDJSON files; rows with "question" are questions"""
+    lessons, questions = [], []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    (questions if 'question' in row else lessons).append(row)
+    return lessons, questions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build a content pack: python -m utils.content_pack"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the lesson/question content pack")
+    parser.add_argument('sources', nargs='*', help="NDJSON files of lessons and questions")
+    parser.add_argument('--output', default=DATABASE_CONFIG['content_pack']['path'])
+    parser.add_argument('--no-templates', action='store_true',
+                        help="Leave out the built-in template quiz questions")
+    args = parser.parse_args(argv)
+
+    lessons, questions = _read_ndjson(args.sources)
+    if not args.no_templates:
+        questions += _template_questions()
+
+    counts = build_content_pack(args.output, lessons, questions)
+    print(f"Wrote {counts['lessons']} lesson(s) and {counts['questions']} question(s) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
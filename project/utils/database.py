@@ -5,30 +5,356 @@ Database utilities for the AI Tutor application
 import sqlite3
 import json
 import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import streamlit as st
-from config import DATABASE_CONFIG
+from config import DATABASE_CONFIG, GAMIFICATION_CONFIG
+from utils.connection_pool import get_pool
+from utils.write_queue import WriteBehindQueue
+from utils.leaderboard import Leaderboard
+from utils.export import EXPORT_FORMATS, iter_csv, iter_ndjson, write_chunks
+
+# Tables available to the streaming export: name -> (table, columns, time column)
+EXPORT_TABLES = {
+    'progress': ('progress',
+                 ['user_id', 'subject', 'skill', 'level', 'points', 'last_updated'],
+                 'last_updated'),
+    'sessions': ('learning_sessions',
+                 ['user_id', 'subject', 'activity_type', 'score', 'duration', 'completed_at'],
+                 'completed_at'),
+    'achievements': ('achievements',
+                     ['user_id', 'achievement_id', 'earned_at'],
+                     'earned_at')
+}
+
+# Gaps-and-islands over each user's distinct session days: consecutive days
+# share the same (day - row_number) value, so every island is one unbroken
+# run of learning days and the current streak is the island that ends on
+# the user's last activity date.
+STREAK_CTES = '''
+    session_days AS (
+        SELECT DISTINCT user_id, DATE(completed_at) AS session_date
+        FROM learning_sessions
+    ),
+    islands AS (
+        SELECT user_id, session_date,
+               julianday(session_date)
+                   - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY session_date) AS island
+        FROM session_days
+    ),
+    streaks AS (
+        SELECT user_id, MAX(session_date) AS streak_end, COUNT(*) AS streak_length
+        FROM islands
+        GROUP BY user_id, island
+    )
+'''
+
+# Recomputes user_stats rows from the raw tables
+REBUILD_USER_STATS_QUERY = '''
+    WITH ''' + STREAK_CTES + ''',
+    progress_totals AS (
+        SELECT user_id,
+               SUM(points) AS total_points,
+               SUM(level) AS level_sum,
+               COUNT(*) AS skills_count,
+               COUNT(DISTINCT subject) AS subjects_count
+        FROM progress
+        GROUP BY user_id
+    ),
+    session_totals AS (
+        SELECT user_id,
+               COUNT(*) AS session_count,
+               COALESCE(SUM(duration), 0) AS total_duration,
+               COALESCE(SUM(score), 0) AS score_sum,
+               MAX(DATE(completed_at)) AS last_activity_date
+        FROM (
+            SELECT user_id, duration, score, completed_at FROM learning_sessions
+            UNION ALL
+            -- Sessions moved out by the retention job still count towards lifetime totals
+            SELECT user_id, duration, score, completed_at FROM learning_sessions_archive
+        )
+        GROUP BY user_id
+    ),
+    achievement_totals AS (
+        SELECT user_id, COUNT(*) AS achievements_count
+        FROM achievements
+        GROUP BY user_id
+    )
+    INSERT OR REPLACE INTO user_stats (
+        user_id, total_points, level_sum, skills_count, subjects_count,
+        session_count, total_duration, score_sum, achievements_count,
+        last_activity_date, current_streak
+    )
+    SELECT u.id,
+           COALESCE(p.total_points, 0), COALESCE(p.level_sum, 0),
+           COALESCE(p.skills_count, 0), COALESCE(p.subjects_count, 0),
+           COALESCE(s.session_count, 0), COALESCE(s.total_duration, 0),
+           COALESCE(s.score_sum, 0), COALESCE(a.achievements_count, 0),
+           s.last_activity_date, COALESCE(k.streak_length, 0)
+    FROM users u
+    LEFT JOIN progress_totals p ON p.user_id = u.id
+    LEFT JOIN session_totals s ON s.user_id = u.id
+    LEFT JOIN streaks k ON k.user_id = u.id AND k.streak_end = s.last_activity_date
+    LEFT JOIN achievement_totals a ON a.user_id = u.id
+    WHERE :user_id IS NULL OR u.id = :user_id
+'''
+
+# Resets every user's streak from their session history in one statement
+RECOMPUTE_STREAKS_QUERY = '''
+    WITH ''' + STREAK_CTES + ''',
+    latest AS (
+        SELECT user_id, streak_end, streak_length,
+               ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY streak_end DESC) AS recency
+        FROM streaks
+    )
+    UPDATE user_stats
+    SET current_streak = latest.streak_length,
+        last_activity_date = latest.streak_end
+    FROM latest
+    WHERE latest.user_id = user_stats.user_id AND latest.recency = 1
+'''
+
+# Keep user_stats in step with every write to the raw tables. Triggers run
+# inside the writing statement's transaction, so single-statement upserts
+# and batched inserts stay consistent without extra round trips. A session
+# on the day after the last activity extends the streak, an earlier or
+# same-day session keeps it, and a gap restarts it.
+USER_STATS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_user_stats_session AFTER INSERT ON learning_sessions
+    BEGIN
+        INSERT INTO user_stats (user_id, session_count, total_duration, score_sum,
+                                last_activity_date, current_streak)
+        VALUES (NEW.user_id, 1, COALESCE(NEW.duration, 0), COALESCE(NEW.score, 0),
+                DATE(NEW.completed_at), 1)
+        ON CONFLICT(user_id) DO UPDATE SET
+            session_count = session_count + 1,
+            total_duration = total_duration + excluded.total_duration,
+            score_sum = score_sum + excluded.score_sum,
+            current_streak = CASE
+                WHEN last_activity_date IS NULL THEN 1
+                WHEN excluded.last_activity_date <= last_activity_date THEN current_streak
+                WHEN excluded.last_activity_date = DATE(last_activity_date, '+1 day')
+                    THEN current_streak + 1
+                ELSE 1
+            END,
+            last_activity_date = MAX(COALESCE(last_activity_date, ''), excluded.last_activity_date);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_user_stats_progress_insert AFTER INSERT ON progress
+    BEGIN
+        INSERT INTO user_stats (user_id, total_points, level_sum, skills_count, subjects_count)
+        VALUES (NEW.user_id, COALESCE(NEW.points, 0), COALESCE(NEW.level, 0), 1,
+                (SELECT COUNT(*) FROM progress
+                 WHERE user_id = NEW.user_id AND subject = NEW.subject) = 1)
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_points = total_points + excluded.total_points,
+            level_sum = level_sum + excluded.level_sum,
+            skills_count = skills_count + 1,
+            subjects_count = subjects_count + excluded.subjects_count;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_user_stats_progress_update AFTER UPDATE OF points, level ON progress
+    BEGIN
+        UPDATE user_stats SET
+            total_points = total_points + COALESCE(NEW.points, 0) - COALESCE(OLD.points, 0),
+            level_sum = level_sum + COALESCE(NEW.level, 0) - COALESCE(OLD.level, 0)
+        WHERE user_id = NEW.user_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_user_stats_achievement AFTER INSERT ON achievements
+    BEGIN
+        INSERT INTO user_stats (user_id, achievements_count) VALUES (NEW.user_id, 1)
+        ON CONFLICT(user_id) DO UPDATE SET achievements_count = achievements_count + 1;
+    END
+    '''
+]
+
+def _iso_week_sql(date_sql: str) -> str:
+    """SQL for the ISO 8601 year-week ("2025-01") of a date, like Python's strftime('%G-%V').
+
+    SQLite only understands %G/%V from 3.46, so the key is taken from the
+    Thursday of the date's Monday-Sunday week, which decides its ISO year.
+    """
+    thursday = f"date({date_sql}, 'weekday 0', '-3 days')"
+    return f"strftime('%Y', {thursday}) || '-' || printf('%02d', (strftime('%j', {thursday}) - 1) / 7 + 1)"
+
+
+# Credit point awards to the current (UTC) ISO week's leaderboard
+WEEKLY_POINTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_weekly_points_insert AFTER INSERT ON progress
+    BEGIN
+        INSERT INTO weekly_points (week, user_id, points)
+        VALUES (''' + _iso_week_sql("'now'") + ''', NEW.user_id, COALESCE(NEW.points, 0))
+        ON CONFLICT(week, user_id) DO UPDATE SET points = points + excluded.points;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_weekly_points_update AFTER UPDATE OF points ON progress
+    WHEN COALESCE(NEW.points, 0) > COALESCE(OLD.points, 0)
+    BEGIN
+        INSERT INTO weekly_points (week, user_id, points)
+        VALUES (''' + _iso_week_sql("'now'") + ''', NEW.user_id, NEW.points - COALESCE(OLD.points, 0))
+        ON CONFLICT(week, user_id) DO UPDATE SET points = points + excluded.points;
+    END
+    '''
+]
+
+# Awards points to one (user, subject, skill) row in a single statement. The
+# level is derived from the new total using GAMIFICATION_CONFIG['levels'].
+PROGRESS_UPSERT_QUERY = '''
+    INSERT INTO progress (user_id, subject, skill, points, level)
+    VALUES (:user_id, :subject, :skill, :points,
+            MIN(:max_level, :points / :points_per_level + 1))
+    ON CONFLICT(user_id, subject, skill) DO UPDATE SET
+        points = points + excluded.points,
+        level = MIN(:max_level, (points + excluded.points) / :points_per_level + 1),
+        last_updated = CURRENT_TIMESTAMP
+    RETURNING level
+'''
+
+
+def _create_configured_indexes(cursor: sqlite3.Cursor):
+    """Create every index declared in DATABASE_CONFIG['tables']"""
+    for table_name, table_config in DATABASE_CONFIG['tables'].items():
+        for index in table_config.get('indexes', []):
+            unique = 'UNIQUE ' if index.get('unique') else ''
+            columns_sql = ', '.join(index['columns'])
+            cursor.execute(
+                f'CREATE {unique}INDEX IF NOT EXISTS {index["name"]} ON {table_name} ({columns_sql})'
+            )
+
+
+def _migrate_lookup_indexes(cursor: sqlite3.Cursor):
+    """Merge duplicate progress/achievement rows, then add the lookup indexes"""
+    # Older update_progress could race and insert the same skill twice
+    cursor.execute('''
+        UPDATE progress SET
+            points = (SELECT SUM(p.points) FROM progress p
+                      WHERE p.user_id = progress.user_id AND p.subject = progress.subject
+                        AND p.skill = progress.skill),
+            level = (SELECT MAX(p.level) FROM progress p
+                     WHERE p.user_id = progress.user_id AND p.subject = progress.subject
+                       AND p.skill = progress.skill)
+        WHERE id IN (SELECT MIN(id) FROM progress
+                     GROUP BY user_id, subject, skill HAVING COUNT(*) > 1)
+    ''')
+    cursor.execute('''
+        DELETE FROM progress
+        WHERE id NOT IN (SELECT MIN(id) FROM progress GROUP BY user_id, subject, skill)
+    ''')
+    cursor.execute('''
+        DELETE FROM achievements
+        WHERE id NOT IN (SELECT MIN(id) FROM achievements GROUP BY user_id, achievement_id)
+    ''')
+    
+    _create_configured_indexes(cursor)
+
+
+def _migrate_user_stats_triggers(cursor: sqlite3.Cursor):
+    """Move user_stats maintenance into triggers on the raw tables"""
+    for trigger_sql in USER_STATS_TRIGGERS:
+        cursor.execute(trigger_sql)
+
+
+def _migrate_leaderboards(cursor: sqlite3.Cursor):
+    """Add the subject/weekly leaderboard indexes and weekly point triggers"""
+    _create_configured_indexes(cursor)
+    for trigger_sql in WEEKLY_POINTS_TRIGGERS:
+        cursor.execute(trigger_sql)
+
+
+def _iso_week_from_monday_week(week: str) -> str:
+    """ISO year-week for a '%Y-%W' key, whose weeks restart at week 00 every 1 January"""
+    year, number = week.split('-')
+    day = (datetime(int(year), 1, 1) if number == '00'
+           else datetime.strptime(f"{week}-1", '%Y-%W-%w'))
+    return day.strftime('%G-%V')
+
+
+def _migrate_iso_weeks(cursor: sqlite3.Cursor):
+    """Key weekly_points by ISO week, merging the weeks that '%Y-%W' split at new year"""
+    for trigger in ('trg_weekly_points_insert', 'trg_weekly_points_update'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    for trigger_sql in WEEKLY_POINTS_TRIGGERS:
+        cursor.execute(trigger_sql)
+
+    merged: Dict[Tuple[str, int], int] = {}
+    for week, user_id, points in cursor.execute('SELECT week, user_id, points FROM weekly_points').fetchall():
+        key = (_iso_week_from_monday_week(week), user_id)
+        merged[key] = merged.get(key, 0) + (points or 0)
+    cursor.execute('DELETE FROM weekly_points')
+    cursor.executemany('INSERT INTO weekly_points (week, user_id, points) VALUES (?, ?, ?)',
+                       [(week, user_id, points) for (week, user_id), points in merged.items()])
+
+
+# Schema migrations as (version, description, migrate). Applied in order by
+# DatabaseManager.run_migrations and tracked with PRAGMA user_version.
+MIGRATIONS = [
+    (1, "Unique progress/achievement keys and session lookup index", _migrate_lookup_indexes),
+    (2, "Maintain user_stats with triggers", _migrate_user_stats_triggers),
+    (3, "Subject and weekly leaderboards", _migrate_leaderboards),
+    (4, "Generated content cache index", _create_configured_indexes),
+    (5, "ISO weeks for the weekly leaderboard", _migrate_iso_weeks),
+]
 
 class DatabaseManager:
     """Manages all database operations"""
     
     def __init__(self, db_name: str = "ai_tutor.db"):
         self.db_name = db_name
+        self.pool = get_pool(db_name)
+        self.write_queue = WriteBehindQueue(self.write_events)
+        self.leaderboard = Leaderboard()
+        self._leaderboard_loaded_at: Optional[float] = None
         self.init_database()
     
     def init_database(self):
         """Initialize database with all required tables"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'")
+            has_user_stats = cursor.fetchone() is not None
+            
+            # Create tables from config
+            for table_name, table_config in DATABASE_CONFIG['tables'].items():
+                columns_sql = ', '.join(table_config['columns'])
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS {table_name} ({columns_sql})')
         
-        # Create tables from config
-        for table_name, table_config in DATABASE_CONFIG['tables'].items():
-            columns_sql = ', '.join(table_config['columns'])
-            cursor.execute(f'CREATE TABLE IF NOT EXISTS {table_name} ({columns_sql})')
+        applied = self.run_migrations()
         
-        conn.commit()
-        conn.close()
+        # Backfill the summary table for databases created before it existed,
+        # and after migrations that may have merged rows
+        if not has_user_stats or applied:
+            self.rebuild_user_stats()
+    
+    def run_migrations(self) -> List[int]:
+        """Apply pending schema migrations, returning the versions applied"""
+        applied = []
+        
+        with self.pool.connection() as conn:
+            for version, description, migrate in MIGRATIONS:
+                # Each migration runs in its own write transaction so that
+                # concurrent workers opening the same file apply it only once
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    current_version = conn.execute('PRAGMA user_version').fetchone()[0]
+                    if version > current_version:
+                        migrate(conn.cursor())
+                        conn.execute(f'PRAGMA user_version = {int(version)}')
+                        applied.append(version)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        
+        return applied
     
     def hash_password(self, password: str) -> str:
         """Hash password for secure storage"""
@@ -38,19 +364,17 @@ class DatabaseManager:
                    learning_needs: str, preferences: List[str]) -> bool:
         """Create a new user account"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            password_hash = self.hash_password(password)
-            preferences_json = json.dumps(preferences)
-            
-            cursor.execute('''
-                INSERT INTO users (username, password_hash, name, age, learning_needs, preferences)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (username, password_hash, name, age, learning_needs, preferences_json))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                password_hash = self.hash_password(password)
+                preferences_json = json.dumps(preferences)
+                
+                cursor.execute('''
+                    INSERT INTO users (username, password_hash, name, age, learning_needs, preferences)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (username, password_hash, name, age, learning_needs, preferences_json))
             
-            conn.commit()
-            conn.close()
             return True
             
         except sqlite3.IntegrityError:
@@ -62,17 +386,16 @@ class DatabaseManager:
     def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
         """Authenticate user login"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            password_hash = self.hash_password(password)
-            cursor.execute('''
-                SELECT id, username, name, age, learning_needs, preferences
-                FROM users WHERE username = ? AND password_hash = ?
-            ''', (username, password_hash))
-            
-            user = cursor.fetchone()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                password_hash = self.hash_password(password)
+                cursor.execute('''
+                    SELECT id, username, name, age, learning_needs, preferences
+                    FROM users WHERE username = ? AND password_hash = ?
+                ''', (username, password_hash))
+                
+                user = cursor.fetchone()
             
             if user:
                 return {
@@ -93,71 +416,101 @@ class DatabaseManager:
                             score: int, duration: int) -> bool:
         """Save a completed learning session"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, subject, activity_type, score, duration))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (user_id, subject, activity_type, score, duration))
             
-            conn.commit()
-            conn.close()
             return True
             
         except Exception as e:
             st.error(f"Error saving session: {e}")
             return False
     
-    def update_progress(self, user_id: int, subject: str, skill: str, points: int) -> bool:
-        """Update user progress in a subject/skill"""
-        try:
-            conn = sqlite3.connect(self.db_name)
+    def queue_learning_session(self, user_id: int, subject: str, activity_type: str,
+                               score: int, duration: int):
+        """Record a completed session through the write-behind queue"""
+        completed_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        self.write_queue.submit('session', (user_id, subject, activity_type, score, duration, completed_at))
+    
+    def queue_progress(self, user_id: int, subject: str, skill: str, points: int):
+        """Award progress points through the write-behind queue"""
+        self.write_queue.submit('progress', (user_id, subject, skill, int(points)))
+    
+    def write_events(self, events: List[Tuple[str, tuple]]):
+        """Write a batch of queued events in one transaction"""
+        sessions = [params for kind, params in events if kind == 'session']
+        
+        # Coalesce awards for the same skill into one upsert
+        awards: Dict[Tuple, int] = {}
+        for kind, params in events:
+            if kind == 'progress':
+                key = params[:3]
+                awards[key] = awards.get(key, 0) + params[3]
+        
+        levels_config = GAMIFICATION_CONFIG['levels']
+        
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
-            # Check if progress record exists
-            cursor.execute('''
-                SELECT id, points, level FROM progress 
-                WHERE user_id = ? AND subject = ? AND skill = ?
-            ''', (user_id, subject, skill))
+            cursor.executemany('''
+                INSERT INTO learning_sessions (user_id, subject, activity_type, score, duration, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', sessions)
             
-            existing = cursor.fetchone()
+            cursor.executemany(PROGRESS_UPSERT_QUERY, [{
+                'user_id': user_id,
+                'subject': subject,
+                'skill': skill,
+                'points': points,
+                'points_per_level': levels_config['points_per_level'],
+                'max_level': levels_config['max_level']
+            } for (user_id, subject, skill), points in awards.items()])
             
-            if existing:
-                new_points = existing[1] + points
-                new_level = existing[2] + (1 if new_points >= existing[2] * 100 else 0)
+            self._sync_leaderboard({user_id for user_id, _, _ in awards})
+    
+    def update_progress(self, user_id: int, subject: str, skill: str, points: int) -> Optional[int]:
+        """Add points to a subject/skill, returning the new level (None on error)"""
+        try:
+            levels_config = GAMIFICATION_CONFIG['levels']
+            
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 
-                cursor.execute('''
-                    UPDATE progress SET points = ?, level = ?, last_updated = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (new_points, new_level, existing[0]))
-            else:
-                cursor.execute('''
-                    INSERT INTO progress (user_id, subject, skill, points)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, subject, skill, points))
+                cursor.execute(PROGRESS_UPSERT_QUERY, {
+                    'user_id': user_id,
+                    'subject': subject,
+                    'skill': skill,
+                    'points': int(points),
+                    'points_per_level': levels_config['points_per_level'],
+                    'max_level': levels_config['max_level']
+                })
+                new_level = cursor.fetchone()[0]
+                
+                self._sync_leaderboard([user_id])
             
-            conn.commit()
-            conn.close()
-            return True
+            return new_level
             
         except Exception as e:
             st.error(f"Error updating progress: {e}")
-            return False
+            return None
     
-    def get_user_progress(self, user_id: int) -> List[Dict]:
-        """Get all progress data for a user"""
+    def get_user_progress(self, user_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Get progress data for a user, most recently updated first"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT subject, skill, level, points, last_updated FROM progress 
-                WHERE user_id = ? ORDER BY last_updated DESC
-            ''', (user_id,))
-            
-            progress = cursor.fetchall()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT subject, skill, level, points, last_updated FROM progress 
+                    WHERE user_id = ? ORDER BY last_updated DESC
+                    LIMIT ?
+                ''', (user_id, -1 if limit is None else limit))
+                
+                progress = cursor.fetchall()
             
             return [{
                 'subject': p[0], 
@@ -174,20 +527,19 @@ class DatabaseManager:
     def get_learning_sessions(self, user_id: int, days: int = 30) -> List[Dict]:
         """Get recent learning sessions for a user"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            cursor.execute('''
-                SELECT subject, activity_type, score, duration, completed_at 
-                FROM learning_sessions 
-                WHERE user_id = ? AND completed_at >= ?
-                ORDER BY completed_at DESC
-            ''', (user_id, cutoff_date.isoformat()))
-            
-            sessions = cursor.fetchall()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cutoff_date = datetime.now() - timedelta(days=days)
+                
+                cursor.execute('''
+                    SELECT subject, activity_type, score, duration, completed_at 
+                    FROM learning_sessions 
+                    WHERE user_id = ? AND completed_at >= ?
+                    ORDER BY completed_at DESC
+                ''', (user_id, cutoff_date.isoformat()))
+                
+                sessions = cursor.fetchall()
             
             return [{
                 'subject': s[0],
@@ -204,27 +556,16 @@ class DatabaseManager:
     def save_achievement(self, user_id: int, achievement_id: str) -> bool:
         """Save an earned achievement"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Check if achievement already exists
-            cursor.execute('''
-                SELECT id FROM achievements 
-                WHERE user_id = ? AND achievement_id = ?
-            ''', (user_id, achievement_id))
-            
-            if cursor.fetchone():
-                conn.close()
-                return False  # Already earned
-            
-            cursor.execute('''
-                INSERT INTO achievements (user_id, achievement_id)
-                VALUES (?, ?)
-            ''', (user_id, achievement_id))
-            
-            conn.commit()
-            conn.close()
-            return True
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # The unique (user_id, achievement_id) index skips ones already earned
+                cursor.execute('''
+                    INSERT OR IGNORE INTO achievements (user_id, achievement_id)
+                    VALUES (?, ?)
+                ''', (user_id, achievement_id))
+                
+                return cursor.rowcount == 1
             
         except Exception as e:
             st.error(f"Error saving achievement: {e}")
@@ -233,16 +574,15 @@ class DatabaseManager:
     def get_user_achievements(self, user_id: int) -> List[str]:
         """Get all achievements earned by a user"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT achievement_id FROM achievements 
-                WHERE user_id = ?
-            ''', (user_id,))
-            
-            achievements = cursor.fetchall()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT achievement_id FROM achievements 
+                    WHERE user_id = ?
+                ''', (user_id,))
+                
+                achievements = cursor.fetchall()
             
             return [a[0] for a in achievements]
             
@@ -251,93 +591,159 @@ class DatabaseManager:
             return []
     
     def get_user_stats(self, user_id: int) -> Dict:
-        """Get comprehensive user statistics"""
+        """Get comprehensive user statistics from the user_stats summary row"""
         try:
-            progress_data = self.get_user_progress(user_id)
-            sessions_data = self.get_learning_sessions(user_id)
-            achievements_data = self.get_user_achievements(user_id)
-            
-            total_points = sum(p['points'] for p in progress_data)
-            avg_level = sum(p['level'] for p in progress_data) / len(progress_data) if progress_data else 0
-            subjects_count = len(set(p['subject'] for p in progress_data))
-            total_sessions = len(sessions_data)
-            avg_score = sum(s['score'] for s in sessions_data) / len(sessions_data) if sessions_data else 0
-            total_time = sum(s['duration'] for s in sessions_data)
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT total_points, level_sum, skills_count, subjects_count,
+                           session_count, total_duration, score_sum, achievements_count,
+                           last_activity_date,
+                           CASE WHEN last_activity_date = DATE('now') THEN current_streak ELSE 0 END
+                    FROM user_stats WHERE user_id = ?
+                ''', (user_id,))
+                
+                stats = cursor.fetchone() or (0, 0, 0, 0, 0, 0, 0, 0, None, 0)
             
-            # Calculate learning streak
-            streak = self.calculate_learning_streak(user_id)
+            skills_count, session_count = stats[2], stats[4]
             
             return {
-                'total_points': total_points,
-                'average_level': round(avg_level, 1),
-                'subjects_learning': subjects_count,
-                'total_sessions': total_sessions,
-                'average_score': round(avg_score, 1),
-                'total_time_minutes': total_time,
-                'learning_streak': streak,
-                'achievements_count': len(achievements_data)
+                'total_points': stats[0],
+                'average_level': round(stats[1] / skills_count, 1) if skills_count else 0,
+                'skills_tracked': skills_count,
+                'subjects_learning': stats[3],
+                'total_sessions': session_count,
+                'average_score': round(stats[6] / session_count, 1) if session_count else 0,
+                'total_time_minutes': stats[5],
+                'achievements_count': stats[7],
+                'last_activity_date': stats[8],
+                'learning_streak': stats[9]
             }
             
         except Exception as e:
             st.error(f"Error getting user stats: {e}")
             return {}
     
+    def rebuild_user_stats(self, user_id: Optional[int] = None) -> int:
+        """Recompute user_stats from raw tables for one user or everyone"""
+        with self.pool.connection() as conn:
+            changes_before = conn.total_changes
+            conn.execute(REBUILD_USER_STATS_QUERY, {'user_id': user_id})
+            return conn.total_changes - changes_before
+    
     def calculate_learning_streak(self, user_id: int) -> int:
-        """Calculate current learning streak in days"""
+        """Get current learning streak in days from the user_stats summary row"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Get distinct dates of learning sessions
-            cursor.execute('''
-                SELECT DISTINCT DATE(completed_at) as session_date
-                FROM learning_sessions 
-                WHERE user_id = ?
-                ORDER BY session_date DESC
-            ''', (user_id,))
-            
-            dates = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            if not dates:
-                return 0
-            
-            # Calculate streak
-            streak = 0
-            current_date = datetime.now().date()
-            
-            for date_str in dates:
-                session_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 
-                if session_date == current_date or session_date == current_date - timedelta(days=streak):
-                    streak += 1
-                    current_date = session_date
-                else:
-                    break
+                # The trigger on learning_sessions advances the stored streak;
+                # it only counts as current if the learner was active today
+                cursor.execute('''
+                    SELECT CASE WHEN last_activity_date = DATE('now') THEN current_streak ELSE 0 END
+                    FROM user_stats WHERE user_id = ?
+                ''', (user_id,))
+                
+                streak = cursor.fetchone()
             
-            return streak
+            return streak[0] if streak else 0
             
         except Exception as e:
             st.error(f"Error calculating streak: {e}")
             return 0
     
-    def get_leaderboard(self, limit: int = 10) -> List[Dict]:
-        """Get top users by points for leaderboard"""
+    def recompute_learning_streaks(self) -> int:
+        """Recompute every user's stored streak from session history"""
+        with self.pool.connection() as conn:
+            changes_before = conn.total_changes
+            conn.execute(RECOMPUTE_STREAKS_QUERY)
+            return conn.total_changes - changes_before
+    
+    def _sync_leaderboard(self, user_ids: Iterable[int]):
+        """Copy fresh user_stats totals for these users into the in-memory board"""
+        user_ids = list(user_ids)
+        if self._leaderboard_loaded_at is None or not user_ids:
+            return
+        
+        placeholders = ', '.join('?' for _ in user_ids)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT user_id, total_points FROM user_stats WHERE user_id IN ({placeholders})',
+                user_ids
+            ).fetchall()
+        
+        for user_id, total_points in rows:
+            self.leaderboard.update(user_id, total_points)
+    
+    def _ensure_leaderboard(self):
+        """Load the in-memory board on first use and reload it periodically"""
+        refresh_seconds = DATABASE_CONFIG['leaderboard']['refresh_seconds']
+        loaded_at = self._leaderboard_loaded_at
+        
+        if loaded_at is not None and time.monotonic() - loaded_at < refresh_seconds:
+            return
+        
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                'SELECT user_id, total_points FROM user_stats WHERE skills_count > 0'
+            ).fetchall()
+        
+        self.leaderboard.load(rows)
+        self._leaderboard_loaded_at = time.monotonic()
+    
+    def _week_key(self, weeks_ago: int = 0) -> str:
+        """ISO year-week key used by weekly_points for the week containing today - weeks_ago"""
+        return (datetime.utcnow() - timedelta(weeks=weeks_ago)).strftime('%G-%V')
+    
+    def get_leaderboard(self, limit: int = 10, subject: Optional[str] = None,
+                        weeks_ago: Optional[int] = None) -> List[Dict]:
+        """Get top users by points, overall, for one subject, or for one week"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT u.name, SUM(p.points) as total_points, COUNT(DISTINCT p.subject) as subjects
-                FROM users u
-                JOIN progress p ON u.id = p.user_id
-                GROUP BY u.id, u.name
-                ORDER BY total_points DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            leaderboard = cursor.fetchall()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if subject is not None:
+                    cursor.execute('''
+                        SELECT u.name, SUM(p.points) as total_points, COUNT(DISTINCT p.subject) as subjects
+                        FROM progress p
+                        JOIN users u ON u.id = p.user_id
+                        WHERE p.subject = ?
+                        GROUP BY p.user_id
+                        ORDER BY total_points DESC
+                        LIMIT ?
+                    ''', (subject, limit))
+                    leaderboard = cursor.fetchall()
+                
+                elif weeks_ago is not None:
+                    cursor.execute('''
+                        SELECT u.name, w.points, s.subjects_count
+                        FROM weekly_points w
+                        JOIN users u ON u.id = w.user_id
+                        LEFT JOIN user_stats s ON s.user_id = w.user_id
+                        WHERE w.week = ?
+                        ORDER BY w.points DESC
+                        LIMIT ?
+                    ''', (self._week_key(weeks_ago), limit))
+                    leaderboard = cursor.fetchall()
+                
+                else:
+                    self._ensure_leaderboard()
+                    top = self.leaderboard.top(limit)
+                    if not top:
+                        return []
+                    
+                    placeholders = ', '.join('?' for _ in top)
+                    cursor.execute(f'''
+                        SELECT u.id, u.name, s.subjects_count
+                        FROM users u
+                        LEFT JOIN user_stats s ON s.user_id = u.id
+                        WHERE u.id IN ({placeholders})
+                    ''', [user_id for user_id, _ in top])
+                    details = {row[0]: row[1:] for row in cursor.fetchall()}
+                    
+                    leaderboard = [(details[user_id][0], points, details[user_id][1] or 0)
+                                   for user_id, points in top if user_id in details]
             
             return [{
                 'name': l[0],
@@ -350,16 +756,52 @@ class DatabaseManager:
             st.error(f"Error getting leaderboard: {e}")
             return []
     
+    def get_user_rank(self, user_id: int, subject: Optional[str] = None,
+                      weeks_ago: Optional[int] = None) -> Optional[int]:
+        """Get a user's 1-based leaderboard rank, or None if they are unranked"""
+        try:
+            if subject is None and weeks_ago is None:
+                self._ensure_leaderboard()
+                return self.leaderboard.rank(user_id)
+            
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if subject is not None:
+                    cursor.execute('''
+                        WITH totals AS (
+                            SELECT user_id, SUM(points) AS total_points
+                            FROM progress WHERE subject = ? GROUP BY user_id
+                        )
+                        SELECT (SELECT COUNT(*) FROM totals t WHERE t.total_points > me.total_points) + 1
+                        FROM totals me WHERE me.user_id = ?
+                    ''', (subject, user_id))
+                else:
+                    cursor.execute('''
+                        SELECT (SELECT COUNT(*) FROM weekly_points w
+                                WHERE w.week = me.week AND w.points > me.points) + 1
+                        FROM weekly_points me WHERE me.week = ? AND me.user_id = ?
+                    ''', (self._week_key(weeks_ago), user_id))
+                
+                rank = cursor.fetchone()
+            
+            return rank[0] if rank else None
+            
+        except Exception as e:
+            st.error(f"Error getting rank: {e}")
+            return None
+    
     def export_user_data(self, user_id: int) -> Dict:
         """Export all user data for download"""
         try:
-            user_data = {
-                'progress': self.get_user_progress(user_id),
-                'sessions': self.get_learning_sessions(user_id, days=365),
-                'achievements': self.get_user_achievements(user_id),
-                'stats': self.get_user_stats(user_id),
-                'export_date': datetime.now().isoformat()
-            }
+            with self.pool.connection():
+                user_data = {
+                    'progress': self.get_user_progress(user_id),
+                    'sessions': self.get_learning_sessions(user_id, days=365),
+                    'achievements': self.get_user_achievements(user_id),
+                    'stats': self.get_user_stats(user_id),
+                    'export_date': datetime.now().isoformat()
+                }
             
             return user_data
             
@@ -367,25 +809,218 @@ class DatabaseManager:
             st.error(f"Error exporting data: {e}")
             return {}
     
+    def iter_export_rows(self, table: str, user_ids: Iterable[int],
+                         since: Optional[datetime] = None,
+                         batch_size: int = 1000) -> Iterator[Tuple]:
+        """Stream one export table's rows for many users, in id order.
+        
+        Each batch is read in its own short connection checkout, resuming
+        after the last id seen, so no connection or read snapshot is held
+        while the caller writes the rows out.
+        """
+        table_name, columns, time_column = EXPORT_TABLES[table]
+        user_ids = list(user_ids)
+        
+        # Chunk the user list to stay well under SQLite's bound-parameter limit
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            placeholders = ', '.join('?' for _ in chunk)
+            query = f'''
+                SELECT id, {', '.join(columns)} FROM {table_name}
+                WHERE user_id IN ({placeholders})
+            '''
+            params: List = list(chunk)
+            if since is not None:
+                query += f' AND {time_column} >= ?'
+                params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+            query += ' AND id > ? ORDER BY id LIMIT ?'
+            
+            last_id = 0
+            while True:
+                with self.pool.connection() as conn:
+                    rows = conn.execute(query, params + [last_id, batch_size]).fetchall()
+                for row in rows:
+                    yield row[1:]
+                if len(rows) < batch_size:
+                    break
+                last_id = rows[-1][0]
+    
+    def stream_export(self, user_ids: Iterable[int], tables: Iterable[str] = ('progress',),
+                      fmt: str = 'csv', since: Optional[datetime] = None) -> Iterator[str]:
+        """Yield export text chunks for one or more users (e.g. a whole class).
+        
+        CSV covers a single table; NDJSON can mix tables and tags each line
+        with a "table" field.
+        """
+        tables = list(tables)
+        user_ids = list(user_ids)
+        
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt == 'csv' and len(tables) != 1:
+            raise ValueError("CSV exports cover exactly one table")
+        
+        for table in tables:
+            columns = EXPORT_TABLES[table][1]
+            rows = self.iter_export_rows(table, user_ids, since)
+            
+            if fmt == 'csv':
+                yield from iter_csv(columns, rows)
+            else:
+                yield from iter_ndjson(columns, rows, extra={'table': table})
+    
+    def write_export(self, destination: Union[str, BinaryIO], user_ids: Iterable[int],
+                     tables: Iterable[str] = ('progress',), fmt: str = 'csv',
+                     since: Optional[datetime] = None, compress: bool = False) -> int:
+        """Stream an export to a file path or binary file object, optionally gzipped"""
+        return write_chunks(self.stream_export(user_ids, tables, fmt, since), destination, compress)
+    
     def cleanup_old_data(self, days: int = 365):
         """Clean up old session data (keep only recent data)"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            cursor.execute('''
-                DELETE FROM learning_sessions 
-                WHERE completed_at < ?
-            ''', (cutoff_date.isoformat(),))
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
-            
-            return deleted_count
+            return self.run_retention(days)['deleted']
             
         except Exception as e:
             st.error(f"Error cleaning up data: {e}")
-            return 0
\ No newline at end of file
+            return 0
+    
+    def run_retention(self, days: Optional[int] = None, archive: Optional[str] = None,
+                      batch_size: Optional[int] = None, pause_ms: Optional[float] = None,
+                      vacuum_pages: Optional[int] = None) -> Dict:
+        """Delete old learning sessions in small rowid-range batches.
+        
+        Each batch is its own short transaction, so learners' writes can get
+        in between batches. ``archive`` may be ``"table"`` to copy rows into
+        learning_sessions_archive first, or a file path to append them as
+        gzipped NDJSON. user_stats keeps lifetime totals and is not changed.
+        ``rebuild_user_stats`` recounts those totals from learning_sessions and
+        learning_sessions_archive, so only sessions archived to the table are
+        still counted after a rebuild.
+        """
+        retention_config = DATABASE_CONFIG['retention']
+        days = days if days is not None else retention_config['days']
+        batch_size = batch_size or retention_config['batch_size']
+        pause = (pause_ms if pause_ms is not None else retention_config['pause_ms']) / 1000
+        vacuum_pages = vacuum_pages if vacuum_pages is not None else retention_config['vacuum_pages']
+        
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        columns = EXPORT_TABLES['sessions'][1]
+        report = {'deleted': 0, 'archived': 0, 'batches': 0, 'vacuumed_pages': 0}
+        started = time.monotonic()
+        
+        with self.pool.connection() as conn:
+            first_id, last_id = conn.execute('''
+                SELECT MIN(id), MAX(id) FROM learning_sessions WHERE completed_at < ?
+            ''', (cutoff,)).fetchone()
+        
+        archive_file = open(archive, 'ab') if archive not in (None, 'table') else None
+        try:
+            batch_start = first_id
+            while batch_start is not None and batch_start <= last_id:
+                batch_end = batch_start + batch_size
+                batch_params = (batch_start, batch_end, cutoff)
+                
+                with self.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    
+                    if archive == 'table':
+                        cursor.execute(f'''
+                            INSERT OR IGNORE INTO learning_sessions_archive (id, {', '.join(columns)})
+                            SELECT id, {', '.join(columns)} FROM learning_sessions
+                            WHERE id >= ? AND id < ? AND completed_at < ?
+                        ''', batch_params)
+                        report['archived'] += cursor.rowcount
+                    elif archive_file is not None:
+                        rows = cursor.execute(f'''
+                            SELECT {', '.join(columns)} FROM learning_sessions
+                            WHERE id >= ? AND id < ? AND completed_at < ?
+                        ''', batch_params).fetchall()
+                        write_chunks(iter_ndjson(columns, rows), archive_file, compress=True)
+                        report['archived'] += len(rows)
+                    
+                    cursor.execute('''
+                        DELETE FROM learning_sessions
+                        WHERE id >= ? AND id < ? AND completed_at < ?
+                    ''', batch_params)
+                    report['deleted'] += cursor.rowcount
+                
+                report['batches'] += 1
+                batch_start = batch_end
+                if pause and batch_start <= last_id:
+                    time.sleep(pause)
+        finally:
+            if archive_file is not None:
+                archive_file.close()
+        
+        # Hand freed pages back to the filesystem when auto_vacuum allows it
+        with self.pool.connection() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2 and vacuum_pages:
+                pages_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                # executescript steps the pragma to completion; execute() frees one page
+                conn.executescript(f'PRAGMA incremental_vacuum({int(vacuum_pages)});')
+                pages_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                report['vacuumed_pages'] = pages_before - pages_after
+        
+        report['seconds'] = round(time.monotonic() - started, 3)
+        report['rows_per_second'] = round(report['deleted'] / report['seconds']) if report['seconds'] else 0
+        return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Maintenance commands: python -m utils.database <command>"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="AI Tutor database maintenance")
+    parser.add_argument('--db', default="ai_tutor.db", help="Path to the SQLite database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    subparsers.add_parser('migrate', help="Apply pending schema migrations")
+    
+    rebuild = subparsers.add_parser('rebuild-stats', help="Backfill the user_stats summary table")
+    rebuild.add_argument('--user-id', type=int, help="Only rebuild this user's row")
+    
+    subparsers.add_parser('recompute-streaks', help="Recompute every user's learning streak")
+    
+    retention = subparsers.add_parser('retention', help="Delete old learning sessions in batches")
+    retention.add_argument('--days', type=int, help="Keep sessions newer than this many days")
+    retention.add_argument('--archive', help="'table', or a file path for gzipped NDJSON")
+    retention.add_argument('--batch-size', type=int, help="Rows per delete transaction")
+    
+    export = subparsers.add_parser('export', help="Stream learner data to a CSV/NDJSON file")
+    export.add_argument('--user-id', type=int, action='append', required=True,
+                        help="User to include (repeat for a class)")
+    export.add_argument('--table', action='append', choices=sorted(EXPORT_TABLES),
+                        help="Table to export (repeatable for NDJSON, default: progress)")
+    export.add_argument('--format', default='csv', choices=EXPORT_FORMATS)
+    export.add_argument('--output', required=True, help="Destination file path")
+    export.add_argument('--gzip', action='store_true', help="Gzip-compress the output")
+    
+    args = parser.parse_args(argv)
+    db = DatabaseManager(args.db)
+    
+    if args.command == 'migrate':
+        # DatabaseManager() already ran any pending migrations
+        with db.pool.connection() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+        print(f"Schema is at version {version}")
+    elif args.command == 'rebuild-stats':
+        rows = db.rebuild_user_stats(args.user_id)
+        print(f"Rebuilt user_stats for {rows} user(s)")
+    elif args.command == 'recompute-streaks':
+        rows = db.recompute_learning_streaks()
+        print(f"Recomputed streaks for {rows} user(s)")
+    elif args.command == 'retention':
+        report = db.run_retention(args.days, args.archive, args.batch_size)
+        print(f"Deleted {report['deleted']} session(s) in {report['batches']} batch(es), "
+              f"archived {report['archived']}, {report['rows_per_second']} rows/sec, "
+              f"vacuumed {report['vacuumed_pages']} page(s)")
+    elif args.command == 'export':
+        written = db.write_export(args.output, args.user_id, args.table or ['progress'],
+                                  args.format, compress=args.gzip)
+        print(f"Wrote {written} bytes to {args.output}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+"""
+Streaming CSV/NDJSON encoders for exporting learner data
+"""
+
+import csv
+import gzip
+import io
+import json
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Union
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+def iter_csv(columns: Sequence[str], rows: Iterable[Sequence],
+             rows_per_chunk: int = 500) -> Iterator[str]:
+    """Encode rows as CSV text, yielding a header chunk then one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue()
+
+
+def iter_ndjson(columns: Sequence[str], rows: Iterable[Sequence],
+                extra: Optional[dict] = None) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON objects, one line per row"""
+    for row in rows:
+        record = dict(extra) if extra else {}
+        record.update(zip(columns, row))
+        yield json.dumps(record, default=str) + "\n"
+
+
+def write_chunks(chunks: Iterable[str], destination: Union[str, BinaryIO],
+                 compress: bool = False) -> int:
+    """Write text chunks to a path or binary file object, optionally gzipped.
+
+    Returns the number of uncompressed bytes written. Only one chunk is held
+    in memory at a time.
+    """
+    owns_file = isinstance(destination, str)
+    raw = open(destination, "wb") if owns_file else destination
+    stream = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+
+    written = 0
+    try:
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            stream.write(data)
+            written += len(data)
+    finally:
+        if compress:
+            stream.close()
+        if owns_file:
+            raw.close()
+
+    return written
@@ -0,0 +1,132 @@
+"""
+Shared HTTP clients for calling model APIs
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from config import API_CONFIG
+
+try:
+    import httpx
+except ImportError:  # Optional: the async client falls back to a worker thread
+    httpx = None
+
+# Exceptions raised for network failures by either client
+HTTP_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """Get the process-wide keep-alive session, creating it on first use.
+
+    Every caller shares one pool of open connections per host, so repeat
+    calls to the same API skip the TCP and TLS handshakes.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            http_config = API_CONFIG['http']
+            adapter = HTTPAdapter(
+                pool_connections=http_config['pool_connections'],
+                pool_maxsize=http_config['pool_maxsize'],
+                pool_block=False
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def close_session():
+    """Close the shared session and its pooled connections"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _timeout(timeout: Optional[float]) -> tuple:
+    """(connect, read) timeout pair for a request"""
+    http_config = API_CONFIG['http']
+    read_timeout = timeout if timeout is not None else http_config['timeout']
+    return (min(http_config['connect_timeout'], read_timeout), read_timeout)
+
+
+def post_json(url: str, payload: Any, headers: Optional[Dict] = None,
+              timeout: Optional[float] = None) -> requests.Response:
+    """POST a JSON payload over the shared session"""
+    return get_session().post(url, json=payload, headers=headers, timeout=_timeout(timeout))
+
+
+class AsyncHTTPClient:
+    """Asyncio HTTP client with its own keep-alive connection pool.
+
+    Uses ``httpx.AsyncClient`` when httpx is installed; otherwise requests
+    run on the shared ``requests`` session in a worker thread, so callers
+    get the same awaitable interface either way. Responses expose
+    ``status_code``, ``headers`` and ``json()`` in both modes.
+    """
+
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        """Create the httpx client lazily, inside the running event loop"""
+        if self._client is None:
+            http_config = API_CONFIG['http']
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=http_config['pool_maxsize'],
+                    max_keepalive_connections=http_config['pool_maxsize'],
+                    keepalive_expiry=http_config['keepalive_expiry']
+                ),
+                timeout=httpx.Timeout(http_config['timeout'],
+                                      connect=http_config['connect_timeout'])
+            )
+        return self._client
+
+    async def post_json(self, url: str, payload: Any, headers: Optional[Dict] = None,
+                        timeout: Optional[float] = None):
+        """POST a JSON payload without blocking the event loop"""
+        if httpx is None:
+            return await asyncio.to_thread(post_json, url, payload, headers, timeout)
+
+        kwargs = {'json': payload, 'headers': headers}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        return await self._get_client().post(url, **kwargs)
+
+    async def aclose(self):
+        """Close pooled connections held by the async client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def get_async_client() -> AsyncHTTPClient:
+    """Get the async client for the running event loop.
+
+    httpx connections are bound to the loop that opened them, so each loop
+    gets its own pool.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncHTTPClient()
+        _async_clients[loop] = client
+    return client
+
+
+atexit.register(close_session)
@@ -0,0 +1,127 @@
+"""
+Compiled keyword matching for the offline topic and emotion classifiers
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+# Cap on remembered stem matches ("mathematics" -> math*), which come from user text
+_LOOKUP_LIMIT = 4096
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a keyword trie, sharing common prefixes between alternatives"""
+    if '*' in node:
+        return r'\w*'
+    alternatives = [re.escape(char) + _trie_pattern(child)
+                    for char, child in sorted(node.items()) if char != '']
+    if '' in node:
+        alternatives.append('')
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+class KeywordMatcher:
+    """Finds whole-word keyword hits for several groups in one regex pass.
+
+    Keywords are case-insensitive and only match whole words, so "add" does
+    not fire inside "sadder". A trailing ``*`` makes a keyword a stem that
+    also matches longer words ("math*" matches "mathematics"). All keywords
+    are compiled into a single prefix-trie regex, so one scan of the text
+    covers every group however many keywords there are.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: Dict[str, List[str]] = {name: list(words) for name, words in groups.items()}
+        self._exact: Dict[str, List[str]] = {}
+        self._stems: Dict[str, List[str]] = {}
+
+        trie: Dict = {}
+        for name, words in self.groups.items():
+            for word in words:
+                word = word.lower()
+                if word.endswith('*'):
+                    word = word[:-1]
+                    self._stems.setdefault(word, []).append(name)
+                    end = '*'
+                else:
+                    self._exact.setdefault(word, []).append(name)
+                    end = ''
+                node = trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                node[end] = {}
+
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+        self._pattern = re.compile(r'\b' + _trie_pattern(trie) + r'\b')
+        # Matched word -> (group, keyword) pairs; exact keywords are known up front
+        self._lookup: Dict[str, tuple] = {word: tuple(self._keywords_for(word)) for word in self._exact}
+
+    def _keywords_for(self, word: str) -> Iterable[tuple]:
+        """(group, keyword) pairs that a matched word counts towards"""
+        for name in self._exact.get(word, ()):
+            yield name, word
+        for length in self._stem_lengths:
+            stem = word[:length]
+            for name in self._stems.get(stem, ()):
+                yield name, stem + '*'
+
+    def find(self, text: str) -> Dict[str, Set[str]]:
+        """Distinct keywords found in ``text``, by group"""
+        found: Dict[str, Set[str]] = {}
+        lookup = self._lookup
+        for word in set(self._pattern.findall(text.lower())):
+            pairs = lookup.get(word)
+            if pairs is None:
+                pairs = tuple(self._keywords_for(word))
+                if len(lookup) < _LOOKUP_LIMIT:
+                    lookup[word] = pairs
+            for name, keyword in pairs:
+                if name in found:
+                    found[name].add(keyword)
+                else:
+                    found[name] = {keyword}
+        return found
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords from each group found in ``text``"""
+        return {name: len(keywords) for name, keywords in self.find(text).items()}
+
+    def classify(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """The first group, in declaration order, with any keyword in ``text``"""
+        found = self.find(text)
+        for name in self.groups:
+            if name in found:
+                return name
+        return default
+
+
+# Fallback emotion detection (APIHelper.analyze_emotion)
+EMOTION_KEYWORDS = {
+    'joy': ['happy', 'excited', 'great', 'awesome', 'love', 'wonderful'],
+    'sadness': ['sad', 'upset', 'disappointed', 'down', 'unhappy'],
+    'anger': ['angry', 'mad', 'frustrated', 'annoyed', 'irritated'],
+    'fear': ['scared', 'afraid', 'worried', 'nervous', 'anxious'],
+    'surprise': ['surprised', 'amazed', 'shocked', 'wow', 'incredible']
+}
+
+# Lesson/quiz subject routing, checked in this order
+TOPIC_KEYWORDS = {
+    'reading': ['read', 'reads', 'reading', 'reader*', 'story', 'stories', 'book*', 'letter*'],
+    'math': ['math*', 'number*', 'count', 'counts', 'counting', 'add', 'adding', 'addition'],
+    'social': ['social*', 'friend*', 'emotion*', 'feeling*']
+}
+
+# Tutor chat intents (generate_ai_response), checked in this order
+CHAT_INTENT_KEYWORDS = {
+    'help': ['help', 'stuck', 'difficult', 'hard'],
+    'math': ['math*', 'number*', 'count', 'counts', 'counting'],
+    'reading': ['read', 'reads', 'reading', 'book*', 'story', 'stories'],
+    'upset': ['sad', 'frustrated', 'angry', 'upset'],
+    'positive': ['good', 'great', 'awesome', 'happy']
+}
+
+EMOTION_MATCHER = KeywordMatcher(EMOTION_KEYWORDS)
+TOPIC_MATCHER = KeywordMatcher(TOPIC_KEYWORDS)
+CHAT_INTENT_MATCHER = KeywordMatcher(CHAT_INTENT_KEYWORDS)
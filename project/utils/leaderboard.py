@@ -0,0 +1,65 @@
+"""
+In-memory leaderboard ranking for the AI Tutor application
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Leaderboard:
+    """Users ranked by points, kept in a sorted list.
+
+    Entries are stored as ``(-points, user_id)`` so the list is in
+    leaderboard order. Top-N reads slice the head of the list and rank
+    lookups are a binary search; updates move a single entry.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, int]] = ()):
+        self._lock = threading.Lock()
+        self._points: Dict[int, int] = {}
+        self._order: List[Tuple[int, int]] = []
+        self.load(rows)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def load(self, rows: Iterable[Tuple[int, int]]):
+        """Replace the board with ``(user_id, points)`` rows"""
+        points = {user_id: total or 0 for user_id, total in rows}
+        order = sorted((-total, user_id) for user_id, total in points.items())
+
+        with self._lock:
+            self._points = points
+            self._order = order
+
+    def update(self, user_id: int, points: int):
+        """Set a user's total, moving their entry to its new position"""
+        points = points or 0
+
+        with self._lock:
+            old_points = self._points.get(user_id)
+            if old_points == points:
+                return
+            if old_points is not None:
+                index = bisect_left(self._order, (-old_points, user_id))
+                del self._order[index]
+            self._points[user_id] = points
+            insort(self._order, (-points, user_id))
+
+    def points(self, user_id: int) -> Optional[int]:
+        """Current total for a user, or None if they are not ranked"""
+        return self._points.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based rank of a user; users with equal points share a rank"""
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            return bisect_left(self._order, (-points,)) + 1
+
+    def top(self, limit: int = 10) -> List[Tuple[int, int]]:
+        """The ``limit`` highest ``(user_id, points)`` entries"""
+        with self._lock:
+            return [(user_id, -negative_points) for negative_points, user_id in self._order[:limit]]
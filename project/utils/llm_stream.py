@@ -0,0 +1,183 @@
+"""
+Streaming chat completions for the AI tutor
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+from config import API_CONFIG
+from utils.http_client import HTTP_ERRORS, get_session
+from utils.rate_limit import estimate_tokens, get_limiter
+from utils.retry import CircuitBreaker, get_breaker
+
+TUTOR_SYSTEM_PROMPT = (
+    "You are a patient, encouraging tutor for learners with special educational needs. "
+    "Use short sentences and simple words, one idea at a time, and end with a gentle question."
+)
+
+
+class StreamMetrics:
+    """Rolling time-to-first-token and total stream durations"""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._first_token = deque(maxlen=window)
+        self._total = deque(maxlen=window)
+        self.stats = {'streams': 0, 'failed': 0}
+
+    def record(self, first_token: Optional[float], total: float, failed: bool = False):
+        with self._lock:
+            self.stats['streams'] += 1
+            if failed:
+                self.stats['failed'] += 1
+            if first_token is not None:
+                self._first_token.append(first_token)
+            self._total.append(total)
+
+    def summary(self) -> Dict:
+        """p50/p95 time-to-first-token and total time, in seconds"""
+        with self._lock:
+            first_token, total = sorted(self._first_token), sorted(self._total)
+
+        def percentile(values: List[float], fraction: float) -> Optional[float]:
+            return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+        return {
+            **self.stats,
+            'ttft_p50': percentile(first_token, 0.5),
+            'ttft_p95': percentile(first_token, 0.95),
+            'total_p50': percentile(total, 0.5),
+            'total_p95': percentile(total, 0.95)
+        }
+
+
+tutor_stream_metrics = StreamMetrics()
+
+
+class TimedStream:
+    """Wraps a chunk iterator, recording time to first chunk and total time.
+
+    ``first_token_seconds`` is set as soon as the first non-empty chunk
+    arrives, so the UI can show it while the rest is still streaming.
+    """
+
+    def __init__(self, chunks: Iterable[str], metrics: StreamMetrics = tutor_stream_metrics):
+        self._chunks = chunks
+        self.metrics = metrics
+        self.first_token_seconds: Optional[float] = None
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.perf_counter()
+        failed = True
+        try:
+            for chunk in self._chunks:
+                if chunk and self.first_token_seconds is None:
+                    self.first_token_seconds = time.perf_counter() - started
+                yield chunk
+            failed = False
+        finally:
+            self.metrics.record(self.first_token_seconds, time.perf_counter() - started, failed)
+
+
+def _sse_data(response) -> Iterator[str]:
+    """Payloads of the ``data:`` lines in a server-sent events response"""
+    # chunk_size=None hands over data as it arrives instead of filling a buffer
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if line and line.startswith('data:'):
+            yield line[5:].strip()
+
+
+def stream_openai(messages: List[Dict], timeout: Optional[float] = None) -> Iterator[str]:
+    """Yield text deltas from an OpenAI chat completion with ``stream: true``"""
+    config = API_CONFIG['openai']
+    response = get_session().post(
+        config['api_url'],
+        json={'model': config['model'], 'messages': messages,
+              'max_tokens': config['max_tokens'], 'stream': True},
+        headers={'Authorization': f"Bearer {config['api_key']}"},
+        timeout=timeout or API_CONFIG['http']['timeout'],
+        stream=True
+    )
+    with response:
+        response.raise_for_status()
+        for data in _sse_data(response):
+            if data == '[DONE]':
+                break
+            choices = json.loads(data).get('choices') or [{}]
+            text = choices[0].get('delta', {}).get('content')
+            if text:
+                yield text
+
+
+def stream_gemini(messages: List[Dict], timeout: Optional[float] = None) -> Iterator[str]:
+    """Yield text chunks from Gemini's streamGenerateContent (SSE mode)"""
+    config = API_CONFIG['gemini']
+    system = ' '.join(m['content'] for m in messages if m['role'] == 'system')
+    contents = [
+        {'role': 'model' if m['role'] == 'assistant' else 'user', 'parts': [{'text': m['content']}]}
+        for m in messages if m['role'] != 'system'
+    ]
+    payload = {'contents': contents}
+    if system:
+        payload['systemInstruction'] = {'parts': [{'text': system}]}
+
+    response = get_session().post(
+        f"{config['api_url']}{config['model']}:streamGenerateContent",
+        params={'alt': 'sse', 'key': config['api_key']},
+        json=payload,
+        timeout=timeout or API_CONFIG['http']['timeout'],
+        stream=True
+    )
+    with response:
+        response.raise_for_status()
+        for data in _sse_data(response):
+            for candidate in json.loads(data).get('candidates', []):
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        yield part['text']
+
+
+STREAMING_PROVIDERS = {
+    'openai': stream_openai,
+    'gemini': stream_gemini
+}
+
+
+def stream_chat(messages: List[Dict]) -> Optional[Iterator[str]]:
+    """Stream a reply from the first configured provider, or None if none is usable.
+
+    Providers without an API key, with an open circuit breaker or out of
+    quota are skipped. A provider that fails before its first chunk hands
+    over to the next one; a failure mid-stream ends the reply early.
+    """
+    tokens = estimate_tokens(' '.join(m['content'] for m in messages), API_CONFIG['openai']['max_tokens'])
+    # Only peek at breaker state here: allow() may hand out a half-open
+    # breaker's single trial call, so it is claimed just before each attempt
+    candidates = [
+        name for name in STREAMING_PROVIDERS
+        if API_CONFIG[name]['api_key'] and get_limiter(name).has_quota(tokens)
+        and get_breaker(f"{name}:{API_CONFIG[name]['model']}").state != CircuitBreaker.OPEN
+    ]
+    if not candidates:
+        return None
+
+    def chunks() -> Iterator[str]:
+        for name in candidates:
+            breaker = get_breaker(f"{name}:{API_CONFIG[name]['model']}")
+            if not breaker.allow() or not get_limiter(name).acquire(tokens):
+                continue
+            started = False
+            try:
+                for chunk in STREAMING_PROVIDERS[name](messages):
+                    started = True
+                    yield chunk
+                breaker.record_success()
+                return
+            except (HTTP_ERRORS + (ValueError,)):
+                breaker.record_failure()
+                if started:
+                    return
+
+    return chunks()
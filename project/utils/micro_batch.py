@@ -0,0 +1,96 @@
+"""
+Micro-batching dispatcher for model calls that accept a list of inputs
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+
+class _Pending:
+    """One caller's item, waiting for its slot in a batch result"""
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """Gathers single-item requests from many threads into batched calls.
+
+    A background thread waits for the first request, then collects more for
+    up to ``max_wait_ms`` or until ``max_batch`` are waiting, and hands the
+    list to ``process_batch``. That function must return one result per
+    input, in order; each caller gets its own result back from ``submit``.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch: int = 32, max_wait_ms: float = 20):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.stats = {'items': 0, 'batches': 0, 'largest_batch': 0, 'failed': 0}
+
+    def _ensure_thread(self):
+        """Start the dispatcher on first use"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Queue an item and block until its batch has been processed"""
+        pending = _Pending(item)
+        self._ensure_thread()
+        self._queue.put(pending)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for a batched result")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _run(self):
+        """Background loop: gather a batch, process it, hand out results"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_Pending]):
+        """Run one batch and wake its callers"""
+        self.stats['items'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+        try:
+            results = self.process_batch([pending.item for pending in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch of {len(batch)} returned {len(results)} results")
+            for pending, result in zip(batch, results):
+                pending.result = result
+        except Exception as e:
+            self.stats['failed'] += len(batch)
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
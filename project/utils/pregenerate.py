@@ -0,0 +1,106 @@
+"""
+Offline job that warms the content cache for every lesson combination
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import API_CONFIG, LEARNING_CONFIG
+from utils.api_helpers import LESSON_CACHE_MODEL, APIHelper, lesson_router
+from utils.content_cache import get_content_cache
+
+
+class RateLimiter:
+    """Spaces call starts at least ``1 / rate`` seconds apart across threads"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_start = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def content_matrix(subjects: Optional[List[str]] = None) -> Iterator[Tuple[str, str, str]]:
+    """Every (subject, difficulty, special needs) combination the app can request"""
+    return itertools.product(
+        subjects or LEARNING_CONFIG['subjects'],
+        LEARNING_CONFIG['difficulty_levels'],
+        LEARNING_CONFIG['special_needs_categories']
+    )
+
+
+def pregenerate_content(subjects: Optional[List[str]] = None, workers: Optional[int] = None,
+                        requests_per_second: Optional[float] = None) -> Dict:
+    """Generate lessons and quizzes for the whole matrix, storing model output in the cache.
+
+    Combinations already fresh in the cache cost no API call, so the job can
+    be rerun (e.g. nightly) and only fills gaps and expired entries.
+    """
+    job_config = API_CONFIG['pregenerate']
+    workers = workers or job_config['workers']
+    limiter = RateLimiter(requests_per_second or job_config['requests_per_second'])
+    use_model = lesson_router.available()
+    cache = get_content_cache()
+
+    def call_model(prompt: str):
+        # Only real upstream calls are rate limited; cache hits skip the wait
+        limiter.wait()
+        return APIHelper.route_lesson_prompt(prompt)
+
+    def generate(combination: Tuple[str, str, str]) -> bool:
+        subject, difficulty, special_needs = combination
+        ok = True
+        if use_model:
+            prompt = APIHelper.build_lesson_prompt(subject, difficulty, special_needs)
+            ok = cache.get_or_compute(LESSON_CACHE_MODEL, prompt, lambda: call_model(prompt)) is not None
+        # Quizzes come from templates today; this checks every combination resolves
+        APIHelper.generate_quiz_questions(subject, difficulty)
+        return ok
+
+    report = {'combinations': 0, 'failed': 0}
+    stores_before = cache.stats['stores']
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pregenerate") as executor:
+        futures = [executor.submit(generate, combination) for combination in content_matrix(subjects)]
+        for future in as_completed(futures):
+            report['combinations'] += 1
+            if future.exception() is not None or not future.result():
+                report['failed'] += 1
+
+    report['generated'] = cache.stats['stores'] - stores_before
+    report['seconds'] = round(time.monotonic() - started, 2)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Warm the content cache: python -m utils.pregenerate"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-generate lesson content into the cache")
+    parser.add_argument('--subject', action='append', choices=LEARNING_CONFIG['subjects'],
+                        help="Only this subject (repeatable, default: all)")
+    parser.add_argument('--workers', type=int, help="Concurrent model calls")
+    parser.add_argument('--rate', type=float, help="Max model calls started per second")
+    args = parser.parse_args(argv)
+
+    if not lesson_router.available():
+        print("No model API key is set: lessons fall back to templates and nothing is cached")
+
+    report = pregenerate_content(args.subject, args.workers, args.rate)
+    print(f"Checked {report['combinations']} combination(s) in {report['seconds']}s: "
+          f"{report['generated']} generated, {report['failed']} failed")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+"""
+Token-bucket rate limits and quota accounting for model API providers
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from config import API_CONFIG, APP_CONFIG, DATABASE_CONFIG
+from utils.connection_pool import get_pool
+
+# Limit names in API_CONFIG['rate_limits'][provider] -> (bucket, unit, period in seconds)
+LIMIT_PERIODS = {
+    'requests_per_minute': ('rpm', 'requests', 60),
+    'tokens_per_minute': ('tpm', 'tokens', 60),
+    'requests_per_day': ('rpd', 'requests', 86400),
+    'tokens_per_day': ('tpd', 'tokens', 86400)
+}
+
+
+def estimate_tokens(text: str, max_output_tokens: int = 0) -> int:
+    """Rough token count for a prompt (~4 characters per token) plus its reply budget"""
+    return len(text) // 4 + 1 + max_output_tokens
+
+
+class TokenBucket:
+    """Refills continuously at ``capacity / period`` up to ``capacity``"""
+
+    def __init__(self, name: str, unit: str, capacity: float, period: float):
+        self.name = name
+        self.unit = unit
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    def level(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+
+class ProviderLimiter:
+    """Request and token quotas for one provider, as a set of token buckets.
+
+    Each call reserves one request and its estimated tokens from every
+    bucket. If a bucket is short the caller waits for it to refill, as long
+    as that takes at most ``max_wait`` seconds; otherwise the call is shed
+    before it reaches the provider, so it can fall back to templates. A
+    bucket may go negative while callers queue, which keeps them in order.
+
+    With ``shared`` on, bucket levels live in the ``rate_limits`` table, so
+    every worker process drawing on the same key shares one budget.
+    """
+
+    def __init__(self, name: str, limits: Optional[Dict] = None, max_wait: Optional[float] = None,
+                 shared: Optional[bool] = None, db_name: Optional[str] = None):
+        limits_config = API_CONFIG['rate_limits']
+        limits = limits if limits is not None else limits_config['providers'].get(name, {})
+
+        self.name = name
+        self.max_wait = max_wait if max_wait is not None else limits_config['max_wait']
+        self.buckets: List[TokenBucket] = [
+            TokenBucket(bucket, unit, limits[limit], period)
+            for limit, (bucket, unit, period) in LIMIT_PERIODS.items()
+            if limits.get(limit)
+        ]
+
+        shared = shared if shared is not None else limits_config['shared']
+        self.pool = get_pool(db_name or APP_CONFIG['database_name']) if shared else None
+        self._lock = threading.Lock()
+        self._state: Dict[str, List[float]] = {}
+        if self.pool is not None:
+            self._create_table()
+
+        self.stats = {'acquired': 0, 'queued': 0, 'shed': 0, 'throttled': 0}
+
+    def _create_table(self):
+        """Create the rate_limits table if the database predates it"""
+        columns = DATABASE_CONFIG['tables']['rate_limits']['columns']
+        with self.pool.connection() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS rate_limits ({', '.join(columns)})")
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, List[float]]]:
+        """Bucket levels as ``{bucket: [tokens, updated]}``, held exclusively while in use"""
+        if self.pool is None:
+            with self._lock:
+                yield self._state
+            return
+
+        with self._lock, self.pool.connection() as conn:
+            if not conn.in_transaction:
+                # Take the write lock up front so other processes cannot interleave
+                conn.execute('BEGIN IMMEDIATE')
+            state = self._select_state(conn)
+            yield state
+            conn.executemany(
+                'INSERT OR REPLACE INTO rate_limits (bucket_key, tokens, updated) VALUES (?, ?, ?)',
+                [(f"{self.name}:{bucket}", tokens, updated) for bucket, (tokens, updated) in state.items()]
+            )
+
+    def _read_state(self) -> Dict[str, List[float]]:
+        """A snapshot of the bucket levels, read without taking the write lock"""
+        if self.pool is None:
+            with self._lock:
+                return {bucket: list(level) for bucket, level in self._state.items()}
+
+        with self.pool.connection() as conn:
+            return self._select_state(conn)
+
+    def _select_state(self, conn) -> Dict[str, List[float]]:
+        rows = conn.execute(
+            'SELECT bucket_key, tokens, updated FROM rate_limits WHERE bucket_key LIKE ?',
+            (f"{self.name}:%",)
+        ).fetchall()
+        return {key.split(':', 1)[1]: [tokens, updated] for key, tokens, updated in rows}
+
+    def _levels(self, state: Dict[str, List[float]], now: float) -> Dict[str, float]:
+        return {
+            bucket.name: bucket.level(*state.get(bucket.name, (bucket.capacity, now)), now)
+            for bucket in self.buckets
+        }
+
+    def _amount(self, bucket: TokenBucket, tokens: int) -> float:
+        return 1 if bucket.unit == 'requests' else tokens
+
+    def reserve(self, tokens: int = 0, max_wait: Optional[float] = None) -> Optional[float]:
+        """Reserve quota for one call: seconds to wait before sending it, or None if shed"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        if not self.buckets:
+            self.stats['acquired'] += 1
+            return 0.0
+
+        now = time.time()
+        with self._locked_state() as state:
+            levels = self._levels(state, now)
+            wait = 0.0
+            for bucket in self.buckets:
+                amount = self._amount(bucket, tokens)
+                if amount > bucket.capacity:
+                    wait = float('inf')
+                elif levels[bucket.name] < amount:
+                    wait = max(wait, (amount - levels[bucket.name]) / bucket.rate)
+
+            if wait > max_wait:
+                self.stats['shed'] += 1
+                return None
+
+            for bucket in self.buckets:
+                state[bucket.name] = [levels[bucket.name] - self._amount(bucket, tokens), now]
+
+        self.stats['acquired'] += 1
+        if wait > 0:
+            self.stats['queued'] += 1
+        return wait
+
+    def acquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> bool:
+        """Block until the call may go out; False if it was shed instead"""
+        wait = self.reserve(tokens, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token buckets once the provider reports real usage"""
+        difference = estimated_tokens - actual_tokens
+        token_buckets = [bucket for bucket in self.buckets if bucket.unit == 'tokens']
+        if not difference or not token_buckets:
+            return
+
+        now = time.time()
+        with self._locked_state() as state:
+            levels = self._levels(state, now)
+            for bucket in token_buckets:
+                state[bucket.name] = [min(bucket.capacity, levels[bucket.name] + difference), now]
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """The provider answered 429: hold every caller off for ``retry_after`` seconds.
+
+        Empties the per-minute request bucket so that it refills no sooner
+        than the provider asked, instead of each thread finding out alone.
+        """
+        bucket = next((b for b in self.buckets if b.name == 'rpm'), None)
+        if bucket is None:
+            return
+
+        now = time.time()
+        pause = retry_after if retry_after is not None else 1 / bucket.rate
+        with self._locked_state() as state:
+            level = self._levels(state, now)[bucket.name]
+            state[bucket.name] = [min(level, -pause * bucket.rate + 1), now]
+        self.stats['throttled'] += 1
+
+    def remaining(self) -> Dict[str, float]:
+        """Requests or tokens available right now in each bucket, by bucket name"""
+        levels = self._levels(self._read_state(), time.time())
+        return {name: max(0.0, level) for name, level in levels.items()}
+
+    def has_quota(self, tokens: int = 0) -> bool:
+        """Whether a call would go out within ``max_wait`` (without reserving anything)"""
+        levels = self._levels(self._read_state(), time.time())
+        return all(
+            self._amount(bucket, tokens) <= bucket.capacity
+            and (self._amount(bucket, tokens) - levels[bucket.name]) / bucket.rate <= self.max_wait
+            for bucket in self.buckets
+        )
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> ProviderLimiter:
+    """Get the process-wide limiter for a provider, creating it on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = ProviderLimiter(name)
+            _limiters[name] = limiter
+        return limiter
+
+
+def quota_report() -> Dict[str, Dict[str, float]]:
+    """Remaining quota in each bucket for every configured provider"""
+    return {name: get_limiter(name).remaining() for name in API_CONFIG['rate_limits']['providers']}
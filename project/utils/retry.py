@@ -0,0 +1,155 @@
+"""
+Retry backoff and circuit breakers for model API calls
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from config import API_CONFIG
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by an overall deadline"""
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, multiplier: Optional[float] = None,
+                 deadline: Optional[float] = None):
+        retry_config = API_CONFIG['retry']
+
+        self.max_attempts = max_attempts if max_attempts is not None else retry_config['max_attempts']
+        self.base_delay = base_delay if base_delay is not None else retry_config['base_delay']
+        self.max_delay = max_delay if max_delay is not None else retry_config['max_delay']
+        self.multiplier = multiplier if multiplier is not None else retry_config['multiplier']
+        self.deadline = deadline if deadline is not None else retry_config['deadline']
+
+    def begin(self) -> "RetryState":
+        """Start tracking attempts for one call"""
+        return RetryState(self)
+
+
+class RetryState:
+    """Attempts and time budget left for a single call"""
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.attempt = 0
+        self.expires_at = time.monotonic() + policy.deadline
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def next_delay(self, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up.
+
+        A server hint (``Retry-After`` or ``estimated_time``) replaces the
+        jittered backoff. If the wait would run past the deadline, the call
+        gives up straight away instead of sleeping for nothing.
+        """
+        self.attempt += 1
+        if self.attempt >= self.policy.max_attempts:
+            return None
+
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            ceiling = self.policy.base_delay * self.policy.multiplier ** (self.attempt - 1)
+            delay = random.uniform(0, min(self.policy.max_delay, ceiling))
+
+        if delay >= self.remaining():
+            return None
+        return delay
+
+
+def parse_retry_after(headers, body=None) -> Optional[float]:
+    """Server-suggested wait in seconds from ``Retry-After`` or HF's ``estimated_time``"""
+    value = headers.get('Retry-After') if headers is not None else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    if isinstance(body, dict) and 'estimated_time' in body:
+        try:
+            return max(0.0, float(body['estimated_time']))
+        except (TypeError, ValueError):
+            pass
+
+    return None
+
+
+class CircuitBreaker:
+    """Stops calling a failing model until it has had time to recover.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow()`` returns False without touching the network. Once
+    ``reset_timeout`` has passed a single trial call is let through: success
+    closes the breaker, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None):
+        breaker_config = API_CONFIG['circuit_breaker']
+
+        self.failure_threshold = (failure_threshold if failure_threshold is not None
+                                  else breaker_config['failure_threshold'])
+        self.reset_timeout = (reset_timeout if reset_timeout is not None
+                              else breaker_config['reset_timeout'])
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # Also re-arms a trial call that never reported back
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker for a model, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[name] = breaker
+        return breaker
@@ -0,0 +1,200 @@
+"""
+Latency-aware routing of text generation calls across model providers
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from config import API_CONFIG
+from utils.rate_limit import ProviderLimiter
+from utils.retry import CircuitBreaker, get_breaker
+
+
+class LatencyTracker:
+    """Rolling latency percentiles and error rate for one provider"""
+
+    def __init__(self, window: int):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)   # successful calls only
+        self._outcomes = deque(maxlen=window)    # True for success
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            values = sorted(self._latencies)
+        return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+
+class Provider:
+    """A model endpoint the router can send a prompt to.
+
+    ``call`` takes the prompt and returns the generated text, or None on
+    failure. ``enabled`` says whether the provider is configured (e.g. has
+    an API key); ``breaker`` is the circuit breaker its call reports to and
+    ``limiter``, if any, the quota its call draws on.
+    """
+
+    def __init__(self, name: str, model: str, call: Callable[[str], Optional[str]],
+                 enabled: Callable[[], bool] = lambda: True,
+                 breaker: Optional[CircuitBreaker] = None,
+                 limiter: Optional[ProviderLimiter] = None):
+        self.name = name
+        self.model = model
+        self.call = call
+        self.enabled = enabled
+        self.breaker = breaker or get_breaker(f"{name}:{model}")
+        self.limiter = limiter
+
+    def usable(self) -> bool:
+        """Configured, breaker not open, and quota left"""
+        return (self.enabled() and self.breaker.state != CircuitBreaker.OPEN
+                and (self.limiter is None or self.limiter.has_quota()))
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}:{self.model}"
+
+
+class ModelRouter:
+    """Sends each prompt to the fastest healthy provider.
+
+    Providers are ranked by rolling p50 latency. Ones with fewer than
+    ``min_samples`` calls go first so every provider gets measured, and
+    ones whose error rate is above ``max_error_rate`` go last. Providers
+    that are not configured, whose breaker is open or that are out of quota
+    are skipped. A failed call moves on to the next provider.
+
+    With ``hedge`` on, if the first call is still running after that
+    provider's p95 latency, a second request goes to the next provider and
+    whichever answers first wins. The slower call is left to finish in the
+    background (its latency still counts) and its answer is dropped.
+    """
+
+    def __init__(self, providers: List[Provider], hedge: Optional[bool] = None,
+                 window: Optional[int] = None, min_samples: Optional[int] = None,
+                 max_error_rate: Optional[float] = None, hedge_min_delay: Optional[float] = None):
+        router_config = API_CONFIG['router']
+
+        self.providers = providers
+        self.hedge = hedge if hedge is not None else router_config['hedge']
+        self.min_samples = min_samples if min_samples is not None else router_config['min_samples']
+        self.max_error_rate = (max_error_rate if max_error_rate is not None
+                               else router_config['max_error_rate'])
+        self.hedge_min_delay = (hedge_min_delay if hedge_min_delay is not None
+                                else router_config['hedge_min_delay'])
+        window = window or router_config['window']
+        self.trackers: Dict[str, LatencyTracker] = {p.key: LatencyTracker(window) for p in providers}
+
+        self._executor = ThreadPoolExecutor(max_workers=router_config['max_workers'],
+                                            thread_name_prefix="model-router")
+        self.stats = {'calls': 0, 'failovers': 0, 'hedged': 0, 'hedge_wins': 0, 'failed': 0}
+
+    def available(self) -> bool:
+        """Whether any provider is configured and has quota left right now"""
+        return any(provider.usable() for provider in self.providers)
+
+    def ranked(self) -> List[Provider]:
+        """Usable providers, best first"""
+        usable = [p for p in self.providers if p.usable()]
+
+        def rank(provider: Provider) -> Tuple:
+            tracker = self.trackers[provider.key]
+            measured = tracker.samples >= self.min_samples
+            return (tracker.error_rate > self.max_error_rate, measured,
+                    tracker.percentile(0.5) or 0.0)
+
+        return sorted(usable, key=rank)
+
+    def _timed_call(self, provider: Provider, prompt: str) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            result = provider.call(prompt)
+        except Exception:
+            result = None
+        self.trackers[provider.key].record(time.perf_counter() - started, result is not None)
+        return result
+
+    def _hedge_delay(self, provider: Provider) -> Optional[float]:
+        """Seconds to wait on ``provider`` before hedging, or None to not hedge"""
+        tracker = self.trackers[provider.key]
+        p95 = tracker.percentile(0.95)
+        if not self.hedge or p95 is None or tracker.samples < self.min_samples:
+            return None
+        return max(p95, self.hedge_min_delay)
+
+    def complete(self, prompt: str) -> Optional[Tuple[str, str]]:
+        """(provider key, generated text) from the first provider to answer, or None"""
+        self.stats['calls'] += 1
+        queue = self.ranked()
+        if not queue:
+            self.stats['failed'] += 1
+            return None
+
+        running: Dict[Future, Provider] = {}
+
+        def start_next() -> bool:
+            if not queue:
+                return False
+            provider = queue.pop(0)
+            running[self._executor.submit(self._timed_call, provider, prompt)] = provider
+            return True
+
+        primary = queue[0]
+        start_next()
+        timeout = self._hedge_delay(primary)
+
+        while running:
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            timeout = None
+
+            if not done:
+                # Primary is slower than its usual p95: race it against the next provider
+                if start_next():
+                    self.stats['hedged'] += 1
+                continue
+
+            for future in done:
+                provider = running.pop(future)
+                text = future.result()
+                if text is not None:
+                    if provider is not primary:
+                        self.stats['hedge_wins' if len(running) else 'failovers'] += 1
+                    return provider.key, text
+
+            if not running:
+                start_next()
+
+        self.stats['failed'] += 1
+        return None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current latency, error rate and breaker state for each provider"""
+        return {
+            provider.key: {
+                'enabled': provider.enabled(),
+                'state': provider.breaker.state,
+                'quota': provider.limiter.remaining() if provider.limiter else None,
+                'samples': self.trackers[provider.key].samples,
+                'p50': self.trackers[provider.key].percentile(0.5),
+                'p95': self.trackers[provider.key].percentile(0.95),
+                'error_rate': self.trackers[provider.key].error_rate
+            }
+            for provider in self.providers
+        }
@@ -0,0 +1,352 @@
+"""
+Immutable lesson and quiz template registries
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+
+class LessonTemplate(NamedTuple):
+    """A lesson with ``{topic}`` placeholders in its title and content"""
+    title: str
+    content: str
+    activities: Tuple[str, ...]
+    tips: str
+
+    def render(self, topic: str) -> Mapping:
+        """Read-only lesson dict with the topic filled in"""
+        return MappingProxyType({
+            'title': self.title.replace('{topic}', topic),
+            'content': self.content.replace('{topic}', topic),
+            'activities': self.activities,
+            'tips': self.tips.replace('{topic}', topic)
+        })
+
+
+def _freeze_question(question: Dict) -> Mapping:
+    """Read-only copy of a quiz question, with its options as a tuple"""
+    return MappingProxyType({**question, 'options': tuple(question['options'])})
+
+
+class TemplateRegistry:
+    """Lesson and quiz templates indexed by (subject, difficulty).
+
+    Built once at import time from nested ``{subject: {difficulty: ...}}``
+    literals. Everything handed out is read-only and shared between callers:
+    rendered lessons are memoised per topic, and quiz questions are never
+    copied. Code that wants a variation (e.g. special needs adaptation) must
+    build a new dict rather than edit the one it was given.
+    """
+
+    def __init__(self, lessons: Dict[str, Dict[str, Dict]],
+                 quizzes: Optional[Dict[str, Dict[str, List[Dict]]]] = None):
+        self._lessons = MappingProxyType({
+            (subject, difficulty): LessonTemplate(
+                title=lesson['title'],
+                content=lesson['content'],
+                activities=tuple(lesson['activities']),
+                tips=lesson['tips']
+            )
+            for subject, levels in lessons.items()
+            for difficulty, lesson in levels.items()
+        })
+        self._quizzes = MappingProxyType({
+            (subject, difficulty): tuple(_freeze_question(question) for question in questions)
+            for subject, levels in (quizzes or {}).items()
+            for difficulty, questions in levels.items()
+        })
+        self._render = lru_cache(maxsize=1024)(self._render_lesson)
+
+    def _render_lesson(self, key: Tuple[str, str], topic: str) -> Mapping:
+        return self._lessons[key].render(topic)
+
+    def lesson(self, subject: str, difficulty: str, topic: str,
+               default: Optional[Tuple[str, str]] = None) -> Mapping:
+        """Rendered lesson for (subject, difficulty), or the ``default`` key's lesson"""
+        key = (subject, difficulty)
+        if key not in self._lessons:
+            if default is None:
+                raise KeyError(key)
+            key = default
+        return self._render(key, topic)
+
+    def quiz(self, subject: str, difficulty: str,
+             default: Optional[Tuple[str, str]] = None) -> Tuple[Mapping, ...]:
+        """Questions for (subject, difficulty), or the ``default`` key's questions"""
+        questions = self._quizzes.get((subject, difficulty))
+        if questions is None:
+            if default is None:
+                raise KeyError((subject, difficulty))
+            questions = self._quizzes[default]
+        return questions
+
+    def lesson_keys(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._lessons)
+
+    def quiz_keys(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._quizzes)
+
+
+# Fallback lessons and quizzes for APIHelper
+HELPER_LESSONS = {
+    "reading": {
+        "beginner": {
+            "title": "Reading Adventures: {topic}",
+            "content": "Today we'll explore the wonderful world of {topic}! We'll use pictures, sounds, and fun activities to help you learn. Reading is like going on an adventure - every page takes us somewhere new!",
+            "activities": [
+                "Look at pictures and name what you see",
+                "Practice letter sounds with fun games",
+                "Read simple words together"
+            ],
+            "tips": "Point to each word as you read. Don't worry about mistakes - they help us learn!"
+        },
+        "intermediate": {
+            "title": "Story Exploration: {topic}",
+            "content": "Let's dive deeper into {topic} through exciting stories and activities! We'll build your reading skills while having fun with characters and adventures.",
+            "activities": [
+                "Read short stories and discuss characters",
+                "Answer questions about what happened",
+                "Create your own story ending"
+            ],
+            "tips": "If you don't understand a word, look at the pictures for clues!"
+        }
+    },
+    "math": {
+        "beginner": {
+            "title": "Math Fun: {topic}",
+            "content": "Math is everywhere around us! Today we'll explore {topic} using objects you can touch and see. We'll count, sort, and play with numbers in fun ways!",
+            "activities": [
+                "Count objects using your fingers or toys",
+                "Sort items by size, color, or shape",
+                "Play number games with visual aids"
+            ],
+            "tips": "Use real objects to help you count - blocks, toys, or even snacks work great!"
+        },
+        "intermediate": {
+            "title": "Math Exploration: {topic}",
+            "content": "Ready for some math challenges? We'll explore {topic} through puzzles, patterns, and problem-solving activities that make math exciting!",
+            "activities": [
+                "Solve word problems step by step",
+                "Find patterns in numbers and shapes",
+                "Use math in real-life situations"
+            ],
+            "tips": "Break big problems into smaller pieces. Take your time and think it through!"
+        }
+    },
+    "social": {
+        "beginner": {
+            "title": "Social Skills: {topic}",
+            "content": "Learning about {topic} helps us make friends and feel good around others! We'll practice through games, stories, and fun activities.",
+            "activities": [
+                "Practice greetings and conversations",
+                "Learn about different emotions",
+                "Role-play social situations"
+            ],
+            "tips": "Practice with family first, then try with friends. Everyone learns at their own pace!"
+        }
+    }
+}
+
+HELPER_QUIZZES = {
+    "reading": {
+        "beginner": [
+            {
+                "question": "What sound does the letter 'A' make?",
+                "options": ["Ah", "Buh", "Kuh", "Duh"],
+                "correct": 0,
+                "explanation": "The letter A makes the 'Ah' sound, like in 'Apple'!"
+            },
+            {
+                "question": "Which word starts with 'B'?",
+                "options": ["Cat", "Ball", "Dog", "Fish"],
+                "correct": 1,
+                "explanation": "Ball starts with 'B' - B makes the 'Buh' sound!"
+            },
+            {
+                "question": "How many words are in this sentence: 'I like cats'?",
+                "options": ["2", "3", "4", "5"],
+                "correct": 1,
+                "explanation": "Count them: 'I' (1), 'like' (2), 'cats' (3) = 3 words!"
+            }
+        ],
+        "intermediate": [
+            {
+                "question": "What is a synonym for 'happy'?",
+                "options": ["Sad", "Joyful", "Angry", "Tired"],
+                "correct": 1,
+                "explanation": "Joyful means the same thing as happy!"
+            },
+            {
+                "question": "In the sentence 'The big dog ran fast', what describes the dog?",
+                "options": ["ran", "big", "fast", "the"],
+                "correct": 1,
+                "explanation": "'Big' is an adjective that describes the dog!"
+            }
+        ]
+    },
+    "math": {
+        "beginner": [
+            {
+                "question": "What comes after 7?",
+                "options": ["6", "8", "9", "5"],
+                "correct": 1,
+                "explanation": "When counting: 6, 7, 8... So 8 comes after 7!"
+            },
+            {
+                "question": "How many fingers do you have on one hand?",
+                "options": ["4", "5", "6", "3"],
+                "correct": 1,
+                "explanation": "Count your fingers: 1, 2, 3, 4, 5!"
+            },
+            {
+                "question": "What is 2 + 1?",
+                "options": ["2", "3", "4", "1"],
+                "correct": 1,
+                "explanation": "2 + 1 = 3. You can count: 2, then add 1 more!"
+            }
+        ],
+        "intermediate": [
+            {
+                "question": "What is 15 - 7?",
+                "options": ["7", "8", "9", "6"],
+                "correct": 1,
+                "explanation": "15 - 7 = 8. You can count backwards from 15!"
+            },
+            {
+                "question": "Which number is even?",
+                "options": ["7", "9", "12", "15"],
+                "correct": 2,
+                "explanation": "12 is even because it can be divided by 2 equally!"
+            }
+        ]
+    }
+}
+
+# Lesson suffixes added by APIHelper.adapt_for_special_needs
+SPECIAL_NEEDS_ADAPTATIONS = {
+    "Autism Spectrum Disorder": {
+        "content_suffix": " We'll use clear, simple steps and visual supports to help you succeed.",
+        "additional_tip": " Remember: it's okay to take breaks when you need them."
+    },
+    "ADHD": {
+        "content_suffix": " We'll keep activities short and fun with lots of movement and variety!",
+        "additional_tip": " Try to find a quiet space and take movement breaks when needed."
+    },
+    "Dyslexia": {
+        "content_suffix": " We'll use lots of pictures, colors, and different ways to show information.",
+        "additional_tip": " Don't worry about spelling - focus on understanding and expressing your ideas!"
+    },
+    "Intellectual Disability": {
+        "content_suffix": " We'll go step by step and repeat important ideas to help you learn.",
+        "additional_tip": " Take your time - there's no rush! Every small step is progress."
+    }
+}
+
+# Starter lessons and quizzes shown by the app's FreeAPIs
+APP_LESSONS = {
+    "math": {
+        "beginner": {
+            "title": "Basic {topic}",
+            "content": "Let's learn about {topic}! We'll start with simple concepts and use visual aids to help you understand.",
+            "activities": [
+                "Count objects in pictures",
+                "Match numbers with quantities",
+                "Simple addition with visual aids"
+            ],
+            "tips": "Use your fingers or objects to count along!"
+        },
+        "intermediate": {
+            "title": "Exploring {topic}",
+            "content": "Now that you know the basics, let's explore {topic} in more detail with fun exercises.",
+            "activities": [
+                "Solve word problems",
+                "Pattern recognition",
+                "Mental math exercises"
+            ],
+            "tips": "Take your time and think step by step!"
+        }
+    },
+    "reading": {
+        "beginner": {
+            "title": "Reading Adventures: {topic}",
+            "content": "Welcome to our reading journey! Today we'll explore {topic} with pictures and simple words.",
+            "activities": [
+                "Picture-word matching",
+                "Sound out letters",
+                "Simple sentence reading"
+            ],
+            "tips": "Sound out each letter slowly and put them together!"
+        },
+        "intermediate": {
+            "title": "Story Time: {topic}",
+            "content": "Let's read an exciting story about {topic} and learn new words together!",
+            "activities": [
+                "Read short paragraphs",
+                "Answer comprehension questions",
+                "Vocabulary building"
+            ],
+            "tips": "If you don't know a word, try to guess from the pictures!"
+        }
+    },
+    "social": {
+        "beginner": {
+            "title": "Social Skills: {topic}",
+            "content": "Learning about {topic} helps us interact better with others. Let's practice together!",
+            "activities": [
+                "Role-playing scenarios",
+                "Emotion recognition",
+                "Communication practice"
+            ],
+            "tips": "Practice makes perfect! Try these skills with family and friends."
+        }
+    }
+}
+
+APP_QUIZZES = {
+    "math": {
+        "beginner": [
+            {
+                "question": "What comes after the number 5?",
+                "options": ["4", "6", "7", "3"],
+                "correct": 1,
+                "explanation": "When counting: 1, 2, 3, 4, 5, 6... So 6 comes after 5!"
+            },
+            {
+                "question": "How many apples are there? 🍎🍎🍎",
+                "options": ["2", "3", "4", "5"],
+                "correct": 1,
+                "explanation": "Count them: 1, 2, 3 apples!"
+            }
+        ],
+        "intermediate": [
+            {
+                "question": "What is 7 + 3?",
+                "options": ["9", "10", "11", "8"],
+                "correct": 1,
+                "explanation": "7 + 3 = 10. You can count: 7, 8, 9, 10!"
+            }
+        ]
+    },
+    "reading": {
+        "beginner": [
+            {
+                "question": "What sound does the letter 'B' make?",
+                "options": ["Buh", "Duh", "Guh", "Puh"],
+                "correct": 0,
+                "explanation": "The letter B makes the 'Buh' sound, like in 'Ball' or 'Book'!"
+            }
+        ],
+        "intermediate": [
+            {
+                "question": "What is the main character in a story called?",
+                "options": ["Villain", "Hero", "Protagonist", "Author"],
+                "correct": 2,
+                "explanation": "The protagonist is the main character that the story follows!"
+            }
+        ]
+    }
+}
+
+HELPER_TEMPLATES = TemplateRegistry(HELPER_LESSONS, HELPER_QUIZZES)
+APP_TEMPLATES = TemplateRegistry(APP_LESSONS, APP_QUIZZES)
@@ -0,0 +1,356 @@
+"""
+Server-side text-to-speech with an on-disk audio cache
+"""
+
+import base64
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import requests
+from config import API_CONFIG, LEARNING_CONFIG
+from utils.http_client import HTTP_ERRORS, get_session, post_json
+from utils.single_flight import SingleFlight
+
+# (text, voice, rate, pitch) -> MP3 bytes, or None if synthesis failed
+Synthesizer = Callable[[str, str, float, float], Optional[bytes]]
+
+GOOGLE_TTS_URL = "https://texttospeech.googleapis.com/v1/text:synthesize"
+
+
+def responsivevoice_url(text: str, voice: str = "female", rate: Optional[float] = None,
+                        pitch: Optional[float] = None) -> str:
+    """ResponsiveVoice URL that speaks ``text``"""
+    tts_config = API_CONFIG['tts']['responsivevoice']
+    params = {
+        't': text,
+        'tl': 'en',
+        'sv': 'g1' if voice == 'female' else 'g2',
+        'vn': '',
+        'pitch': tts_config['pitch'] if pitch is None else pitch,
+        'rate': tts_config['rate'] if rate is None else rate,
+        'vol': tts_config['volume']
+    }
+    param_string = '&'.join([f"{k}={requests.utils.quote(str(v))}" for k, v in params.items()])
+    return f"{tts_config['base_url']}?{param_string}"
+
+
+def synthesize_responsivevoice(text: str, voice: str, rate: float, pitch: float) -> Optional[bytes]:
+    """Fetch the spoken audio from ResponsiveVoice on the server"""
+    try:
+        response = get_session().get(responsivevoice_url(text, voice, rate, pitch),
+                                     timeout=API_CONFIG['http']['timeout'])
+    except HTTP_ERRORS:
+        return None
+    if response.status_code != 200 or not response.headers.get('Content-Type', '').startswith('audio/'):
+        return None
+    return response.content
+
+
+def synthesize_google(text: str, voice: str, rate: float, pitch: float) -> Optional[bytes]:
+    """Google Cloud Text-to-Speech; rate and pitch use the ResponsiveVoice 0-1 scale"""
+    google_config = API_CONFIG['tts']['google_tts']
+    try:
+        response = post_json(
+            f"{GOOGLE_TTS_URL}?key={google_config['api_key']}",
+            {
+                'input': {'text': text},
+                'voice': {'languageCode': google_config['language'], 'name': google_config['voice']},
+                'audioConfig': {'audioEncoding': 'MP3', 'speakingRate': 0.5 + rate,
+                                'pitch': (pitch - 0.5) * 20}
+            }
+        )
+        if response.status_code == 200:
+            return base64.b64decode(response.json()['audioContent'])
+    except (HTTP_ERRORS + (KeyError, ValueError)):
+        pass
+    return None
+
+
+def default_synthesizer() -> Synthesizer:
+    """Google TTS when a key is configured, otherwise ResponsiveVoice"""
+    return synthesize_google if API_CONFIG['tts']['google_tts']['api_key'] else synthesize_responsivevoice
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic differences share one recording"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def split_sentences(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Sentences of ``text``, with any longer than ``max_chars`` split between words"""
+    max_chars = max_chars or API_CONFIG['tts']['chunking']['max_chars']
+    chunks = []
+    for sentence in re.split(r'(?<=[.!?])\s+', normalize_text(text)):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+
+def make_audio_key(text: str, voice: str, rate: float, pitch: float) -> str:
+    """Content address for a recording: sha256 over the text and voice settings"""
+    return hashlib.sha256(f"{normalize_text(text)}\0{voice}\0{rate}\0{pitch}".encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """MP3 files on disk, named by their audio key and bounded in total size.
+
+    Reads touch the file's mtime, so when the directory grows past
+    ``max_bytes`` the least recently played recordings are deleted first.
+    Files are written to a temporary name and renamed into place, so
+    concurrent readers (and other processes) never see a partial file.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        cache_config = API_CONFIG['tts']['cache']
+
+        self.directory = directory or cache_config['directory']
+        self.max_bytes = max_bytes if max_bytes is not None else cache_config['max_bytes']
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _entries(self) -> Iterator[Tuple[str, int, float]]:
+        """(path, size, mtime) for every cached recording"""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.mp3'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(audio)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Never leave a half-written temporary file behind
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._total_bytes += len(audio) - replaced
+            self.stats['stores'] += 1
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete least recently played recordings until the cache fits in ``max_bytes``"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._total_bytes = total
+            self.stats['evictions'] += removed
+        return removed
+
+
+class TextToSpeech:
+    """Renders text to MP3 once per (text, voice, rate, pitch) and serves it from disk.
+
+    Longer texts are read sentence by sentence: each sentence is its own
+    recording, cached separately so a sentence shared by several lessons is
+    synthesized once, and the sentences of one text are synthesized
+    concurrently. Concurrent requests for the same recording share one
+    synthesis call. Failed recordings come back as None, so callers can
+    fall back to the browser-side ResponsiveVoice URL.
+    """
+
+    def __init__(self, synthesize: Optional[Synthesizer] = None, cache: Optional[AudioCache] = None,
+                 workers: Optional[int] = None):
+        self.synthesize = synthesize or default_synthesizer()
+        self.cache = cache or AudioCache()
+        self._flight = SingleFlight()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or API_CONFIG['tts']['chunking']['workers'],
+            thread_name_prefix="tts"
+        )
+
+        self.stats = {'synthesized': 0, 'failed': 0}
+
+    def _settings(self, voice: Optional[str], rate: Optional[float],
+                  pitch: Optional[float]) -> Tuple[str, float, float]:
+        tts_config = API_CONFIG['tts']['responsivevoice']
+        return (voice or 'female',
+                tts_config['rate'] if rate is None else rate,
+                tts_config['pitch'] if pitch is None else pitch)
+
+    def render_chunks(self, text: str, voice: Optional[str] = None, rate: Optional[float] = None,
+                      pitch: Optional[float] = None) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """(sentence, MP3 bytes or None) in reading order, each as soon as it is ready.
+
+        Every sentence is submitted up front, so the first can be played
+        while the rest are still being synthesized.
+        """
+        futures = [(chunk, self._executor.submit(self.render, chunk, voice, rate, pitch))
+                   for chunk in split_sentences(text)]
+        for chunk, future in futures:
+            yield chunk, future.result()
+
+    def render_text(self, text: str, voice: Optional[str] = None, rate: Optional[float] = None,
+                    pitch: Optional[float] = None) -> Optional[bytes]:
+        """One MP3 for the whole of ``text`` (the sentence recordings joined), or None"""
+        chunks = [audio for _, audio in self.render_chunks(text, voice, rate, pitch)]
+        if not chunks or None in chunks:
+            return None
+        # MP3 is a stream of independent frames, so recordings play back to back when joined
+        return b''.join(chunks)
+
+    def render(self, text: str, voice: Optional[str] = None, rate: Optional[float] = None,
+               pitch: Optional[float] = None) -> Optional[bytes]:
+        """MP3 bytes for ``text`` as a single recording, synthesized only if it is not cached yet"""
+        voice, rate, pitch = self._settings(voice, rate, pitch)
+        text = normalize_text(text)
+        if not text:
+            return None
+
+        key = make_audio_key(text, voice, rate, pitch)
+        audio = self.cache.get(key)
+        if audio is not None:
+            return audio
+        return self._flight.do(key, lambda: self._synthesize(key, text, voice, rate, pitch))
+
+    def _synthesize(self, key: str, text: str, voice: str, rate: float, pitch: float) -> Optional[bytes]:
+        audio = self.synthesize(text, voice, rate, pitch)
+        if not audio:
+            self.stats['failed'] += 1
+            return None
+        self.cache.put(key, audio)
+        self.stats['synthesized'] += 1
+        return audio
+
+
+_tts: Optional[TextToSpeech] = None
+_tts_lock = threading.Lock()
+
+
+def get_tts() -> TextToSpeech:
+    """Get the process-wide text-to-speech service, creating it on first use"""
+    global _tts
+
+    with _tts_lock:
+        if _tts is None:
+            _tts = TextToSpeech()
+        return _tts
+
+
+def template_lesson_texts() -> List[str]:
+    """Every lesson text the templates can produce for the app's subjects"""
+    from utils.api_helpers import APIHelper
+    from utils.templates import APP_TEMPLATES
+
+    texts: Dict[str, None] = {}
+    for subject in LEARNING_CONFIG['subjects']:
+        for key in APP_TEMPLATES.lesson_keys():
+            texts[APP_TEMPLATES.lesson(*key, subject)['content']] = None
+        for difficulty in LEARNING_CONFIG['difficulty_levels']:
+            for special_needs in LEARNING_CONFIG['special_needs_categories']:
+                texts[APIHelper.get_template_content(subject, difficulty, special_needs)['content']] = None
+    return list(texts)
+
+
+def prerender_lessons(tts: Optional[TextToSpeech] = None, texts: Optional[List[str]] = None,
+                      workers: Optional[int] = None,
+                      requests_per_second: Optional[float] = None) -> Dict:
+    """Synthesize every sentence of every template lesson text into the audio cache.
+
+    Recordings already on disk cost nothing, so the job can be rerun after
+    templates change and only renders the new sentences.
+    """
+    from utils.pregenerate import RateLimiter
+
+    job_config = API_CONFIG['pregenerate']
+    tts = tts or get_tts()
+    lessons = texts if texts is not None else template_lesson_texts()
+    texts = list(dict.fromkeys(chunk for lesson in lessons for chunk in split_sentences(lesson)))
+    limiter = RateLimiter(requests_per_second or job_config['requests_per_second'])
+    voice, rate, pitch = tts._settings(None, None, None)
+
+    def render(text: str) -> bool:
+        if make_audio_key(text, voice, rate, pitch) in tts.cache:
+            return True
+        limiter.wait()
+        return tts.render(text) is not None
+
+    started = time.monotonic()
+    synthesized_before = tts.stats['synthesized']
+    with ThreadPoolExecutor(max_workers=workers or job_config['workers'],
+                            thread_name_prefix="tts-prerender") as executor:
+        results = list(executor.map(render, texts))
+
+    return {
+        'lessons': len(lessons),
+        'texts': len(texts),
+        'rendered': tts.stats['synthesized'] - synthesized_before,
+        'failed': results.count(False),
+        'seconds': round(time.monotonic() - started, 2)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Pre-render lesson audio: python -m utils.tts"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-render template lesson audio into the TTS cache")
+    parser.add_argument('--workers', type=int, help="Concurrent synthesis calls")
+    parser.add_argument('--rate', type=float, help="Max synthesis calls started per second")
+    args = parser.parse_args(argv)
+
+    report = prerender_lessons(workers=args.workers, requests_per_second=args.rate)
+    print(f"Checked {report['texts']} sentence(s) from {report['lessons']} lesson(s) in {report['seconds']}s: "
+          f"{report['rendered']} rendered, {report['failed']} failed")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
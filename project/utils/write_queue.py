@@ -0,0 +1,195 @@
+"""
+Write-behind queue for batching database writes off the Streamlit script thread
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+from config import DATABASE_CONFIG
+
+DURABILITY_MODES = ("async", "sync")
+
+logger = logging.getLogger(__name__)
+
+
+def is_busy_error(error: BaseException) -> bool:
+    """Whether a write failed only because another connection held the database lock"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class _Waiter:
+    """Lets a submitting thread wait for the batch holding its event"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class WriteBehindQueue:
+    """Collects write events from every session and commits them in batches.
+
+    Events are handed to ``write_batch`` by a single background thread once
+    ``batch_size`` events are waiting or ``flush_interval_ms`` has passed since
+    the first one arrived. In ``"async"`` durability mode ``submit`` returns
+    immediately; in ``"sync"`` mode it blocks until the batch holding the
+    event has been committed, which still shares one commit across callers.
+
+    A batch that fails because the database is busy or locked is retried
+    with exponential backoff. Any other failure replays the batch one event
+    at a time, so only the events that fail on their own are dropped; each
+    drop is logged and counted in ``stats['failed']``.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Tuple[str, tuple]]], Any],
+                 batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None,
+                 durability: Optional[str] = None,
+                 busy_retries: Optional[int] = None,
+                 busy_backoff_ms: Optional[float] = None):
+        queue_config = DATABASE_CONFIG['write_behind']
+
+        self.write_batch = write_batch
+        self.batch_size = batch_size if batch_size is not None else queue_config['batch_size']
+        self.flush_interval = (flush_interval_ms if flush_interval_ms is not None
+                               else queue_config['flush_interval_ms']) / 1000
+        self.durability = durability if durability is not None else queue_config['durability']
+        self.busy_retries = busy_retries if busy_retries is not None else queue_config['busy_retries']
+        self.busy_backoff = (busy_backoff_ms if busy_backoff_ms is not None
+                             else queue_config['busy_backoff_ms']) / 1000
+
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {self.durability}")
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {'submitted': 0, 'written': 0, 'batches': 0, 'failed': 0,
+                      'busy_retries': 0, 'replayed_batches': 0}
+        self.last_error: Optional[BaseException] = None
+
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        """Start the background writer on first use"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind-queue", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, kind: str, params: tuple):
+        """Queue one write event, e.g. ``("session", (user_id, ...))``"""
+        if self._closed:
+            # Shutting down: write straight through rather than drop the event
+            self.write_batch([(kind, params)])
+            return
+
+        waiter = _Waiter() if self.durability == "sync" else None
+        self.stats['submitted'] += 1
+        self._ensure_thread()
+        self._queue.put(((kind, params), waiter))
+
+        if waiter is not None:
+            waiter.done.wait()
+            if waiter.error is not None:
+                raise waiter.error
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written"""
+        if self._thread is None:
+            return True
+
+        waiter = _Waiter()
+        self._queue.put((None, waiter))
+        return waiter.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Flush pending events and stop the background writer"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+
+    def _run(self):
+        """Background loop: gather a batch, write it, wake any waiters"""
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+
+            # Flush markers cut a batch short so flush() returns promptly
+            while item[0] is not None and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+    def _write_with_retry(self, events: List[Tuple[str, tuple]]):
+        """Call ``write_batch``, backing off and retrying while the database is busy"""
+        for attempt in range(self.busy_retries + 1):
+            try:
+                self.write_batch(events)
+                return
+            except Exception as e:
+                if not is_busy_error(e) or attempt == self.busy_retries:
+                    raise
+                self.stats['busy_retries'] += 1
+                time.sleep(self.busy_backoff * 2 ** attempt)
+
+    def _drop(self, event: Tuple[str, tuple], error: BaseException):
+        self.last_error = error
+        self.stats['failed'] += 1
+        logger.error("Dropped %s write %r: %s", event[0], event[1], error)
+
+    def _write(self, batch: List[Tuple[Optional[Tuple[str, tuple]], Optional[_Waiter]]]):
+        """Write one batch and report the outcome of each event to its waiter"""
+        pending = [(event, waiter) for event, waiter in batch if event is not None]
+        events = [event for event, _ in pending]
+        errors: List[Optional[BaseException]] = [None] * len(events)
+
+        if events:
+            try:
+                self._write_with_retry(events)
+                self.stats['written'] += len(events)
+                self.stats['batches'] += 1
+            except Exception as e:
+                if is_busy_error(e) or len(events) == 1:
+                    # Still locked after every retry, or nothing to isolate
+                    errors = [e] * len(events)
+                else:
+                    # Replay one event at a time so only the bad ones are dropped
+                    self.stats['replayed_batches'] += 1
+                    for index, event in enumerate(events):
+                        try:
+                            self._write_with_retry([event])
+                            self.stats['written'] += 1
+                        except Exception as event_error:
+                            errors[index] = event_error
+
+        for event, error in zip(events, errors):
+            if error is not None:
+                self._drop(event, error)
+
+        for (event, waiter), error in zip(pending, errors):
+            if waiter is not None:
+                waiter.error = error
+                waiter.done.set()
+
+        # Flush markers
+        for event, waiter in batch:
+            if event is None and waiter is not None:
+                waiter.done.set()